@@ -0,0 +1,58 @@
+'''NMS, soft-NMS, weighted box fusion and overlap merging on 10k detections: `python -m benchmarks.detection`'''
+import numpy as np
+
+from benchmarks.geometry import time_case
+from utils.detection import merge_overlapping, nms, soft_nms, weighted_box_fusion
+from utils.geometry import Rect2Array
+
+COUNT = 10_000
+SCREEN = (1920, 1080)
+
+
+def scattered(rng: np.random.Generator) -> tuple[Rect2Array, np.ndarray]:
+    starts = rng.random((COUNT, 2)) * SCREEN
+    sizes = rng.uniform(8, 48, (COUNT, 2))
+    return Rect2Array(np.hstack([starts, starts + sizes])), rng.random(COUNT)
+
+
+def clustered(rng: np.random.Generator, objects: int = 200) -> tuple[Rect2Array, np.ndarray]:
+    '''COUNT matches of `objects` 32x32 templates, each found at offsets of up to 6 pixels'''
+    centers = rng.random((objects, 2)) * SCREEN
+    starts = centers[rng.integers(0, objects, COUNT)] + rng.uniform(-6, 6, (COUNT, 2))
+    return Rect2Array(np.hstack([starts, starts + 32])), rng.random(COUNT)
+
+
+def greedy_nms(rects: Rect2Array, scores: np.ndarray, iou_threshold: float = 0.5) -> np.ndarray:
+    bboxes = rects.values
+    areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+    remaining = np.argsort(-scores, kind='stable')
+    keep = []
+    while len(remaining) > 0:
+        best, rest = remaining[0], remaining[1:]
+        keep.append(best)
+        width = np.clip(np.minimum(bboxes[best, 2], bboxes[rest, 2]) - np.maximum(bboxes[best, 0], bboxes[rest, 0]), 0, None)
+        height = np.clip(np.minimum(bboxes[best, 3], bboxes[rest, 3]) - np.maximum(bboxes[best, 1], bboxes[rest, 1]), 0, None)
+        intersection = width * height
+        remaining = rest[intersection / (areas[best] + areas[rest] - intersection) <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    frames = {'scattered': scattered(rng), 'clustered': clustered(rng)}
+    cases = {
+        'greedy nms': lambda rects, scores: greedy_nms(rects, scores),
+        'nms': lambda rects, scores: nms(rects, scores),
+        'soft_nms': lambda rects, scores: soft_nms(rects, scores),
+        'weighted_box_fusion': lambda rects, scores: weighted_box_fusion(rects, scores),
+        'merge_overlapping': lambda rects, scores: merge_overlapping(rects),
+    }
+    print(f'{COUNT:,} rects, times in ms')
+    print(f'{"":>20} ' + ' '.join(f'{name:>10}' for name in frames))
+    for name, case in cases.items():
+        times = [time_case(lambda: case(*frame)) / 1e6 for frame in frames.values()]
+        print(f'{name:>20} ' + ' '.join(f'{time:>10.1f}' for time in times))
+
+
+if __name__ == '__main__':
+    main()
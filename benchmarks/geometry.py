@@ -0,0 +1,223 @@
+'''Geometry microbenchmarks with JSON baselines: `python -m benchmarks.geometry [--save | --compare] [-k NAME]`'''
+import argparse
+import copy
+import json
+import os
+import pickle
+import platform
+import sys
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from utils.geometry import DEPRECATED_RECT, GRect, Rect2, Vec2, Vec3, VecN
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'geometry.json')
+DEFAULT_THRESHOLD = 0.2 # Flag cases more than 20% slower than the baseline
+MIN_TIME = 0.02 # Seconds per repeat; the call count is doubled until a repeat takes this long
+REPEATS = 5
+
+
+def roundtrip(value: object) -> object:
+    return pickle.loads(pickle.dumps(value))
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    '''Benchmark name ("Type/operation") -> function doing one operation'''
+    vec, other_vec = VecN(1.5, 2.5, 3.5), VecN(4.0, 5.0, 6.0)
+    vec2, other_vec2 = Vec2(1.5, 2.5), Vec2(4.0, 5.0)
+    vec3, other_vec3 = Vec3(1.5, 2.5, 3.5), Vec3(4.0, 5.0, 6.0)
+    rect, other_rect = Rect2(10.0, 20.0, 110.0, 70.0), Rect2(50.0, 50.0, 150.0, 150.0)
+    old_rect, other_old_rect = DEPRECATED_RECT(10, 20, 100, 50), DEPRECATED_RECT(50, 50, 100, 100)
+    grect = GRect(10, 20, 100, 50)
+    point = Vec2(60.0, 40.0)
+    return {
+        'VecN/construct': lambda: VecN(1.5, 2.5, 3.5),
+        'VecN/add': lambda: vec + other_vec,
+        'VecN/mul_scalar': lambda: vec * 2.0,
+        'VecN/iadd': lambda: vec.__iadd__(other_vec),
+        'VecN/magnitude': lambda: vec.magnitude(),
+        'VecN/dot': lambda: vec.dot(other_vec),
+        'VecN/getitem': lambda: vec[1],
+        'VecN/eq': lambda: vec == other_vec,
+        'VecN/copy': lambda: copy.copy(vec),
+        'VecN/deepcopy': lambda: copy.deepcopy(vec),
+        'VecN/pickle': lambda: roundtrip(vec),
+
+        'Vec2/construct': lambda: Vec2(1.5, 2.5),
+        'Vec2/construct_tuple': lambda: Vec2((1.5, 2.5)),
+        'Vec2/add': lambda: vec2 + other_vec2,
+        'Vec2/sub': lambda: vec2 - other_vec2,
+        'Vec2/mul_scalar': lambda: vec2 * 2.0,
+        'Vec2/truediv_scalar': lambda: vec2 / 2.0,
+        'Vec2/iadd': lambda: vec2.__iadd__(other_vec2),
+        'Vec2/add_scaled': lambda: vec2.add_scaled(other_vec2, 0.016),
+        'Vec2/magnitude': lambda: vec2.magnitude(),
+        'Vec2/normalized': lambda: vec2.normalized(),
+        'Vec2/dot': lambda: vec2.dot(other_vec2),
+        'Vec2/x': lambda: vec2.x,
+        'Vec2/xy': lambda: vec2.xy,
+        'Vec2/values': lambda: vec2.values,
+        'Vec2/getitem': lambda: vec2[1],
+        'Vec2/eq': lambda: vec2 == other_vec2,
+        'Vec2/copy': lambda: copy.copy(vec2),
+        'Vec2/deepcopy': lambda: copy.deepcopy(vec2),
+        'Vec2/pickle': lambda: roundtrip(vec2),
+
+        'Vec3/construct': lambda: Vec3(1.5, 2.5, 3.5),
+        'Vec3/add': lambda: vec3 + other_vec3,
+        'Vec3/mul_scalar': lambda: vec3 * 2.0,
+        'Vec3/iadd': lambda: vec3.__iadd__(other_vec3),
+        'Vec3/magnitude': lambda: vec3.magnitude(),
+        'Vec3/dot': lambda: vec3.dot(other_vec3),
+        'Vec3/xy': lambda: vec3.xy,
+        'Vec3/eq': lambda: vec3 == other_vec3,
+        'Vec3/copy': lambda: copy.copy(vec3),
+        'Vec3/deepcopy': lambda: copy.deepcopy(vec3),
+        'Vec3/pickle': lambda: roundtrip(vec3),
+
+        'Rect2/construct': lambda: Rect2(10.0, 20.0, 110.0, 70.0),
+        'Rect2/construct_vecs': lambda: Rect2(vec2, other_vec2),
+        'Rect2/construct_size': lambda: Rect2(vec2, size=other_vec2),
+        'Rect2/from_bbox_unchecked': lambda: Rect2.from_bbox_unchecked(10.0, 20.0, 110.0, 70.0),
+        'Rect2/add': lambda: rect + point,
+        'Rect2/mul_scalar': lambda: rect * 2.0,
+        'Rect2/expanded': lambda: rect.expanded(4.0),
+        'Rect2/start_x': lambda: rect.start.x,
+        'Rect2/width': lambda: rect.width,
+        'Rect2/size': lambda: rect.size,
+        'Rect2/center': lambda: rect.center,
+        'Rect2/top_left': lambda: rect.top_left,
+        'Rect2/tuple_bbox': lambda: rect.tuple_bbox,
+        'Rect2/bbox': lambda: rect.bbox,
+        'Rect2/intersects': lambda: rect.intersects(other_rect),
+        'Rect2/contains': lambda: point in rect,
+        'Rect2/eq': lambda: rect == other_rect,
+        'Rect2/copy': lambda: copy.copy(rect),
+        'Rect2/deepcopy': lambda: copy.deepcopy(rect),
+        'Rect2/pickle': lambda: roundtrip(rect),
+
+        'DEPRECATED_RECT/construct': lambda: DEPRECATED_RECT(10, 20, 100, 50),
+        'DEPRECATED_RECT/from_bbox': lambda: DEPRECATED_RECT.from_bbox((10, 20, 110, 70)),
+        'DEPRECATED_RECT/add': lambda: old_rect + point,
+        'DEPRECATED_RECT/center': lambda: old_rect.center,
+        'DEPRECATED_RECT/size': lambda: old_rect.size,
+        'DEPRECATED_RECT/to_bbox': lambda: old_rect.to_bbox(),
+        'DEPRECATED_RECT/contains': lambda: point in old_rect,
+        'DEPRECATED_RECT/eq': lambda: old_rect == other_old_rect,
+        'DEPRECATED_RECT/copy': lambda: copy.copy(old_rect),
+        'DEPRECATED_RECT/deepcopy': lambda: copy.deepcopy(old_rect),
+        'DEPRECATED_RECT/pickle': lambda: roundtrip(old_rect),
+
+        'GRect/construct': lambda: GRect(10, 20, 100, 50),
+        'GRect/colored': lambda: grect.colored((255, 0, 0)),
+        'GRect/center': lambda: grect.center,
+        'GRect/contains': lambda: point in grect,
+        'GRect/copy': lambda: copy.copy(grect),
+        'GRect/deepcopy': lambda: copy.deepcopy(grect),
+        'GRect/pickle': lambda: roundtrip(grect),
+    }
+
+
+def time_case(function: Callable[[], object]) -> float:
+    '''Best nanoseconds per call over REPEATS runs of a calibrated number of calls'''
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= MIN_TIME:
+            break
+        number *= 2
+
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e9
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+    }
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path: str, results: dict[str, float]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({'environment': environment(), 'results': results}, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    '''Prints every case against the baseline and returns the names of the ones slower than `threshold` allows'''
+    slower = []
+    print(f'{"case":<32} {"baseline ns":>12} {"ns":>10} {"ratio":>7}')
+    for name, nanoseconds in results.items():
+        if name not in baseline:
+            print(f'{name:<32} {"-":>12} {nanoseconds:>10.0f} {"new":>7}')
+            continue
+        ratio = nanoseconds / baseline[name]
+        flag = ''
+        if ratio > 1 + threshold:
+            slower.append(name)
+            flag = '  SLOWER'
+        elif ratio < 1 / (1 + threshold):
+            flag = '  faster'
+        print(f'{name:<32} {baseline[name]:>12.0f} {nanoseconds:>10.0f} {ratio:>7.2f}{flag}')
+    return slower
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Geometry microbenchmarks with JSON baselines')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, metavar='PATH', help=f'store the results as a baseline (default {DEFAULT_BASELINE})')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, metavar='PATH', help='compare the results against a baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help=f'relative slowdown to flag (default {DEFAULT_THRESHOLD})')
+    parser.add_argument('-k', dest='pattern', default='', help='only run the cases whose name contains this text')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline['environment'] != environment():
+            print(f'Warning: the baseline was recorded in another environment: {baseline["environment"]}', file=sys.stderr)
+
+    selected = {name: function for name, function in cases().items() if args.pattern in name}
+    results = {}
+    for name, function in selected.items():
+        results[name] = time_case(function)
+        if baseline is None:
+            print(f'{name:<32} {results[name]:>10.0f} ns')
+
+    if args.save:
+        if args.pattern:
+            # Keep the cases that were not run this time
+            previous = load_baseline(args.save)['results'] if os.path.exists(args.save) else {}
+            save_baseline(args.save, {**previous, **results})
+        else:
+            save_baseline(args.save, results)
+        print(f'Baseline saved to {args.save}', file=sys.stderr)
+
+    if baseline is not None:
+        slower = compare(results, baseline['results'], args.threshold)
+        if slower:
+            print(f'{len(slower)} case(s) more than {args.threshold:.0%} slower than the baseline: {", ".join(slower)}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
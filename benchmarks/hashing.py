@@ -0,0 +1,47 @@
+'''Set and dict workloads on 1M frozen vectors and rects against tuple keys: `python -m benchmarks.hashing`'''
+import random
+import time
+
+from utils.geometry import FrozenRect2, FrozenVec2, Rect2, Vec2, Vec2Int
+
+COUNT = 1_000_000
+CELLS = 200_000 # Distinct cells, so the visited set sees many duplicates
+
+
+def timed(function) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def report(name: str, keys: list, convert: float) -> None:
+    build, visited = timed(lambda: set(keys))
+    lookup, _ = timed(lambda: sum(key in visited for key in keys))
+    build_dict, cache = timed(lambda: {key: index for index, key in enumerate(keys)})
+    get, _ = timed(lambda: [cache[key] for key in keys])
+    print(f'{name:>14} {convert * 1e3:>10.0f} {build * 1e3:>10.0f} {lookup * 1e3:>10.0f} {build_dict * 1e3:>10.0f} {get * 1e3:>10.0f} {len(visited):>9}')
+
+
+def main():
+    rng = random.Random(0)
+    cells = [(rng.randrange(1000), rng.randrange(CELLS // 1000)) for _ in range(COUNT)]
+    vecs = [Vec2(x, y) for x, y in cells]
+    rects = [Rect2(x, y, x + 1, y + 1) for x, y in cells]
+
+    print(f'{COUNT:,} keys ({CELLS:,} distinct), times in ms')
+    print(f'{"key":>14} {"convert":>10} {"set":>10} {"in set":>10} {"dict":>10} {"dict[]":>10} {"distinct":>9}')
+    convert, keys = timed(lambda: [(vec.x, vec.y) for vec in vecs])
+    report('tuple(x, y)', keys, convert)
+    convert, keys = timed(lambda: [Vec2Int(x, y) for x, y in cells])
+    report('Vec2Int', keys, convert)
+    convert, keys = timed(lambda: [vec.frozen() for vec in vecs])
+    report('FrozenVec2', keys, convert)
+
+    convert, keys = timed(lambda: [rect.tuple_bbox for rect in rects])
+    report('tuple bbox', keys, convert)
+    convert, keys = timed(lambda: [rect.frozen() for rect in rects])
+    report('FrozenRect2', keys, convert)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+'''KD-tree nearest-neighbour queries against brute force: `python -m benchmarks.kdtree`'''
+import random
+import time
+
+import numpy as np
+
+from utils.geometry import Vec2, Vec2Array
+from utils.kdtree import KDTree
+
+SIZES = [1_000, 100_000, 1_000_000]
+QUERIES = 1000
+WORLD = 10_000
+
+
+def time_per_query(query, args: list) -> float:
+    '''Average seconds per call of `query` over `args`'''
+    start = time.perf_counter()
+    for arg in args:
+        query(arg)
+    return (time.perf_counter() - start) / len(args)
+
+
+def main():
+    rng = random.Random(0)
+    print(f'{"N":>9} {"backend":>12} {"nearest µs":>11} {"knn(8) µs":>10} {"batch µs/q":>11} {"build ms":>10}')
+    for count in SIZES:
+        vecs = [Vec2(rng.uniform(0, WORLD), rng.uniform(0, WORLD)) for _ in range(count)]
+        points = Vec2Array(vecs)
+        queries = [Vec2(rng.uniform(0, WORLD), rng.uniform(0, WORLD)) for _ in range(QUERIES)]
+        query_values = Vec2Array(queries).values
+
+        loop_queries = queries[:max(1, 100_000 // count)]
+        loop = time_per_query(lambda query: min(range(count), key=lambda i: (vecs[i] - query).magnitude()), loop_queries)
+        print(f'{count:>9} {"vec2 loop":>12} {loop * 1e6:>11.1f} {"-":>10} {"-":>11} {"-":>10}')
+
+        numpy_queries = queries[:max(10, 10_000_000 // count)]
+        brute = time_per_query(lambda query: np.argmin((points - query).magnitude()), numpy_queries)
+        brute_knn = time_per_query(lambda query: np.argpartition((points - query).magnitude(), 8)[:8], numpy_queries)
+        print(f'{count:>9} {"numpy":>12} {brute * 1e6:>11.1f} {brute_knn * 1e6:>10.1f} {"-":>11} {"-":>10}')
+
+        start = time.perf_counter()
+        tree = KDTree(points)
+        build = time.perf_counter() - start
+        nearest = time_per_query(tree.nearest, queries)
+        knn = time_per_query(lambda query: tree.k_nearest(query, 8), queries)
+        start = time.perf_counter()
+        tree.query(query_values, k=8)
+        batch = (time.perf_counter() - start) / QUERIES
+        print(f'{count:>9} {"kdtree":>12} {nearest * 1e6:>11.1f} {knn * 1e6:>10.1f} {batch * 1e6:>11.1f} {build * 1e3:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
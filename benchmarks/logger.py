@@ -0,0 +1,52 @@
+'''Synchronous and asynchronous Logger on a burst of log_debug calls: `python -m benchmarks.logger`'''
+import contextlib
+import tempfile
+import time
+
+from benchmarks.geometry import time_case
+from utils.logger import Backpressure, Logger, MessageLevel
+
+BURST = 10_000
+
+
+def burst(logger: Logger) -> tuple[float, float]:
+    '''Seconds spent logging BURST messages, and then waiting for them to be printed'''
+    start = time.perf_counter()
+    for index in range(BURST):
+        logger.log_debug(f'entity {index} moved', 'physics')
+    logged = time.perf_counter()
+    logger.flush()
+    return logged - start, time.perf_counter() - logged
+
+
+def main():
+    loggers = {
+        'sync': lambda: Logger(),
+        'async block': lambda: Logger(asynchronous=True, queue_size=BURST),
+        'async drop': lambda: Logger(asynchronous=True, queue_size=1000, backpressure=Backpressure.DROP),
+    }
+    results = {}
+    with tempfile.TemporaryFile('w', buffering=1) as output, contextlib.redirect_stdout(output):
+        for name, make in loggers.items():
+            logger = make()
+            results[name] = (*burst(logger), logger.dropped_count)
+            logger.disable_async()
+
+    print(f'{BURST:,} log_debug calls, times in ms')
+    print(f'{"logger":>12} {"logging":>8} {"us/call":>8} {"flush":>8} {"dropped":>8}')
+    for name, (logging, flush, dropped) in results.items():
+        print(f'{name:>12} {logging * 1e3:>8.1f} {logging / BURST * 1e6:>8.2f} {flush * 1e3:>8.1f} {dropped:>8}')
+
+    logger, index = Logger(level=MessageLevel.INFO), 42
+    print('\nlog_trace skipped by the level, times in ns')
+    for name, call in {
+        'string': lambda: logger.log_trace(f'entity {index} moved', 'physics'),
+        'format args': lambda: logger.log_trace('entity %s moved', 'physics', args=(index,)),
+        'callable': lambda: logger.log_trace(lambda: f'entity {index} moved', 'physics'),
+        'is_enabled': lambda: logger.is_enabled(MessageLevel.TRACE, 'physics'),
+    }.items():
+        print(f'{name:>12} {time_case(call):>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+'''Record files against one pickle of the whole run: `python -m benchmarks.records`'''
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from benchmarks.serialization import EntityState, entity
+from utils.records import RecordReader, RecordWriter
+
+COUNT = 100_000
+READS = 1000
+
+
+def timed(function) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def blank() -> EntityState:
+    return EntityState.__new__(EntityState)
+
+
+def main():
+    states = [entity(index) for index in range(COUNT)]
+    indices = random.Random(0).sample(range(COUNT), READS)
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path, record_path = os.path.join(directory, 'states.pickle'), os.path.join(directory, 'states.rec')
+
+        def write_pickle():
+            with open(pickle_path, 'wb') as file:
+                pickle.dump(states, file)
+
+        def write_records():
+            with RecordWriter(record_path) as writer:
+                for state in states:
+                    writer.append(state)
+
+        print(f'{COUNT:,} states, {READS:,} reads, times in ms')
+        print(f'{"":>8} {"write":>8} {"open":>8} {"random":>8} {"range":>8} {"MB":>6}')
+        write, _ = timed(write_pickle)
+
+        def load():
+            with open(pickle_path, 'rb') as file:
+                return pickle.load(file)
+
+        open_time, loaded = timed(load)
+        random_read, _ = timed(lambda: [loaded[index] for index in indices])
+        range_read, _ = timed(lambda: loaded[COUNT // 2:COUNT // 2 + READS])
+        print(f'{"pickle":>8} {write * 1e3:>8.0f} {open_time * 1e3:>8.0f} {random_read * 1e3:>8.1f} {range_read * 1e3:>8.1f} {os.path.getsize(pickle_path) / 1e6:>6.1f}')
+
+        write, _ = timed(write_records)
+        open_time, reader = timed(lambda: RecordReader(record_path, blank))
+        with reader:
+            random_read, _ = timed(lambda: [reader[index] for index in indices])
+            range_read, _ = timed(lambda: list(reader.records(COUNT // 2, COUNT // 2 + READS)))
+        print(f'{"records":>8} {write * 1e3:>8.0f} {open_time * 1e3:>8.1f} {random_read * 1e3:>8.1f} {range_read * 1e3:>8.1f} {os.path.getsize(record_path) / 1e6:>6.1f}')
+
+
+if __name__ == '__main__':
+    main()
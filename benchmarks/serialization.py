@@ -0,0 +1,132 @@
+'''Serializable codecs, out-of-band pickles, lazy reads and deltas against pickle: `python -m benchmarks.serialization`'''
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from benchmarks.geometry import time_case
+from utils.geometry import DEPRECATED_RECT, GRect, Rect2, Rect2Array, Vec2, VecN
+from utils.serialization import Serializable, TrackedSerializable
+
+
+@dataclass
+class EntityState(Serializable):
+    position: Vec2
+    velocity: Vec2
+    bounds: Rect2
+    health: int
+    alive: bool
+    name: str
+
+
+@dataclass
+class WorldState(Serializable):
+    tick: int
+    camera: Rect2
+    player: EntityState
+    enemy: EntityState
+    weights: VecN
+    mask: np.ndarray
+    labels: tuple = field(default_factory=tuple)
+
+
+@dataclass
+class TrackedEntity(TrackedSerializable):
+    position: Vec2
+    velocity: Vec2
+    bounds: Rect2
+    health: int
+    name: str
+
+
+@dataclass
+class TrackedWorld(TrackedSerializable):
+    tick: int
+    camera: Rect2
+    player: TrackedEntity
+    enemy: TrackedEntity
+    weights: VecN
+    mask: np.ndarray = field(compare=False)
+
+
+def entity(index: int) -> EntityState:
+    return EntityState(Vec2(10.0 * index, 20.0), Vec2(1.5, -0.5), Rect2(10.0 * index, 20.0, 10.0 * index + 32, 52.0), 100, True, f'entity-{index}')
+
+
+@dataclass
+class FrameState(Serializable):
+    tick: int
+    frame: np.ndarray
+    detections: Rect2Array
+
+
+def samples() -> dict[str, Serializable]:
+    return {
+        'Rect2': Rect2(10.0, 20.0, 110.0, 70.0),
+        'DEPRECATED_RECT': DEPRECATED_RECT(10, 20, 100, 50),
+        'GRect': GRect(10, 20, 100, 50, color=(255, 0, 0)),
+        'EntityState': entity(1),
+        'WorldState': WorldState(42, Rect2(0.0, 0.0, 1920.0, 1080.0), entity(1), entity(2), VecN(*range(16)), np.zeros((32, 32), dtype=np.uint8), ('a', 'b')),
+    }
+
+
+def main():
+    print(f'{"type":>16} {"pickle B":>9} {"codec B":>8} {"pickle ser ns":>14} {"codec ser ns":>13} {"speedup":>8} {"pickle de ns":>13} {"codec de ns":>12} {"speedup":>8}')
+    for name, value in samples().items():
+        pickled, encoded = value.serialize(), value.serialize_codec()
+        target = type(value).__new__(type(value))
+        pickle_serialize = time_case(value.serialize)
+        codec_serialize = time_case(value.serialize_codec)
+        pickle_target = samples()[name]
+        pickle_deserialize = time_case(lambda: pickle_target._deserialize_pickled(pickled))
+        codec_deserialize = time_case(lambda: target.deserialize(encoded))
+        print(f'{name:>16} {len(pickled):>9} {len(encoded):>8} {pickle_serialize:>14.0f} {codec_serialize:>13.0f} {pickle_serialize / codec_serialize:>7.1f}x '
+              f'{pickle_deserialize:>13.0f} {codec_deserialize:>12.0f} {pickle_deserialize / codec_deserialize:>7.1f}x')
+
+    frame_state = FrameState(42, np.zeros((1080, 1920, 3), dtype=np.uint8), Rect2Array(np.random.default_rng(0).random((1000, 4))))
+    target = FrameState.__new__(FrameState)
+    pickled, encoded = frame_state.serialize(), frame_state.serialize_codec()
+    data, buffers = frame_state.serialize_out_of_band()
+    raw = [buffer.raw() for buffer in buffers]
+    print('\n1080p frame and 1000 detections, times in us')
+    print(f'{"path":>16} {"bytes":>9} {"serialize":>10} {"deserialize":>12}')
+    for name, size, serialize, deserialize in [
+        ('pickle', len(pickled), frame_state.serialize, lambda: target.deserialize(pickled)),
+        ('codec', len(encoded), frame_state.serialize_codec, lambda: target.deserialize(encoded)),
+        ('out of band', len(data), frame_state.serialize_out_of_band, lambda: target.deserialize(data, raw)),
+    ]:
+        print(f'{name:>16} {size:>9} {time_case(serialize) / 1e3:>10.1f} {time_case(deserialize) / 1e3:>12.1f}')
+
+    world = samples()['WorldState']
+    encoded = world.serialize_codec()
+    print('\nWorldState deserialization reading tick and player.position, times in ns')
+    for lazy in (False, True):
+        def read():
+            state = WorldState.__new__(WorldState).deserialize(encoded, lazy=lazy)
+            return state.tick, state.player.position
+        print(f'{"lazy" if lazy else "eager":>16} {time_case(read):>9.0f}')
+
+    def tracked_entity(index: int) -> TrackedEntity:
+        return TrackedEntity(Vec2(10.0 * index, 20.0), Vec2(1.5, -0.5), Rect2(10.0 * index, 20.0, 10.0 * index + 32, 52.0), 100, f'entity-{index}')
+
+    tracked = TrackedWorld(0, Rect2(0.0, 0.0, 1920.0, 1080.0), tracked_entity(1), tracked_entity(2), VecN(*range(16)), np.zeros((32, 32), dtype=np.uint8))
+    since = tracked.version
+
+    def checkpoint_delta() -> bytes:
+        nonlocal since
+        tracked.tick += 1
+        tracked.player.position += tracked.player.velocity
+        delta, since = tracked.serialize_delta(since)
+        return delta
+
+    def checkpoint_full() -> bytes:
+        tracked.tick += 1
+        tracked.player.position += tracked.player.velocity
+        return tracked.serialize_codec()
+
+    print('\nTrackedWorld checkpoint per tick (tick and player position change), times in ns')
+    for name, checkpoint in (('serialize_codec', checkpoint_full), ('serialize_delta', checkpoint_delta)):
+        print(f'{name:>16} {len(checkpoint()):>9} B {time_case(checkpoint):>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
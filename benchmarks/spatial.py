@@ -0,0 +1,59 @@
+'''Rect2 spatial index queries against a linear scan: `python -m benchmarks.spatial`'''
+import math
+import random
+import time
+
+from utils.geometry import Rect2, Vec2
+from utils.spatial import GridIndex, RTreeIndex
+
+SCREEN = Vec2(1920, 1080)
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = 200
+
+
+def random_points(count: int, world: Vec2, rng: random.Random) -> list[Vec2]:
+    return [Vec2(rng.uniform(0, world.x), rng.uniform(0, world.y)) for _ in range(count)]
+
+
+def random_rects(count: int, world: Vec2, rng: random.Random) -> list[Rect2]:
+    rects = []
+    for start in random_points(count, world, rng):
+        rects.append(Rect2(start, size=Vec2(rng.uniform(4, 48), rng.uniform(4, 48))))
+    return rects
+
+
+def time_per_query(query, args: list) -> float:
+    '''Average seconds per call of `query` over `args`'''
+    start = time.perf_counter()
+    for arg in args:
+        query(arg)
+    return (time.perf_counter() - start) / len(args)
+
+
+def main():
+    rng = random.Random(0)
+    print(f'{"N":>8} {"backend":>8} {"point µs":>10} {"rect µs":>10} {"knn(8) µs":>10} {"build ms":>10}')
+    for count in SIZES:
+        world = SCREEN * math.sqrt(count / SIZES[0])
+        rects = random_rects(count, world, rng)
+        points = random_points(QUERIES, world, rng)
+        windows = [Rect2(point, size=Vec2(64, 64)) for point in points]
+
+        linear = {
+            'point': time_per_query(lambda point: [i for i, rect in enumerate(rects) if point in rect], points[:20]),
+            'rect': time_per_query(lambda window: [i for i, rect in enumerate(rects) if rect.intersects(window)], windows[:20]),
+        }
+        print(f'{count:>8} {"linear":>8} {linear["point"] * 1e6:>10.1f} {linear["rect"] * 1e6:>10.1f} {"-":>10} {"-":>10}')
+
+        for name, index in (('grid', GridIndex(cell_size=64)), ('rtree', RTreeIndex())):
+            start = time.perf_counter()
+            index.bulk_load(enumerate(rects))
+            build = time.perf_counter() - start
+            point = time_per_query(index.query_point, points)
+            window = time_per_query(index.query_rect, windows)
+            nearest = time_per_query(lambda point: index.nearest(point, k=8), points)
+            print(f'{count:>8} {name:>8} {point * 1e6:>10.1f} {window * 1e6:>10.1f} {nearest * 1e6:>10.1f} {build * 1e3:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import itertools
+
+import numpy as np
+
+from utils.broadphase import SweepAndPrune
+from utils.geometry import Rect2
+
+
+def brute_force_pairs(rects: dict[int, Rect2], order: list[int]) -> set[tuple[int, int]]:
+    return {(a, b) for a, b in itertools.combinations(order, 2) if a in rects and b in rects and rects[a].intersects(rects[b])}
+
+
+def test_pairs_follow_moving_rects():
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(0, 300, (120, 2))
+    velocities = rng.uniform(-4, 4, (120, 2))
+    rects = {key: Rect2(x, y, x + 20, y + 12) for key, (x, y) in enumerate(positions.tolist())}
+    order = list(rects)
+    broadphase = SweepAndPrune()
+    broadphase.add_many(rects.items())
+    previous = set()
+    for frame in range(40):
+        if frame % 10 == 5:
+            for key in rng.choice(list(rects), 5, replace=False).tolist():
+                broadphase.remove(key)
+                del rects[key]
+            for _ in range(5):
+                key = len(order)
+                x, y = rng.uniform(0, 300, 2).tolist()
+                rects[key] = Rect2(x, y, x + 20, y + 12)
+                broadphase.add(key, rects[key])
+                order.append(key)
+        positions += velocities
+        for key in rects:
+            if key < len(positions):
+                x, y = positions[key].tolist()
+                rects[key] = Rect2(x, y, x + 20, y + 12)
+                broadphase.update(key, rects[key])
+        events = broadphase.step()
+        expected = brute_force_pairs(rects, order)
+        assert broadphase.pairs == expected
+        assert events.entered == expected - previous
+        assert events.stayed == expected & previous
+        assert events.exited == previous - expected
+        for key in rects:
+            assert broadphase.overlapping(key) == {b if a == key else a for a, b in expected if key in (a, b)}
+        previous = expected
+
+
+def test_touching_rects_overlap():
+    broadphase = SweepAndPrune()
+    broadphase.add('a', Rect2(0, 0, 10, 10))
+    broadphase.add('b', Rect2(10, 10, 20, 20))
+    assert broadphase.step().entered == {('a', 'b')}
+    broadphase.update('b', Rect2(10.5, 10, 20, 20))
+    assert broadphase.step().exited == {('a', 'b')}
@@ -0,0 +1,27 @@
+import numpy as np
+
+from utils.crop import CropBuffer, Interpolation, crop_views
+from utils.geometry import Rect2, Vec2
+
+
+def test_crops_match_views_and_follow_changed_rects():
+    image = np.random.default_rng(0).integers(0, 255, (60, 80, 3), dtype=np.uint8)
+    buffer = CropBuffer()
+    for rects in ([Rect2(0, 0, 10, 8), Rect2(30, 20, 40, 28)], [Rect2(0, 0, 10, 8), Rect2(31, 20, 41, 28)], [Rect2(5, 5, 15, 13)]):
+        crops = buffer.crop(image, rects)
+        assert crops.shape == (len(rects), 8, 10, 3)
+        for crop, view in zip(crops, crop_views(image, rects)):
+            assert np.array_equal(crop, view)
+
+
+def test_pixels_outside_the_image_are_filled():
+    image = np.arange(12, dtype=float).reshape(3, 4)
+    crops = CropBuffer(padding=1, fill=-1).crop(image, [Rect2(0, 0, 2, 2)])
+    assert crops[0].tolist() == [[-1, -1, -1, -1], [-1, 0, 1, 2], [-1, 4, 5, 6], [-1, 8, 9, 10]]
+
+
+def test_linear_resize_of_a_constant_image_is_constant():
+    buffer = CropBuffer(Vec2(7, 5), interpolation=Interpolation.LINEAR)
+    for value in (10, 20):
+        crops = buffer.crop(np.full((40, 40), value, dtype=np.uint8), [Rect2(3, 4, 20, 30), Rect2(10, 10, 13, 12)])
+        assert (crops == value).all()
@@ -0,0 +1,124 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.detection import SoftNMSMethod, merge_overlapping, nms, overlapping_pairs, soft_nms, weighted_box_fusion
+from utils.geometry import Rect2
+
+
+def iou(a, b) -> float:
+    width = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    height = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def sequential_nms(bboxes, scores, iou_threshold):
+    keep = []
+    for index in sorted(range(len(bboxes)), key=lambda index: (-scores[index], index)):
+        if all(iou(bboxes[index], bboxes[kept]) <= iou_threshold for kept in keep):
+            keep.append(index)
+    return keep
+
+
+def sequential_soft_nms(bboxes, scores, iou_threshold, sigma, linear, score_threshold):
+    current = list(scores)
+    remaining = [index for index in range(len(bboxes)) if current[index] > score_threshold]
+    keep = []
+    while remaining:
+        pick = max(remaining, key=lambda index: (current[index], -index))
+        keep.append(pick)
+        remaining.remove(pick)
+        for index in remaining:
+            overlap = iou(bboxes[index], bboxes[pick])
+            if linear:
+                current[index] *= 1 - overlap if overlap > iou_threshold else 1.0
+            else:
+                current[index] *= math.exp(-(overlap * overlap) / sigma)
+        remaining = [index for index in remaining if current[index] > score_threshold]
+    return keep, [current[index] for index in keep]
+
+
+def sequential_wbf(bboxes, scores, iou_threshold):
+    clusters = []
+    for index in sorted(range(len(bboxes)), key=lambda index: (-scores[index], index)):
+        overlaps = [iou(cluster['fused'], bboxes[index]) for cluster in clusters]
+        best = int(np.argmax(overlaps)) if overlaps else -1
+        if best < 0 or overlaps[best] <= iou_threshold:
+            clusters.append({'sum': np.multiply(bboxes[index], scores[index]), 'score': scores[index], 'count': 1, 'fused': np.array(bboxes[index], dtype=float)})
+            continue
+        cluster = clusters[best]
+        cluster['sum'] = cluster['sum'] + np.multiply(bboxes[index], scores[index])
+        cluster['score'] += scores[index]
+        cluster['count'] += 1
+        if cluster['score'] > 0:
+            cluster['fused'] = cluster['sum'] / cluster['score']
+    fused_scores = np.array([cluster['score'] / cluster['count'] for cluster in clusters])
+    order = np.argsort(-fused_scores, kind='stable')
+    return np.array([clusters[index]['fused'] for index in order]).reshape(-1, 4), fused_scores[order]
+
+
+def random_detections(seed: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(0, 300))
+    starts = rng.random((count, 2)) * rng.choice([30, 100, 300])
+    sizes = rng.uniform(2, 40, (count, 2))
+    if seed % 3 == 0:
+        starts, sizes = np.round(starts), np.round(sizes) + 1
+    scores = rng.random(count)
+    if seed % 4 == 0:
+        scores = np.round(scores, 1)
+    return np.hstack([starts, starts + sizes]), scores
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_overlapping_pairs_match_brute_force(seed):
+    bboxes, _ = random_detections(seed)
+    rects = [Rect2(*bbox) for bbox in bboxes.tolist()]
+    expected = {(a, b) for a in range(len(rects)) for b in range(a + 1, len(rects)) if rects[a].intersects(rects[b])}
+    firsts, seconds = overlapping_pairs(bboxes)
+    found = [(min(a, b), max(a, b)) for a, b in zip(firsts.tolist(), seconds.tolist())]
+    assert len(found) == len(set(found))
+    assert set(found) == expected
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('iou_threshold', [0.1, 0.5, 0.8])
+def test_nms_matches_sequential(seed, iou_threshold):
+    bboxes, scores = random_detections(seed)
+    assert nms(bboxes, scores, iou_threshold).tolist() == sequential_nms(bboxes.tolist(), scores.tolist(), iou_threshold)
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('method', list(SoftNMSMethod))
+def test_soft_nms_matches_sequential(seed, method):
+    bboxes, scores = random_detections(seed)
+    keep, decayed = soft_nms(bboxes, scores, 0.3, 0.5, method, 0.05)
+    expected_keep, expected_scores = sequential_soft_nms(bboxes.tolist(), scores.tolist(), 0.3, 0.5, method == SoftNMSMethod.LINEAR, 0.05)
+    assert keep.tolist() == expected_keep
+    np.testing.assert_allclose(decayed, expected_scores, rtol=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(30))
+@pytest.mark.parametrize('iou_threshold', [0.001, 0.3, 0.55, 0.8])
+def test_weighted_box_fusion_matches_sequential(seed, iou_threshold):
+    bboxes, scores = random_detections(seed)
+    fused, fused_scores = weighted_box_fusion(bboxes, scores, iou_threshold)
+    expected, expected_scores = sequential_wbf(bboxes.tolist(), scores.tolist(), iou_threshold)
+    np.testing.assert_allclose(fused.values.reshape(-1, 4), expected, rtol=1e-12)
+    np.testing.assert_allclose(fused_scores, expected_scores, rtol=1e-12)
+
+
+def test_weighted_box_fusion_follows_moving_clusters():
+    # The third rect overlaps none of the others, only the fused rect of the first two
+    fused, scores = weighted_box_fusion([[0, 0, 10, 10], [2, 2, 12, 12], [10.5, 1, 11, 1.5]], [0.9, 0.8, 0.1], 0.001)
+    assert len(fused) == 1
+    np.testing.assert_allclose(scores, [0.6])
+
+
+def test_merge_overlapping():
+    merged, labels = merge_overlapping([[0, 0, 2, 2], [2, 2, 4, 4], [10, 10, 11, 11]])
+    assert merged.values.tolist() == [[0, 0, 4, 4], [10, 10, 11, 11]]
+    assert labels.tolist() == [0, 0, 1]
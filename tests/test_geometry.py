@@ -0,0 +1,37 @@
+import pickle
+
+import pytest
+
+from utils.geometry import DEPRECATED_RECT, FrozenRect2, FrozenVec2, Rect2, Vec2, Vec2Int
+
+
+def test_vec2int_equality_with_float_vectors_is_symmetric():
+    close, far = Vec2(1 + 1e-12, 2), Vec2(1.5, 2)
+    assert close == Vec2Int(1, 2) and Vec2Int(1, 2) == close
+    assert far != Vec2Int(1, 2) and Vec2Int(1, 2) != far
+    assert Vec2Int(1, 2) == Vec2Int(1, 2)
+    assert len({Vec2Int(1, 2), Vec2Int(1, 2)}) == 1
+
+
+def test_deprecated_rect_points_are_vec2():
+    rect = DEPRECATED_RECT(1, 2, 10, 20)
+    for point in (rect.center, rect.pivot, rect.size, rect.top_left, rect.top_right, rect.bottom_left, rect.bottom_right):
+        assert type(point) is Vec2
+    assert rect.bottom_right == Vec2(11, 22)
+
+
+def test_frozen_vec2_equality_with_mutable_vectors_is_symmetric():
+    close = Vec2(1 + 1e-12, 2)
+    assert close == FrozenVec2(1, 2) and FrozenVec2(1, 2) == close
+    assert FrozenVec2(1 + 1e-12, 2) != FrozenVec2(1, 2)
+    assert FrozenVec2(1, 2) == Vec2Int(1, 2) and hash(FrozenVec2(1, 2)) == hash(Vec2Int(1, 2))
+
+
+def test_rect2_is_unhashable_and_slotted():
+    rect = Rect2(0, 0, 2, 2)
+    with pytest.raises(TypeError):
+        hash(rect)
+    assert not hasattr(rect, '__dict__')
+    assert pickle.loads(pickle.dumps(rect)) == rect
+    assert Rect2.__new__(Rect2).deserialize(rect.serialize()) == rect
+    assert hash(FrozenRect2(0, 0, 2, 2)) == hash(FrozenRect2(rect))
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from utils.geometry import Vec2, Vec3
+from utils.kdtree import KDTree
+
+
+@pytest.fixture(params=[(2, 1), (2, 16), (3, 4)], ids=['2d_leaf1', '2d', '3d'])
+def tree_and_points(request) -> tuple[KDTree, np.ndarray]:
+    dimension, leaf_size = request.param
+    rng = np.random.default_rng(0)
+    points = rng.uniform(0, 100, (500, dimension))
+    # Repeated points, so that some neighbours are tied
+    points[:50] = points[50:100]
+    return KDTree(points, leaf_size), points
+
+
+def distances_to(points: np.ndarray, query: np.ndarray) -> np.ndarray:
+    return np.sqrt(((points - query) ** 2).sum(axis=1))
+
+
+def vector(query: np.ndarray):
+    return Vec2(*query) if len(query) == 2 else Vec3(*query)
+
+
+def test_nearest_matches_brute_force(tree_and_points):
+    tree, points = tree_and_points
+    for query in np.random.default_rng(1).uniform(-20, 120, (100, points.shape[1])):
+        distances = distances_to(points, query)
+        assert distances[tree.nearest(vector(query))] == pytest.approx(distances.min())
+        for k in (1, 7, 600):
+            found = tree.k_nearest(vector(query), k)
+            assert len(set(found)) == len(found) == min(k, len(points))
+            np.testing.assert_allclose(distances[found], np.sort(distances)[:k])
+
+
+def test_within_radius_matches_brute_force(tree_and_points):
+    tree, points = tree_and_points
+    for query in np.random.default_rng(2).uniform(-20, 120, (100, points.shape[1])):
+        distances = distances_to(points, query)
+        found = tree.within_radius(vector(query), 15)
+        assert sorted(found) == np.flatnonzero(distances <= 15).tolist()
+        assert distances[found].tolist() == sorted(distances[found])
+
+
+def test_batched_queries_match_single_queries(tree_and_points):
+    tree, points = tree_and_points
+    queries = np.random.default_rng(3).uniform(-20, 120, (200, points.shape[1]))
+    distances, indices = tree.query(queries, 5)
+    radii = np.linspace(0, 20, len(queries))
+    for query, row_distances, row_indices, radius, within in zip(queries, distances, indices, radii, tree.query_radius(queries, radii)):
+        expected = distances_to(points, query)
+        np.testing.assert_allclose(row_distances, np.sort(expected)[:5])
+        np.testing.assert_allclose(expected[row_indices], row_distances)
+        assert sorted(within.tolist()) == np.flatnonzero(expected <= radius).tolist()
+
+
+def test_query_pads_missing_neighbours():
+    distances, indices = KDTree([Vec2(0, 0), Vec2(3, 4)]).query([[0, 0]], 3)
+    assert distances.tolist() == [[0, 5, np.inf]]
+    assert indices.tolist() == [[0, 1, -1]]
+
+
+def test_empty_tree():
+    tree = KDTree()
+    assert tree.k_nearest(Vec2(0, 0), 3) == []
+    with pytest.raises(ValueError):
+        tree.nearest(Vec2(0, 0))
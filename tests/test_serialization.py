@@ -0,0 +1,84 @@
+import copy
+import pickle
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from utils.geometry import Vec2
+from utils.serialization import LAZY_FIELDS, Serializable, TrackedSerializable
+
+
+@dataclass
+class Inner(Serializable):
+    position: Vec2
+    name: str
+
+
+@dataclass
+class Outer(Serializable):
+    tick: int
+    inner: Inner
+    other: Optional[Inner] = None
+
+
+@dataclass
+class TrackedInner(TrackedSerializable):
+    position: Vec2
+
+
+@dataclass
+class TrackedOuter(TrackedSerializable):
+    tick: int
+    inner: TrackedInner
+
+
+def outer() -> Outer:
+    return Outer(1, Inner(Vec2(1, 2), 'a'), Inner(Vec2(3, 4), 'b'))
+
+
+def lazy(data: bytes) -> Outer:
+    return Outer.__new__(Outer).deserialize(data, lazy=True)
+
+
+def test_serialize_is_pickle_and_serialize_codec_round_trips():
+    state = outer()
+    assert pickle.loads(state.serialize())['tick'] == 1
+    assert Outer(0, Inner(Vec2(0, 0), ''), Inner(Vec2(0, 0), '')).deserialize(state.serialize()) == state
+    assert Outer.__new__(Outer).deserialize(state.serialize_codec()) == state
+
+
+def test_lazy_deserialize_leaves_the_class_alone():
+    attributes = dict(Outer.__dict__)
+    state = lazy(outer().serialize_codec())
+    assert dict(Outer.__dict__) == attributes
+    assert isinstance(state, Outer) and type(state) is not Outer
+    assert type(state).__qualname__ == 'Outer'
+    eager = Outer.__new__(Outer).deserialize(outer().serialize_codec())
+    assert type(eager) is Outer and LAZY_FIELDS not in eager.__dict__
+
+
+def test_lazy_fields_decode_on_first_read():
+    state = lazy(outer().serialize_codec())
+    assert state.tick == 1 and 'inner' not in state.__dict__
+    assert state.inner == Inner(Vec2(1, 2), 'a')
+    assert 'other' not in state.__dict__ and type(state) is not Outer
+    assert state.other == Inner(Vec2(3, 4), 'b')
+    assert type(state) is Outer and LAZY_FIELDS not in state.__dict__
+
+
+@pytest.mark.parametrize('load', [copy.copy, copy.deepcopy, lambda state: pickle.loads(pickle.dumps(state)), lambda state: state])
+def test_lazy_instances_copy_and_compare_as_their_class(load):
+    data = outer().serialize_codec()
+    state = load(lazy(data))
+    assert state == outer() and outer() == state
+    assert lazy(data).serialize_codec() == data
+    assert lazy(data).serialize() == outer().serialize()
+
+
+def test_lazy_tracked_fields_keep_tracking_changes():
+    state = TrackedOuter.__new__(TrackedOuter).deserialize(TrackedOuter(1, TrackedInner(Vec2(1, 2))).serialize_codec(), lazy=True)
+    since = state.version
+    state.inner.position.x = 5
+    delta, _ = state.serialize_delta(since)
+    assert pickle.loads(delta) == {'values': {}, 'nested': {'inner': {'values': {'position': Vec2(5, 2)}, 'nested': {}, 'deleted': []}}, 'deleted': []}
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from utils.geometry import Rect2, Vec2
+from utils.spatial import GridIndex, RTreeIndex, SpatialIndex, _bbox_point_distance
+
+INDEXES = [lambda: GridIndex(16), lambda: GridIndex(Vec2(5, 40)), lambda: RTreeIndex(4), RTreeIndex]
+
+
+def random_rects(rng: np.random.Generator, count: int) -> dict[int, Rect2]:
+    starts = rng.uniform(0, 200, (count, 2))
+    sizes = rng.uniform(0, 30, (count, 2))
+    return {key: Rect2(*start, *(start + size)) for key, (start, size) in enumerate(zip(starts, sizes))}
+
+
+@pytest.fixture(params=INDEXES, ids=['grid', 'grid_uneven', 'rtree_small', 'rtree'])
+def index_and_rects(request) -> tuple[SpatialIndex, dict[int, Rect2]]:
+    rng = np.random.default_rng(0)
+    rects = random_rects(rng, 300)
+    index = request.param()
+    index.bulk_load(list(rects.items())[:200])
+    for key in range(200, 300):
+        index.insert(key, rects[key])
+    for key in rng.choice(300, 60, replace=False).tolist():
+        assert index.remove(key) == rects.pop(key)
+    return index, rects
+
+
+def test_spatial_index_is_abstract():
+    with pytest.raises(TypeError):
+        SpatialIndex()
+
+
+def test_query_point_matches_brute_force(index_and_rects):
+    index, rects = index_and_rects
+    rng = np.random.default_rng(1)
+    for x, y in rng.uniform(-10, 240, (200, 2)).tolist():
+        point = Vec2(x, y)
+        assert sorted(index.query_point(point)) == sorted(key for key, rect in rects.items() if point in rect)
+
+
+def test_query_rect_matches_brute_force(index_and_rects):
+    index, rects = index_and_rects
+    for query in random_rects(np.random.default_rng(2), 100).values():
+        assert sorted(index.query_rect(query)) == sorted(key for key, rect in rects.items() if rect.intersects(query))
+
+
+def test_query_borders_are_inclusive(index_and_rects):
+    index, _ = index_and_rects
+    index.insert('edge', Rect2(300, 300, 310, 310))
+    assert 'edge' in index.query_point(Vec2(310, 300))
+    assert 'edge' in index.query_rect(Rect2(310, 310, 320, 320))
+
+
+@pytest.mark.parametrize('k', [1, 5, 400])
+def test_nearest_matches_brute_force(index_and_rects, k):
+    index, rects = index_and_rects
+    for x, y in np.random.default_rng(3).uniform(-50, 250, (50, 2)).tolist():
+        distances = {key: _bbox_point_distance(rect.tuple_bbox, x, y) for key, rect in rects.items()}
+        found = index.nearest(Vec2(x, y), k)
+        assert len(set(found)) == len(found) == min(k, len(rects))
+        assert [distances[key] for key in found] == sorted(distances.values())[:k]
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from utils.geometry import Rect2, Vec2
+from utils.tiling import TileExecutor, tile_rects
+
+
+def covers(tiles: np.ndarray, region: Rect2) -> bool:
+    '''Whether the tiles cover the region, checked on the grid of every tile border'''
+    xs = np.unique(np.concatenate([tiles[:, 0], tiles[:, 2], [region.start.x, region.end.x]]))
+    ys = np.unique(np.concatenate([tiles[:, 1], tiles[:, 3], [region.start.y, region.end.y]]))
+    xs, ys = xs[(xs >= region.start.x) & (xs <= region.end.x)], ys[(ys >= region.start.y) & (ys <= region.end.y)]
+    centers = np.stack(np.meshgrid((xs[1:] + xs[:-1]) / 2, (ys[1:] + ys[:-1]) / 2), axis=-1).reshape(-1, 2)
+    inside = (tiles[:, None, :2] <= centers) & (centers <= tiles[:, None, 2:])
+    return bool(inside.all(axis=2).any(axis=0).all())
+
+
+@pytest.mark.parametrize('region', [Rect2(0, 0, 100, 10), Rect2(0.5, 0, 100.5, 10), Rect2(-3.25, 7.5, 211.75, 64.1), Rect2(0, 0, 1000, 30)])
+@pytest.mark.parametrize('tile_size, stride', [(50, None), (Vec2(32, 8), Vec2(25.5, 3)), (30, 12.5)])
+def test_tiles_cover_the_region_from_inside(region, tile_size, stride):
+    tiles = tile_rects(region, tile_size, stride=stride).values
+    size = np.array([tile_size.x, tile_size.y] if isinstance(tile_size, Vec2) else [tile_size] * 2)
+    assert (tiles[:, :2] >= (region.start.x, region.start.y)).all()
+    assert (tiles[:, 2:] <= (region.end.x, region.end.y)).all()
+    assert np.allclose(tiles[:, 2:] - tiles[:, :2], np.minimum(size, (region.width, region.height)))
+    assert covers(tiles, region)
+    step = size if stride is None else np.array([stride.x, stride.y] if isinstance(stride, Vec2) else [stride] * 2)
+    for axis in (0, 1):
+        starts = np.unique(tiles[:, axis])
+        assert (np.diff(starts) <= step[axis] + 1e-9).all()
+
+
+def test_fractional_region_tiles_stay_inside():
+    assert tile_rects(Rect2(0.5, 0, 100.5, 10), Vec2(50, 10)).values.tolist() == [[0.5, 0, 50.5, 10], [50.5, 0, 100.5, 10]]
+
+
+def test_whole_pixel_starts():
+    tiles = tile_rects(Rect2(0, 0, 100, 30), 30, stride=25).values
+    assert np.unique(tiles[:, 0]).tolist() == [0, 23, 46, 70]
+
+
+def test_executor_maps_tile_crops():
+    image = np.arange(100).reshape(10, 10)
+    with TileExecutor(2) as executor:
+        sums = executor.map(np.sum, image, tile_rects(Rect2(0, 0, 10, 10), 5))
+    assert sum(sums) == image.sum()
+
+
+def test_sub_pixel_stride():
+    starts = np.unique(tile_rects(Rect2(0, 0, 32, 30), 30, stride=0.75).values[:, 0])
+    assert starts[0] == 0 and starts[-1] == 2
+    assert (np.diff(starts) <= 0.75).all()
@@ -0,0 +1,54 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from utils.geometry import Rect2
+from utils.tracking import AssignmentMethod, RectTracker, _solve_assignment
+
+
+def brute_force_cost(cost: np.ndarray) -> float:
+    rows, columns = cost.shape
+    if rows <= columns:
+        return min(cost[range(rows), list(chosen)].sum() for chosen in itertools.permutations(range(columns), rows))
+    return brute_force_cost(cost.T)
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (3, 3), (5, 5), (2, 6), (6, 3), (7, 7)])
+@pytest.mark.parametrize('seed', range(10))
+def test_solve_assignment_is_optimal(shape, seed):
+    rng = np.random.default_rng(seed)
+    # Small integer costs make ties common
+    cost = rng.integers(0, 4, shape).astype(float) if seed % 2 else rng.random(shape)
+    pairs = _solve_assignment(cost)
+    rows, columns = zip(*pairs)
+    assert len(pairs) == min(shape)
+    assert len(set(rows)) == len(set(columns)) == len(pairs)
+    assert cost[list(rows), list(columns)].sum() == pytest.approx(brute_force_cost(cost))
+
+
+@pytest.mark.parametrize('method', list(AssignmentMethod))
+def test_tracks_keep_their_ids(method):
+    tracker = RectTracker(method=method)
+    first = tracker.update([Rect2(0, 0, 10, 10), Rect2(50, 50, 60, 60)])
+    second = tracker.update([Rect2(52, 51, 62, 61), Rect2(1, 1, 11, 11), Rect2(200, 200, 210, 210)])
+    assert [track.id for track in second] == [first[1].id, first[0].id, 2]
+    assert second[1].rect == Rect2(1, 1, 11, 11)
+    assert len(tracker.tracks) == 3
+
+
+def test_optimal_assignment_beats_greedy():
+    # Greedy takes the cheapest pair (0, 0) and leaves track 1 without a match
+    cost = np.array([[0.1, 0.2], [0.3, 0.9]])
+    greedy = RectTracker(max_cost=0.5)._assign(cost)
+    optimal = RectTracker(max_cost=0.5, method=AssignmentMethod.OPTIMAL)._assign(cost)
+    assert sorted(greedy) == [(0, 0)]
+    assert sorted(optimal) == [(0, 1), (1, 0)]
+
+
+def test_unconfirmed_tracks_die_on_first_miss():
+    tracker = RectTracker(min_hits=2, max_misses=1)
+    track, = tracker.update([Rect2(0, 0, 10, 10)])
+    assert not track.confirmed
+    tracker.update([])
+    assert tracker.tracks == []
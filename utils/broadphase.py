@@ -0,0 +1,162 @@
+from dataclasses import dataclass, field
+from typing import Hashable, Iterable
+
+from utils.geometry import Rect2
+
+Pair = tuple[Hashable, Hashable]
+
+
+@dataclass
+class OverlapEvents:
+    '''Pairs whose overlap started, continued or ended in the last `SweepAndPrune.step()`'''
+    entered: set[Pair] = field(default_factory=set)
+    stayed: set[Pair] = field(default_factory=set)
+    exited: set[Pair] = field(default_factory=set)
+
+
+class _Endpoint:
+    __slots__ = ('value', 'is_max', 'proxy')
+
+    def __init__(self, value: float, is_max: bool, proxy: '_Proxy'):
+        self.value = value
+        self.is_max = is_max
+        self.proxy = proxy
+
+    def after(self, other: '_Endpoint') -> bool:
+        # On ties mins sort first, so touching rects overlap like in Rect2.intersects
+        return self.value > other.value or (self.value == other.value and self.is_max and not other.is_max)
+
+
+class _Proxy:
+    __slots__ = ('key', 'order', 'bbox', 'endpoints', 'partners')
+
+    def __init__(self, key: Hashable, order: int, bbox: tuple[float, float, float, float]):
+        self.key = key
+        self.order = order
+        self.bbox = bbox
+        # min x, min y, max x, max y (same layout as bbox)
+        self.endpoints = (_Endpoint(bbox[0], False, self), _Endpoint(bbox[1], False, self), _Endpoint(bbox[2], True, self), _Endpoint(bbox[3], True, self))
+        self.partners: set['_Proxy'] = set()
+
+
+class SweepAndPrune:
+    '''Incremental sweep-and-prune broad phase over moving Rect2s: `update` the moved rects, then `step()` for the entered/stayed/exited pairs'''
+
+    def __init__(self):
+        self._proxies: dict[Hashable, _Proxy] = {}
+        self._axes: tuple[list[_Endpoint], list[_Endpoint]] = ([], [])
+        self._added = 0
+        self._next_order = 0
+        self._previous_pairs: set[Pair] = set()
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._proxies
+
+    def add(self, key: Hashable, rect: Rect2) -> None:
+        if not isinstance(rect, Rect2):
+            raise TypeError(f'SweepAndPrune can only track Rect2, got {type(rect)}')
+        if key in self._proxies:
+            raise KeyError(f'{key!r} is already tracked, use update() to move it')
+        proxy = _Proxy(key, self._next_order, rect.tuple_bbox)
+        self._next_order += 1
+        self._proxies[key] = proxy
+        for axis in (0, 1):
+            self._axes[axis].append(proxy.endpoints[axis])
+            self._axes[axis].append(proxy.endpoints[axis + 2])
+        self._added += 1
+
+    def add_many(self, items: Iterable[tuple[Hashable, Rect2]]) -> None:
+        for key, rect in items:
+            self.add(key, rect)
+
+    def remove(self, key: Hashable) -> None:
+        '''Stops tracking `key`; its overlaps are reported as exited on the next step()'''
+        proxy = self._proxies.pop(key)
+        for axis in (0, 1):
+            self._axes[axis][:] = [endpoint for endpoint in self._axes[axis] if endpoint.proxy is not proxy]
+        for partner in proxy.partners:
+            partner.partners.discard(proxy)
+        proxy.partners.clear()
+
+    def update(self, key: Hashable, rect: Rect2) -> None:
+        '''Moves (or resizes) `key` to `rect`; sorting is deferred to the next step()'''
+        proxy = self._proxies[key]
+        proxy.bbox = bbox = rect.tuple_bbox
+        for endpoint, value in zip(proxy.endpoints, bbox):
+            endpoint.value = value
+
+    def update_many(self, items: Iterable[tuple[Hashable, Rect2]]) -> None:
+        for key, rect in items:
+            self.update(key, rect)
+
+    def step(self) -> OverlapEvents:
+        '''Restores the sorted order after the updates and reports how overlaps changed since the previous step'''
+        if self._added * 4 > len(self._proxies):
+            self._rebuild()
+        else:
+            for axis in (0, 1):
+                self._insertion_sort(self._axes[axis])
+        self._added = 0
+
+        pairs = self.pairs
+        events = OverlapEvents(entered=pairs - self._previous_pairs, stayed=pairs & self._previous_pairs, exited=self._previous_pairs - pairs)
+        self._previous_pairs = pairs
+        return events
+
+    @property
+    def pairs(self) -> set[Pair]:
+        '''Every overlapping pair as of the last step(), as (first added key, last added key)'''
+        return {(proxy.key, partner.key) for proxy in self._proxies.values() for partner in proxy.partners if proxy.order < partner.order}
+
+    def overlapping(self, key: Hashable) -> set[Hashable]:
+        '''Keys overlapping `key` as of the last step()'''
+        return {partner.key for partner in self._proxies[key].partners}
+
+    def _insertion_sort(self, endpoints: list[_Endpoint]) -> None:
+        for i in range(1, len(endpoints)):
+            endpoint = endpoints[i]
+            j = i - 1
+            while j >= 0 and endpoints[j].after(endpoint):
+                passed = endpoints[j]
+                if passed.is_max and not endpoint.is_max:
+                    # A min moved before another rect's max: they may now overlap
+                    self._begin_overlap(endpoint.proxy, passed.proxy)
+                elif endpoint.is_max and not passed.is_max:
+                    # A max moved before another rect's min: they are now apart on this axis
+                    self._end_overlap(endpoint.proxy, passed.proxy)
+                endpoints[j + 1] = passed
+                j -= 1
+            endpoints[j + 1] = endpoint
+
+    def _rebuild(self) -> None:
+        '''Sorts from scratch and finds every overlap with a single sweep along x (used after adding many rects)'''
+        for axis in self._axes:
+            axis.sort(key=lambda endpoint: (endpoint.value, endpoint.is_max))
+        for proxy in self._proxies.values():
+            proxy.partners.clear()
+
+        active: set[_Proxy] = set()
+        for endpoint in self._axes[0]:
+            if endpoint.is_max:
+                active.discard(endpoint.proxy)
+                continue
+            for other in active:
+                self._begin_overlap(endpoint.proxy, other)
+            active.add(endpoint.proxy)
+
+    @staticmethod
+    def _begin_overlap(a: _Proxy, b: _Proxy) -> None:
+        if a is b:
+            return
+        a_bbox, b_bbox = a.bbox, b.bbox
+        if a_bbox[0] <= b_bbox[2] and a_bbox[2] >= b_bbox[0] and a_bbox[1] <= b_bbox[3] and a_bbox[3] >= b_bbox[1]:
+            a.partners.add(b)
+            b.partners.add(a)
+
+    @staticmethod
+    def _end_overlap(a: _Proxy, b: _Proxy) -> None:
+        a.partners.discard(b)
+        b.partners.discard(a)
@@ -0,0 +1,104 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+from utils.detection import merge_overlapping
+from utils.geometry import Rect2, Rect2Array
+
+
+class ChangeDetector:
+    '''Block-wise change detection between frames: `update(frame)` returns the merged Rect2s of the blocks that changed'''
+
+    def __init__(self, block_size: int = 16, threshold: int = 0, min_changed_pixels: int = 1, merge_distance: int = 0):
+        if block_size < 1:
+            raise ValueError(f'block_size must be positive, got {block_size}')
+        self.block_size = block_size
+        self.threshold = threshold
+        self.min_changed_pixels = min_changed_pixels
+        self.merge_distance = merge_distance
+        self._reference: Optional[np.ndarray] = None
+
+    @property
+    def reference(self) -> Optional[np.ndarray]:
+        '''Frame the next one is compared against (read-only view)'''
+        if self._reference is None:
+            return None
+        view = self._reference.view()
+        view.flags.writeable = False
+        return view
+
+    def reset(self) -> None:
+        '''Forgets the reference frame: the next frame is reported as changed everywhere'''
+        self._reference = None
+
+    def update(self, frame: np.ndarray) -> list[Rect2]:
+        '''Changed regions of `frame` since the reference, which is then updated; an empty list when nothing changed'''
+        height, width = frame.shape[:2]
+        if self._reference is None or self._reference.shape != frame.shape or self._reference.dtype != frame.dtype:
+            self._allocate(frame)
+            return [Rect2(0, 0, width, height)]
+
+        rows, columns = np.nonzero(self._changed_blocks(frame))
+        if len(rows) == 0:
+            return []
+        size = self.block_size
+        blocks = np.stack([columns * size, rows * size, np.minimum((columns + 1) * size, width), np.minimum((rows + 1) * size, height)], axis=1)
+        merged = self._merge(blocks.astype(float))
+
+        for x0, y0, x1, y1 in merged.astype(int).tolist():
+            self._reference[y0:y1, x0:x1] = frame[y0:y1, x0:x1]
+        return Rect2Array._wrap(merged).to_rects()
+
+    def _allocate(self, frame: np.ndarray) -> None:
+        height, width = frame.shape[:2]
+        size = self.block_size
+        self._reference = frame.copy()
+        self._pixel_changes = np.empty(frame.shape, dtype=bool)
+        # Padded to whole blocks; the padding is never written, so it stays unchanged
+        self._block_changes = np.zeros((math.ceil(height / size) * size, math.ceil(width / size) * size), dtype=bool)
+        # Signed and wide enough for uint8 differences
+        self._difference = np.empty(frame.shape, dtype=np.promote_types(frame.dtype, np.int16)) if self.threshold else None
+
+    def _changed_blocks(self, frame: np.ndarray) -> np.ndarray:
+        '''(rows, columns) bool grid of the blocks that changed, computed in the preallocated buffers'''
+        height, width = frame.shape[:2]
+        if self.threshold:
+            difference = self._difference
+            np.subtract(frame, self._reference, out=difference, dtype=difference.dtype)
+            np.abs(difference, out=difference)
+            np.greater(difference, self.threshold, out=self._pixel_changes)
+        else:
+            np.not_equal(frame, self._reference, out=self._pixel_changes)
+
+        # Any channel changed
+        pixels = self._block_changes[:height, :width]
+        if frame.ndim == 3:
+            np.copyto(pixels, self._pixel_changes[..., 0])
+            for channel in range(1, frame.shape[2]):
+                np.logical_or(pixels, self._pixel_changes[..., channel], out=pixels)
+        else:
+            np.copyto(pixels, self._pixel_changes)
+
+        size = self.block_size
+        rows, columns = self._block_changes.shape[0] // size, self._block_changes.shape[1] // size
+        per_row = self._block_changes.view(np.uint8).reshape(rows, size, -1).sum(axis=1, dtype=np.uint32)
+        return per_row.reshape(rows, columns, size).sum(axis=2) >= self.min_changed_pixels
+
+    def _merge(self, blocks: np.ndarray) -> np.ndarray:
+        '''Bboxes of the groups of blocks whose (merge_distance / 2 grown) bounding rects overlap, transitively'''
+        labels = np.arange(len(blocks))
+        current = blocks + np.array([-1, -1, 1, 1]) * self.merge_distance / 2
+        while True:
+            merged, groups = merge_overlapping(Rect2Array._wrap(current))
+            labels = groups[labels]
+            if len(merged) == len(current):
+                break
+            current = merged.values
+
+        bboxes = np.empty((len(current), 4))
+        bboxes[:, :2] = np.inf
+        bboxes[:, 2:] = -np.inf
+        np.minimum.at(bboxes[:, :2], labels, blocks[:, :2])
+        np.maximum.at(bboxes[:, 2:], labels, blocks[:, 2:])
+        return bboxes
@@ -0,0 +1,138 @@
+from enum import Enum
+from typing import Optional
+
+import numpy as np
+
+from utils.detection import Rects
+from utils.geometry import Number, Rect2Array, Vec2
+
+
+class Interpolation(Enum):
+    NEAREST = 0
+    LINEAR = 1
+
+
+def _pixel_bboxes(rects: Rects, padding: int) -> np.ndarray:
+    '''(N, 4) int pixel bboxes (end exclusive, like DEPRECATED_RECT.cut_image) covering each rect plus `padding`'''
+    bboxes = rects.values if isinstance(rects, Rect2Array) else Rect2Array(rects).values
+    pixels = np.concatenate([np.floor(bboxes[:, :2]), np.ceil(bboxes[:, 2:])], axis=1).astype(int)
+    return pixels + np.array([-padding, -padding, padding, padding])
+
+
+def crop_views(image: np.ndarray, rects: Rects, padding: int = 0) -> list[np.ndarray]:
+    '''One view of `image` per rect (no copies), clipped to the image bounds (so possibly smaller or empty)'''
+    height, width = image.shape[:2]
+    bboxes = _pixel_bboxes(rects, padding)
+    bboxes[:, 0::2] = np.clip(bboxes[:, 0::2], 0, width)
+    bboxes[:, 1::2] = np.clip(bboxes[:, 1::2], 0, height)
+    return [image[y0:y1, x0:x1] for x0, y0, x1, y1 in bboxes.tolist()]
+
+
+def _pixel_indices(rows: np.ndarray, columns: np.ndarray, image_size: tuple[int, int]) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    '''Flat indices of the pixels (rows[n, i], columns[n, j]) clipped to the image, and the mask of those outside (or None)'''
+    height, width = image_size
+    inside = (rows >= 0)[:, :, np.newaxis] & (rows < height)[:, :, np.newaxis] & (columns >= 0)[:, np.newaxis, :] & (columns < width)[:, np.newaxis, :]
+    flat = np.clip(rows, 0, height - 1)[:, :, np.newaxis] * width + np.clip(columns, 0, width - 1)[:, np.newaxis, :]
+    return flat, None if inside.all() else ~inside
+
+
+class CropBuffer:
+    '''Crops many rects of a frame into one preallocated (N, H, W, C) array reused across frames (`crop()` returns a view)'''
+
+    def __init__(self, size: Optional[Vec2] = None, padding: int = 0, fill: Number = 0, interpolation: Interpolation = Interpolation.NEAREST):
+        self.size = size
+        self.padding = padding
+        self.fill = fill
+        self.interpolation = interpolation
+        self._buffer: Optional[np.ndarray] = None
+        self._sampling_key: Optional[tuple] = None
+        self._sampling_bboxes: Optional[np.ndarray] = None
+        self._sampling = None
+        self._blend_buffers: Optional[tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    @property
+    def buffer(self) -> Optional[np.ndarray]:
+        '''The whole preallocated array (its first N crops are the last `crop()` result)'''
+        return self._buffer
+
+    def crop(self, image: np.ndarray, rects: Rects) -> np.ndarray:
+        bboxes = _pixel_bboxes(rects, self.padding)
+        count = len(bboxes)
+        if self.size is not None:
+            crop_width, crop_height = int(self.size.x), int(self.size.y)
+        elif count == 0:
+            crop_width = crop_height = 0
+        else:
+            sizes = np.unique(bboxes[:, 2:] - bboxes[:, :2], axis=0)
+            if len(sizes) != 1:
+                raise ValueError(f'CropBuffer without a size needs equally sized rects, got sizes {sizes.tolist()}')
+            crop_width, crop_height = sizes[0].tolist()
+
+        output = self._reserve(count, crop_height, crop_width, image)
+        if count == 0:
+            return output
+
+        key = (crop_height, crop_width, image.shape[:2], None if self.size is None else self.interpolation)
+        if self._sampling_key != key or not np.array_equal(self._sampling_bboxes, bboxes):
+            self._sampling = self._sample(bboxes, crop_height, crop_width, image.shape[:2])
+            self._sampling_key, self._sampling_bboxes = key, bboxes
+        pixels = np.ascontiguousarray(image).reshape((image.shape[0] * image.shape[1],) + image.shape[2:])
+        gathers, weights = self._sampling
+        if weights is None:
+            self._gather(pixels, *gathers[0], output)
+        else:
+            self._blend(pixels, gathers, weights, output)
+        return output
+
+    def _reserve(self, count: int, height: int, width: int, image: np.ndarray) -> np.ndarray:
+        shape = (height, width) + image.shape[2:]
+        buffer = self._buffer
+        if buffer is None or buffer.shape[1:] != shape or buffer.dtype != image.dtype or len(buffer) < count:
+            capacity = count if buffer is None or buffer.shape[1:] != shape or buffer.dtype != image.dtype else max(count, 2 * len(buffer))
+            self._buffer = buffer = np.empty((capacity,) + shape, dtype=image.dtype)
+        return buffer[:count]
+
+    def _sample(self, bboxes: np.ndarray, height: int, width: int, image_size: tuple[int, int]) -> tuple[list[tuple[np.ndarray, Optional[np.ndarray]]], Optional[list[np.ndarray]]]:
+        '''Flat pixel indices (and outside mask) of each gather, and the blend weight of each one for LINEAR'''
+        starts, ends = bboxes[:, :2], bboxes[:, 2:]
+        scale = (ends - starts) / (width, height)
+        if self.size is None or self.interpolation == Interpolation.NEAREST:
+            columns = starts[:, 0:1] + np.floor((np.arange(width) + 0.5) * scale[:, 0:1]).astype(int)
+            rows = starts[:, 1:2] + np.floor((np.arange(height) + 0.5) * scale[:, 1:2]).astype(int)
+            return [_pixel_indices(rows, columns, image_size)], None
+        if self.interpolation != Interpolation.LINEAR:
+            raise ValueError(f'Unknown interpolation {self.interpolation}')
+
+        # Pixel centers aligned like cv2.INTER_LINEAR
+        x = starts[:, 0:1] + (np.arange(width) + 0.5) * scale[:, 0:1] - 0.5
+        y = starts[:, 1:2] + (np.arange(height) + 0.5) * scale[:, 1:2] - 0.5
+        x0, y0 = np.floor(x).astype(int), np.floor(y).astype(int)
+        wx, wy = x - x0, y - y0
+        gathers, weights = [], []
+        for dy, row_weight in ((0, 1 - wy), (1, wy)):
+            for dx, column_weight in ((0, 1 - wx), (1, wx)):
+                gathers.append(_pixel_indices(y0 + dy, x0 + dx, image_size))
+                weights.append(row_weight[:, :, np.newaxis] * column_weight[:, np.newaxis, :])
+        return gathers, weights
+
+    def _gather(self, pixels: np.ndarray, flat: np.ndarray, outside: Optional[np.ndarray], output: np.ndarray) -> None:
+        np.take(pixels, flat, axis=0, out=output)
+        if outside is not None:
+            output[outside] = self.fill
+
+    def _blend(self, pixels: np.ndarray, gathers: list[tuple[np.ndarray, Optional[np.ndarray]]], weights: list[np.ndarray], output: np.ndarray) -> None:
+        if self._blend_buffers is None or self._blend_buffers[0].shape != output.shape or self._blend_buffers[0].dtype != output.dtype:
+            self._blend_buffers = np.empty_like(output), np.empty(output.shape, dtype=float), np.empty(output.shape, dtype=float)
+        corner, blended, weighted = self._blend_buffers
+        for index, ((flat, outside), weight) in enumerate(zip(gathers, weights)):
+            self._gather(pixels, flat, outside, corner)
+            if output.ndim == 4:
+                weight = weight[..., np.newaxis]
+            np.multiply(weight, corner, out=blended if index == 0 else weighted)
+            if index > 0:
+                blended += weighted
+        if np.issubdtype(output.dtype, np.integer):
+            info = np.iinfo(output.dtype)
+            np.rint(blended, out=blended)
+            np.clip(blended, info.min, info.max, out=blended)
+        output[...] = blended
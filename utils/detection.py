@@ -0,0 +1,381 @@
+from enum import Enum
+from typing import Sequence, Union
+
+import numpy as np
+
+from utils.geometry import ArrayLike, DEPRECATED_RECT, Rect2, Rect2Array
+
+Rects = Union[Rect2Array, Sequence[Rect2], Sequence[DEPRECATED_RECT], ArrayLike]
+
+PAIR_CHUNK_SIZE = 1 << 22 # Candidate pairs materialized at once by overlapping_pairs
+MAX_STRIPS = 1 << 12 # Strips (and grid cells per axis) the plane is cut in at most
+MAX_LOCKSTEP_GROUP = 256 # Larger groups are fused one rect at a time by weighted_box_fusion
+
+
+class SoftNMSMethod(Enum):
+    LINEAR = 0
+    GAUSSIAN = 1
+
+
+def _bboxes(rects: Rects) -> np.ndarray:
+    return rects.values if isinstance(rects, Rect2Array) else Rect2Array(rects).values
+
+
+def _prepare(rects: Rects, scores: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    bboxes = _bboxes(rects)
+    scores = np.asarray(scores, dtype=float)
+    if scores.shape != (len(bboxes),):
+        raise ValueError(f'Expected one score per rect ({len(bboxes)}), got shape {scores.shape}')
+    return bboxes, scores
+
+
+def _iou(bboxes: np.ndarray, firsts: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+    '''IoU of bboxes[firsts] and bboxes[seconds], pair by pair'''
+    min_x, min_y, max_x, max_y = (np.ascontiguousarray(bboxes[:, column]) for column in range(4))
+    areas = (max_x - min_x) * (max_y - min_y)
+    intersection = np.minimum(max_x[firsts], max_x[seconds])
+    intersection -= np.maximum(min_x[firsts], min_x[seconds])
+    np.maximum(intersection, 0, out=intersection)
+    height = np.minimum(max_y[firsts], max_y[seconds])
+    height -= np.maximum(min_y[firsts], min_y[seconds])
+    np.maximum(height, 0, out=height)
+    intersection *= height
+    union = areas[firsts] + areas[seconds] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def _strips(bboxes: np.ndarray, axis: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    '''Rects cut in strips across `axis`: (rect, strip) entries sorted by strip and start, first strips and candidates'''
+    low, high = bboxes[:, 1 - axis], bboxes[:, 3 - axis]
+    origin = low.min()
+    thickness = max(float(np.median(high - low)), float(high.max() - origin) / MAX_STRIPS)
+    first = ((low - origin) // thickness).astype(int) if thickness > 0 else np.zeros(len(bboxes), dtype=int)
+    spans = ((high - origin) // thickness).astype(int) - first + 1 if thickness > 0 else np.ones(len(bboxes), dtype=int)
+    rect = np.repeat(np.arange(len(bboxes)), spans)
+    strip = np.repeat(first, spans) + np.arange(len(rect)) - np.repeat(np.cumsum(spans) - spans, spans)
+
+    start = bboxes[:, axis].min()
+    length = float(bboxes[:, axis + 2].max() - start) + 1
+    keys = strip * length + (bboxes[rect, axis] - start)
+    order = np.argsort(keys, kind='stable')
+    rect, strip, keys = rect[order], strip[order], keys[order]
+    ends = strip * length + (bboxes[rect, axis + 2] - start)
+    candidates = np.maximum(np.searchsorted(keys, ends, side='right') - np.arange(len(rect)) - 1, 0)
+    return rect, strip, first, candidates
+
+
+def overlapping_pairs(rects: Rects) -> tuple[np.ndarray, np.ndarray]:
+    '''Index pairs of every two rects that intersect like Rect2.intersects (each pair is reported once)'''
+    bboxes = _bboxes(rects)
+    if len(bboxes) == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    best = None
+    for axis in (0, 1):
+        strips = _strips(bboxes, axis)
+        if best is None or strips[3].sum() < best[1][3].sum():
+            best = axis, strips
+    axis, (rect, strip, first_strip, candidates) = best
+    in_first = strip == first_strip[rect]
+    start, end = bboxes[rect, axis], bboxes[rect, axis + 2]
+    low, high = bboxes[rect, 1 - axis], bboxes[rect, 3 - axis]
+
+    firsts, seconds = [], []
+    count = len(rect)
+    cumulative = np.cumsum(candidates)
+    chunk_start = 0
+    while chunk_start < count:
+        done = cumulative[chunk_start - 1] if chunk_start > 0 else 0
+        chunk_end = max(int(np.searchsorted(cumulative, done + PAIR_CHUNK_SIZE, side='right')), chunk_start + 1)
+        counts = candidates[chunk_start:chunk_end]
+        first = np.repeat(np.arange(chunk_start, chunk_end), counts)
+        offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        second = first + 1 + np.arange(len(first)) - offsets
+        # Entries are sorted by start, so the second one only has to start before the first one ends
+        hit = (in_first[first] | in_first[second]) & (start[second] <= end[first]) & (low[first] <= high[second]) & (high[first] >= low[second])
+        firsts.append(rect[first[hit]])
+        seconds.append(rect[second[hit]])
+        chunk_start = chunk_end
+    if not firsts:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def connected_components(count: int, firsts: np.ndarray, seconds: np.ndarray) -> np.ndarray:
+    '''Component label (0..C-1, in order of first appearance) of each of `count` nodes linked by the given edges'''
+    labels = np.arange(count)
+    while True:
+        smallest = np.minimum(labels[firsts], labels[seconds])
+        previous = labels.copy()
+        np.minimum.at(labels, labels[firsts], smallest)
+        np.minimum.at(labels, labels[seconds], smallest)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            break
+    _, first_seen, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    rank = np.argsort(np.argsort(first_seen))
+    return rank[inverse.reshape(-1)]
+
+
+def nms(rects: Rects, scores: ArrayLike, iou_threshold: float = 0.5) -> np.ndarray:
+    '''Greedy non-maximum suppression: indices of the kept rects, highest score first'''
+    bboxes, scores = _prepare(rects, scores)
+    count = len(bboxes)
+    order = np.argsort(-scores, kind='stable')
+    rank = np.empty(count, dtype=int)
+    rank[order] = np.arange(count)
+
+    firsts, seconds = overlapping_pairs(Rect2Array._wrap(bboxes))
+    suppressing = _iou(bboxes, firsts, seconds) > iou_threshold
+    firsts, seconds = firsts[suppressing], seconds[suppressing]
+    flip = rank[firsts] > rank[seconds]
+    sources, targets = np.where(flip, seconds, firsts), np.where(flip, firsts, seconds)
+
+    kept = np.zeros(count, dtype=bool)
+    undecided = np.ones(count, dtype=bool)
+    while len(sources) > 0:
+        waiting = np.zeros(count, dtype=bool)
+        waiting[targets] = True
+        picks = undecided & ~waiting
+        kept |= picks
+        undecided &= ~picks
+        undecided[targets[picks[sources]]] = False
+        live = undecided[sources] & undecided[targets]
+        sources, targets = sources[live], targets[live]
+    kept |= undecided
+    return order[kept[order]]
+
+
+def soft_nms(rects: Rects, scores: ArrayLike, iou_threshold: float = 0.3, sigma: float = 0.5, method: SoftNMSMethod = SoftNMSMethod.GAUSSIAN, score_threshold: float = 0.001) -> tuple[np.ndarray, np.ndarray]:
+    '''Soft-NMS with LINEAR or GAUSSIAN score decay: indices of the remaining rects in pick order and their decayed scores'''
+    bboxes, scores = _prepare(rects, scores)
+    if method == SoftNMSMethod.LINEAR:
+        decay = lambda iou: np.where(iou > iou_threshold, 1 - iou, 1.0)
+    elif method == SoftNMSMethod.GAUSSIAN:
+        decay = lambda iou: np.exp(-(iou * iou) / sigma)
+    else:
+        raise ValueError(f'Unknown soft-NMS method {method}')
+
+    firsts, seconds = overlapping_pairs(Rect2Array._wrap(bboxes))
+    iou = _iou(bboxes, firsts, seconds)
+    affecting = iou > (iou_threshold if method == SoftNMSMethod.LINEAR else 0)
+    firsts, seconds, factors = firsts[affecting], seconds[affecting], decay(iou[affecting])
+
+    current = scores.copy()
+    remaining = current > score_threshold
+    picked = np.zeros(len(bboxes), dtype=bool)
+    while remaining.any():
+        live = remaining[firsts] & remaining[seconds]
+        firsts, seconds, factors = firsts[live], seconds[live], factors[live]
+        # Ties go to the lowest index, like a sequential argmax
+        first_wins = (current[firsts] > current[seconds]) | ((current[firsts] == current[seconds]) & (firsts < seconds))
+        waiting = np.zeros(len(bboxes), dtype=bool)
+        waiting[np.where(first_wins, seconds, firsts)] = True
+        picks = remaining & ~waiting
+        picked |= picks
+        remaining &= ~picks
+        decayed = picks[firsts] & remaining[seconds]
+        np.multiply.at(current, seconds[decayed], factors[decayed])
+        decayed = picks[seconds] & remaining[firsts]
+        np.multiply.at(current, firsts[decayed], factors[decayed])
+        remaining &= current > score_threshold
+
+    keep = np.flatnonzero(picked)
+    keep = keep[np.argsort(-current[keep], kind='stable')]
+    return keep, current[keep]
+
+
+def _cells(bbox: Sequence[float], origin: tuple[float, float], size: float) -> tuple[int, int, int, int]:
+    '''First and last grid cell (x, y) touched by a bbox'''
+    return (int((bbox[0] - origin[0]) // size), int((bbox[1] - origin[1]) // size),
+            int((bbox[2] - origin[0]) // size), int((bbox[3] - origin[1]) // size))
+
+
+def _fused_iou(fused: np.ndarray, bboxes: np.ndarray, areas: np.ndarray) -> np.ndarray:
+    '''IoU of fused rects with bboxes (broadcasting), -inf where they don't overlap'''
+    width = np.minimum(fused[..., 2], bboxes[..., 2]) - np.maximum(fused[..., 0], bboxes[..., 0])
+    height = np.minimum(fused[..., 3], bboxes[..., 3]) - np.maximum(fused[..., 1], bboxes[..., 1])
+    intersection = width * height
+    union = (fused[..., 2] - fused[..., 0]) * (fused[..., 3] - fused[..., 1]) + areas - intersection
+    overlap = (width > 0) & (height > 0) & (union > 0)
+    return np.divide(intersection, union, out=np.full(union.shape, -np.inf), where=overlap)
+
+
+def _overlap_area(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    width = np.clip(np.minimum(first[:, 2], second[:, 2]) - np.maximum(first[:, 0], second[:, 0]), 0, None)
+    height = np.clip(np.minimum(first[:, 3], second[:, 3]) - np.maximum(first[:, 1], second[:, 1]), 0, None)
+    return width * height
+
+
+def _fuse_sequentially(bboxes: np.ndarray, scores: np.ndarray, iou_threshold: float, subset: np.ndarray, clusters: np.ndarray, states: np.ndarray):
+    '''Fuses bboxes[subset] one at a time into `clusters` (first rect of each cluster) and `states`'''
+    if len(subset) == 0:
+        return
+    extent = float((bboxes[subset, 2:].max(axis=0) - bboxes[subset, :2].min(axis=0)).max())
+    size = max(float(np.median(bboxes[subset, 2:] - bboxes[subset, :2])), extent / MAX_STRIPS, np.finfo(float).tiny)
+    origin = float(bboxes[subset, 0].min()), float(bboxes[subset, 1].min())
+
+    grid: dict[tuple[int, int], set[int]] = {}
+    fused, weighted_sums, score_sums, founders, fused_cells = [], [], [], [], []
+    for index, bbox, score in zip(subset.tolist(), bboxes[subset].tolist(), scores[subset].tolist()):
+        min_x, min_y, max_x, max_y = bbox
+        area = (max_x - min_x) * (max_y - min_y)
+        cells = _cells(bbox, origin, size)
+        nearby = set()
+        for x in range(cells[0], cells[2] + 1):
+            for y in range(cells[1], cells[3] + 1):
+                nearby.update(grid.get((x, y), ()))
+
+        best, best_iou = -1, iou_threshold
+        for cluster in sorted(nearby):
+            fused_min_x, fused_min_y, fused_max_x, fused_max_y = fused[cluster]
+            width = (fused_max_x if fused_max_x < max_x else max_x) - (fused_min_x if fused_min_x > min_x else min_x)
+            if width <= 0:
+                continue
+            height = (fused_max_y if fused_max_y < max_y else max_y) - (fused_min_y if fused_min_y > min_y else min_y)
+            if height <= 0:
+                continue
+            intersection = width * height
+            union = (fused_max_x - fused_min_x) * (fused_max_y - fused_min_y) + area - intersection
+            if union > 0 and intersection / union > best_iou:
+                best, best_iou = cluster, intersection / union
+
+        if best < 0:
+            best = len(fused)
+            fused.append(bbox)
+            weighted_sums.append([value * score for value in bbox])
+            score_sums.append(score)
+            founders.append(index)
+            fused_cells.append(cells)
+            for x in range(cells[0], cells[2] + 1):
+                for y in range(cells[1], cells[3] + 1):
+                    grid.setdefault((x, y), set()).add(best)
+        else:
+            weighted_sum = weighted_sums[best]
+            for coordinate, value in enumerate(bbox):
+                weighted_sum[coordinate] += value * score
+            score_sums[best] += score
+            if score_sums[best] > 0:
+                fused[best] = [value / score_sums[best] for value in weighted_sum]
+                cells, previous = _cells(fused[best], origin, size), fused_cells[best]
+                if cells != previous:
+                    for x in range(previous[0], previous[2] + 1):
+                        for y in range(previous[1], previous[3] + 1):
+                            grid[x, y].discard(best)
+                    for x in range(cells[0], cells[2] + 1):
+                        for y in range(cells[1], cells[3] + 1):
+                            grid.setdefault((x, y), set()).add(best)
+                    fused_cells[best] = cells
+        clusters[index] = founders[best]
+        states[index] = fused[best]
+
+
+def _fuse_in_lockstep(bboxes: np.ndarray, scores: np.ndarray, iou_threshold: float, labels: np.ndarray, clusters: np.ndarray, states: np.ndarray):
+    '''Fuses the groups of `labels` side by side, one rect of every group per step (large groups sequentially)'''
+    count = len(bboxes)
+    sizes = np.bincount(labels, minlength=1)
+    groups = np.argsort(-sizes, kind='stable')
+    groups = groups[sizes[groups] <= MAX_LOCKSTEP_GROUP]
+    row = np.full(len(sizes), -1)
+    row[groups] = np.arange(len(groups))
+    group_sizes = sizes[groups]
+    group_starts = np.cumsum(group_sizes) - group_sizes
+    rows = row[labels]
+    by_row = np.flatnonzero(rows >= 0)
+    by_row = by_row[np.argsort(rows[by_row], kind='stable')]
+    rank = np.arange(len(by_row)) - np.repeat(group_starts, group_sizes)
+    active = np.searchsorted(-group_sizes, -np.arange(group_sizes[0] if len(groups) else 0), side='left')
+    step_starts = np.cumsum(active) - active
+    by_step = np.empty_like(by_row)
+    by_step[step_starts[rank] + np.repeat(np.arange(len(groups)), group_sizes)] = by_row
+
+    areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+    weighted = bboxes * scores[:, None]
+    # The extra zero rect overlaps nothing and pads the candidates
+    fused = np.vstack([bboxes, np.zeros((1, 4))])
+    sums = weighted.copy()
+    score_sums = scores.copy()
+    founders = np.empty(len(by_row), dtype=int)
+    founded = np.zeros(len(groups), dtype=int)
+    for step, size in enumerate(active.tolist()):
+        batch = by_step[step_starts[step]:step_starts[step] + size]
+        width = int(founded[:size].max())
+        slots = np.arange(width)
+        candidates = np.where(slots < founded[:size, None], founders[np.minimum(group_starts[:size, None] + slots, len(founders) - 1)], count)
+        iou = _fused_iou(fused[candidates], bboxes[batch, None], areas[batch, None])
+        # The first best candidate is the oldest cluster, like the sequential loop
+        best = iou.argmax(axis=1) if width > 0 else np.zeros(size, dtype=int)
+        joins = (iou[np.arange(size), best] > iou_threshold) if width > 0 else np.zeros(size, dtype=bool)
+        joined, targets = batch[joins], candidates[joins, best[joins]]
+        sums[targets] += weighted[joined]
+        score_sums[targets] += scores[joined]
+        moved = targets[score_sums[targets] > 0]
+        fused[moved] = sums[moved] / score_sums[moved, None]
+        clusters[batch] = batch
+        clusters[joined] = targets
+        states[batch] = fused[clusters[batch]]
+        new = np.flatnonzero(~joins)
+        founders[group_starts[new] + founded[new]] = batch[new]
+        founded[new] += 1
+    big = np.flatnonzero(rows < 0)
+    _fuse_sequentially(bboxes, scores, iou_threshold, big, clusters, states)
+
+
+def weighted_box_fusion(rects: Rects, scores: ArrayLike, iou_threshold: float = 0.55) -> tuple[Rect2Array, np.ndarray]:
+    '''Weighted box fusion: the fused rects and their mean scores, highest first'''
+    bboxes, scores = _prepare(rects, scores)
+    order = np.argsort(-scores, kind='stable')
+    bboxes, scores = bboxes[order], scores[order]
+    count = len(bboxes)
+    areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+    firsts, seconds = overlapping_pairs(Rect2Array._wrap(bboxes))
+    linked = _iou(bboxes, firsts, seconds) > iou_threshold / 2
+    links = firsts[linked], seconds[linked]
+    later, earlier = np.maximum(firsts[~linked], seconds[~linked]), np.minimum(firsts[~linked], seconds[~linked])
+
+    clusters = np.empty(count, dtype=int)
+    states = np.empty((count, 4), dtype=float)
+    while True:
+        labels = connected_components(count, *links)
+        _fuse_in_lockstep(bboxes, scores, iou_threshold, labels, clusters, states)
+        covered = np.maximum(_overlap_area(states, bboxes), _overlap_area(states, bboxes[clusters]))
+        state_areas = (states[:, 2] - states[:, 0]) * (states[:, 3] - states[:, 1])
+        if not (covered >= (1 - iou_threshold) * (1 + 1e-9) * state_areas).all():
+            _fuse_sequentially(bboxes, scores, iou_threshold, np.arange(count), clusters, states)
+            break
+        by_cluster = np.lexsort((np.arange(count), clusters))
+        keys = clusters[by_cluster] * count + by_cluster
+        cross = labels[later] != labels[earlier]
+        later, earlier = later[cross], earlier[cross]
+        seen = by_cluster[np.searchsorted(keys, clusters[earlier] * count + later) - 1]
+        conflicts = _fused_iou(states[seen], bboxes[later], areas[later]) > iou_threshold
+        if not conflicts.any():
+            break
+        links = np.concatenate([links[0], later[conflicts]]), np.concatenate([links[1], earlier[conflicts]])
+
+    founders = np.flatnonzero(clusters == np.arange(count))
+    score_sums = np.zeros(count, dtype=float)
+    np.add.at(score_sums, clusters, scores)
+    last = np.zeros(count, dtype=int)
+    np.maximum.at(last, clusters, np.arange(count))
+    fused_scores = score_sums[founders] / np.bincount(clusters, minlength=count)[founders]
+    order = np.argsort(-fused_scores, kind='stable')
+    return Rect2Array._wrap(states[last[founders]][order]), fused_scores[order]
+
+
+def merge_overlapping(rects: Rects) -> tuple[Rect2Array, np.ndarray]:
+    '''Merged bounding rects of the groups of transitively overlapping rects, and the merged index of each rect'''
+    bboxes = _bboxes(rects)
+    labels = connected_components(len(bboxes), *overlapping_pairs(Rect2Array._wrap(bboxes)))
+    components = labels.max() + 1 if len(labels) > 0 else 0
+    merged = np.empty((components, 4), dtype=float)
+    merged[:, :2] = np.inf
+    merged[:, 2:] = -np.inf
+    np.minimum.at(merged[:, 0], labels, bboxes[:, 0])
+    np.minimum.at(merged[:, 1], labels, bboxes[:, 1])
+    np.maximum.at(merged[:, 2], labels, bboxes[:, 2])
+    np.maximum.at(merged[:, 3], labels, bboxes[:, 3])
+    return Rect2Array._wrap(merged), labels
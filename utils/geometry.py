@@ -1,12 +1,12 @@
-from ast import Not
 from dataclasses import dataclass
-from typing import Tuple, Union, overload
+from typing import Iterator, Optional, Sequence, Tuple, Union, overload
 from typing_extensions import Self
 
 import utils.colors as colors
 from utils.serialization import Serializable
 
 from copy import copy
+import math
 
 import numpy as np
 from utils.sig import metsig
@@ -14,8 +14,16 @@ from utils.sig import metsig
 ArrayLike = Union[list[float], tuple[float], np.ndarray]
 Number = Union[int, float]
 
+# Default tolerances of np.allclose, used by VecN equality
+ALLCLOSE_RTOL = 1e-05
+ALLCLOSE_ATOL = 1e-08
+_PLAIN_NUMBERS = (float, int) # Exact types taking constructor fast paths (bool, numpy scalars, ... take the checked ones)
+
 
 class VecN:
+    __slots__ = ('values',)
+    dtype: type = np.float64 # Element type of `values`; integer types make equality exact
+
     @overload
     def __init__(self, element1: Number, *elements: Number): ...
     @overload
@@ -24,16 +32,22 @@ class VecN:
         element1_is_list_like = isinstance(element1, (list, tuple, np.ndarray, VecN))
         if element1_is_list_like:
             assert len(elements) == 0, 'If you pass a list, you must not pass any other arguments'
-            self.values = np.array(element1, dtype=float)
+            self.values = np.array(element1, dtype=self.dtype)
         else:
-            self.values = np.array([element1] + list(elements), dtype=float)
+            self.values = np.array([element1] + list(elements), dtype=self.dtype)
             return
 
         self.values.repeat
         unsupported_types = {type(value) for value in self.values if not isinstance(value, (float, int))}
         if unsupported_types:
             raise TypeError(f'The following types are not supported: {unsupported_types}')
-    
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> Self:
+        '''Builds a vector around `values` without copying or validating it (used for array views)'''
+        vec = cls.__new__(cls)
+        vec.values = values
+        return vec
 
     def projected(self, axis: Union['VecN', int]) -> float:
         if isinstance(axis, int):
@@ -59,6 +73,12 @@ class VecN:
         assert len(other.values) == len(self.values), f'Vectors must be the same size for a dot product, got {len(other.values)=} != {len(self.values)=}'
 
         return np.dot(self.values, other.values)
+
+    def add_scaled(self, other: Union[Self, Number, tuple, list, np.ndarray], k: Number) -> Self:
+        '''`self += other * k` without building `other * k` as a vector, e.g. `pos.add_scaled(vel, dt)`; returns self'''
+        np.add(self.values, np.multiply(_values_of(other), k), out=self.values)
+        return self
+
     def __len__(self) -> int:
         return len(self.values)
 
@@ -73,7 +93,8 @@ class VecN:
 
     def __eq__(self, other: Self) -> bool:
         if isinstance(other, (VecN, int, float, tuple, list, np.ndarray)):
-
+            if np.issubdtype(self.dtype, np.integer):
+                return len(self) == len(other) and np.array_equal(self.values, other.values)
             return len(self) == len(other) and np.allclose(self.values, other.values)
             # return np.all(self.values == other)
         else:
@@ -90,7 +111,7 @@ class VecN:
         return self.__class__(self.values + other.values)
 
     def __iadd__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
-        self.values = (self.__add__(other)).values
+        np.add(self.values, _values_of(other), out=self.values)
         return self
 
     def __sub__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
@@ -101,7 +122,7 @@ class VecN:
         return self.__class__(self.values - other.values)
 
     def __isub__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
-        self.values = (self.__sub__(other)).values
+        np.subtract(self.values, _values_of(other), out=self.values)
         return self
 
     def __mul__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
@@ -112,7 +133,7 @@ class VecN:
         return self.__class__(self.values * other.values)
 
     def __imul__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
-        self.values = (self.__mul__(other)).values
+        np.multiply(self.values, _values_of(other), out=self.values)
         return self
 
     def __truediv__(self, other: Union[Self, Number, Self, tuple, list, np.ndarray]) -> Self:
@@ -123,7 +144,7 @@ class VecN:
         return self.__class__(self.values / other)
 
     def __itruediv__(self, other: Union[Self, Number, Self, tuple, list, np.ndarray]) -> Self:
-        self.values = (self.__truediv__(other)).values
+        np.true_divide(self.values, _values_of(other), out=self.values)
         return self
 
     def __floordiv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
@@ -134,7 +155,7 @@ class VecN:
         return self.__class__(self.values // other)
 
     def __ifloordiv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
-        self.values = (self.__floordiv__(other)).values
+        np.floor_divide(self.values, _values_of(other), out=self.values)
         return self
 
     def __neg__(self) -> Self:
@@ -158,14 +179,20 @@ class VecN:
         return self.__class__(power_values ** self.values)
 
     def __ipow__(self, power: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
-        self.values = (self.__pow__(power)).values
+        np.power(self.values, _values_of(power), out=self.values)
         return self
 
     def __getstate__(self) -> dict:
         return {'values': self.values.tolist()}
 
     def __setstate__(self, state: dict) -> None:
-        self.values = np.array(state['values'])
+        self.values = np.array(state['values'], dtype=self.dtype)
+
+    def __reduce_ex__(self, protocol: int):
+        # From protocol 5 the values array is pickled as is, so its data can go out of band
+        if protocol >= 5 and type(self).values is VecN.values:
+            return (self.__class__._wrap, (self.values,))
+        return super().__reduce_ex__(protocol)
 
     def __copy__(self) -> Self:
         return __class__(self.values)
@@ -200,7 +227,28 @@ class VecN:
     
 
 
+def _unpack(other: Union[VecN, Number, tuple, list, np.ndarray], size: int) -> tuple:
+    '''Returns the `size` components of a scalar or vector-like operand'''
+    if isinstance(other, (float, int)):
+        return (other,) * size
+    if isinstance(other, (VecN, tuple, list, np.ndarray)):
+        if len(other) != size:
+            raise ValueError(f'Operand must have {size} values, got {len(other)}')
+        return tuple(other)
+    raise TypeError(f'{type(other)} is not supported')
+
+def _values_of(other: Union[VecN, Number, tuple, list, np.ndarray]) -> Union[np.ndarray, Number, tuple, list]:
+    '''Operand of a numpy in-place operation: the values of a vector, anything else as is'''
+    return other.values if isinstance(other, VecN) else other
+
+def _is_close(a: float, b: float) -> bool:
+    '''Scalar equivalent of np.allclose with its default tolerances'''
+    return a == b or abs(a - b) <= ALLCLOSE_ATOL + ALLCLOSE_RTOL * abs(b)
+
 class Vec2(VecN):
+    '''2D vector stored as two plain floats (`values` is a copy built on demand)'''
+    __slots__ = ('y',)
+    x = VecN.values # x lives in the slot VecN keeps its array in, so Vec2 reserves no unused one
 
     @overload
     def __init__(self, x: Number, y: Number):...
@@ -211,57 +259,486 @@ class Vec2(VecN):
     @overload
     def __init__(self, vec: VecN):...
     def __init__(self, arg1, *args):
-        if isinstance(arg1, VecN):
+        if isinstance(arg1, (float, int, np.number)):
+            if len(args) != 1:
+                raise ValueError(f'Vec2 can only be initialized with 2 values, got {len(args) + 1}')
+            self.x = float(arg1)
+            self.y = float(args[0])
+        elif isinstance(arg1, VecN):
             assert len(arg1) == 2, 'Vec2 can only be initialized with a VecN with 2 elements'
             assert len(args) == 0, 'If you pass a VecN, you must not pass any other arguments'
-            super().__init__(arg1.values)
+            x, y = arg1
+            self.x = float(x)
+            self.y = float(y)
         elif isinstance(arg1, (tuple, list, np.ndarray)):
             if len(arg1) != 2:
                 raise ValueError(f'Vec2 can only be initialized with 2 values, got {len(arg1)}')
-            super().__init__(arg1)
-        elif isinstance(arg1, (float, int)):
-            if len(args) != 1:
-                raise ValueError(f'Vec2 can only be initialized with 2 values, got {len(args) + 1}')
-            super().__init__(arg1, *args)
+            x, y = arg1
+            self.x = float(x)
+            self.y = float(y)
         else:
             raise TypeError(f'{type(arg1)} is not supported')
+
+    @classmethod
+    def _make(cls, x: float, y: float) -> Self:
+        '''Builds a vector from already computed components, skipping __init__ checks'''
+        vec = object.__new__(cls)
+        vec.x = x
+        vec.y = y
+        return vec
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> 'Vec2':
+        return _Vec2View._view(values)
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.array((self.x, self.y))
+
+    @values.setter
+    def values(self, values: ArrayLike) -> None:
+        if len(values) != 2:
+            raise ValueError(f'Vec2 can only hold 2 values, got {len(values)}')
+        self.x = float(values[0])
+        self.y = float(values[1])
+
+    @property
+    def xy(self) -> 'Vec2':
+        return Vec2._make(self.x, self.y)
+
+    @xy.setter
+    def xy(self, value: 'Vec2') -> None:
+        self.x, self.y = value
+
+    def projected_x(self) -> float:
+        return self.projected(0)
+
+    def projected_y(self) -> float:
+        return self.projected(1)
+
+    def projected(self, axis: Union[VecN, int]) -> float:
+        if isinstance(axis, int):
+            value = (self.x, self.y)[axis]
+            return value * value
+        return self.dot(axis)
+
+    def magnitude(self) -> float:
+        return math.hypot(self.x, self.y)
+
+    def dot(self, other: VecN) -> float:
+        if isinstance(other, Vec2):
+            return self.x * other.x + self.y * other.y
+        return super().dot(other)
+
+    def add_scaled(self, other: Union[Self, Number, tuple, list, np.ndarray], k: Number) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        self.x += x * k
+        self.y += y * k
+        return self
+
+    def frozen(self) -> 'FrozenVec2':
+        '''Immutable, hashable copy'''
+        return FrozenVec2._make(self.x, self.y)
+
+    def __len__(self) -> int:
+        return 2
+
+    def __iter__(self) -> Iterator[float]:
+        return iter((self.x, self.y))
+
+    def __repr__(self) -> str:
+        return f'Vec2({self.x}, {self.y})'
+
+    def __str__(self) -> str:
+        return f'Vec2({self.x}, {self.y})'
+
+    def __eq__(self, other: Self) -> bool:
+        if isinstance(other, Vec2):
+            return _is_close(self.x, other.x) and _is_close(self.y, other.y)
+        return super().__eq__(other)
+
+    def __add__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        if isinstance(other, Vec2):
+            return self._make(self.x + other.x, self.y + other.y)
+        x, y = _unpack(other, 2)
+        return self._make(self.x + x, self.y + y)
+
+    def __iadd__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        self.x += x
+        self.y += y
+        return self
+
+    def __sub__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        if isinstance(other, Vec2):
+            return self._make(self.x - other.x, self.y - other.y)
+        x, y = _unpack(other, 2)
+        return self._make(self.x - x, self.y - y)
+
+    def __isub__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        self.x -= x
+        self.y -= y
+        return self
+
+    def __mul__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        if isinstance(other, Vec2):
+            return self._make(self.x * other.x, self.y * other.y)
+        x, y = _unpack(other, 2)
+        return self._make(self.x * x, self.y * y)
+
+    def __imul__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        self.x *= x
+        self.y *= y
+        return self
+
+    def __truediv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        try:
+            return self._make(self.x / x, self.y / y)
+        except ZeroDivisionError:
+            # Keep numpy's inf/nan semantics for division by zero
+            return self._make(*np.true_divide((self.x, self.y), (x, y)).tolist())
+
+    def __itruediv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        try:
+            self.x, self.y = self.x / x, self.y / y
+        except ZeroDivisionError:
+            self.x, self.y = np.true_divide((self.x, self.y), (x, y)).tolist()
+        return self
+
+    def __floordiv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        try:
+            return self._make(self.x // x, self.y // y)
+        except ZeroDivisionError:
+            return self._make(*np.floor_divide((self.x, self.y), (x, y)).tolist())
+
+    def __ifloordiv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        try:
+            self.x, self.y = self.x // x, self.y // y
+        except ZeroDivisionError:
+            self.x, self.y = np.floor_divide((self.x, self.y), (x, y)).tolist()
+        return self
+
+    def __neg__(self) -> Self:
+        return self._make(-self.x, -self.y)
+
+    def __abs__(self) -> Self:
+        return self._make(abs(self.x), abs(self.y))
+
+    def __pow__(self, power: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        # Through numpy, so that negative bases with fractional powers don't turn complex
+        return self._make(*np.power((self.x, self.y), _unpack(power, 2)).tolist())
+
+    def __rpow__(self, power: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        return self._make(*np.power(_unpack(power, 2), (self.x, self.y), dtype=float).tolist())
+
+    def __ipow__(self, power: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        self.x, self.y = np.power((self.x, self.y), _unpack(power, 2)).tolist()
+        return self
+
+    def __getstate__(self) -> dict:
+        return {'values': [self.x, self.y]}
+
+    def __setstate__(self, state: dict) -> None:
+        self.values = state['values']
+
+    def __copy__(self) -> Self:
+        return self._make(self.x, self.y)
+
+    def __deepcopy__(self, memo: dict) -> Self:
+        return self._make(self.x, self.y)
+
+    @overload
+    def __getitem__(self, index: int) -> Number: ...
+    @overload
+    def __getitem__(self, index: slice) -> VecN: ...
+    def __getitem__(self, index: Union[int, slice]) -> Union[float, VecN]:
+        if isinstance(index, int):
+            return (self.x, self.y)[index]
+        return VecN(self.values[index])
+
+    def __setitem__(self, index: Union[int, slice], value: Union[VecN, float, list, tuple, np.ndarray]) -> None:
+        if isinstance(index, int):
+            if not -2 <= index < 2:
+                raise IndexError(f'Vec2 index out of range: {index}')
+            setattr(self, 'xy'[index], float(value))
+        else:
+            values = self.values
+            values[index] = value.values if isinstance(value, VecN) else value
+            self.values = values
+
+class _Vec2View(Vec2):
+    '''Vec2 reading and writing a row of a Vec2Array instead of its own floats (see `Vec2Array.__getitem__`)'''
+    __slots__ = ('_buffer',)
+
+    @classmethod
+    def _view(cls, buffer: np.ndarray) -> '_Vec2View':
+        vec = object.__new__(cls)
+        vec._buffer = buffer
+        return vec
+
+    @classmethod
+    def _make(cls, x: float, y: float) -> Vec2:
+        # Results of operations on a view are independent vectors
+        return Vec2._make(x, y)
+
     @property
     def x(self) -> float:
-        return self.values[0]
-    
+        return self._buffer[0]
+
     @x.setter
     def x(self, value: float) -> None:
-        self.values[0] = value
-    
+        self._buffer[0] = value
+
     @property
     def y(self) -> float:
-        return self.values[1]
-    
+        return self._buffer[1]
+
     @y.setter
     def y(self, value: float) -> None:
-        self.values[1] = value
+        self._buffer[1] = value
 
     @property
-    def xy(self) -> 'Vec2':
-        return Vec2(self.values)
-    
+    def values(self) -> np.ndarray:
+        return self._buffer
+
+    @values.setter
+    def values(self, values: ArrayLike) -> None:
+        self._buffer[:] = values
+
+    def __reduce__(self):
+        return (Vec2, (float(self.x), float(self.y)))
+
+class Vec2Int(Vec2):
+    '''2D integer vector (pixel coordinates), hashable, with exact equality (approximate against float vectors)'''
+    __slots__ = ()
+    dtype = np.int32
+
+    def __init__(self, arg1, *args):
+        super().__init__(arg1, *args)
+        self.x = int(self.x)
+        self.y = int(self.y)
+
+    @classmethod
+    def _make(cls, x: Number, y: Number) -> Vec2:
+        if type(x) is int and type(y) is int:
+            vec = object.__new__(Vec2Int)
+            vec.x = x
+            vec.y = y
+            return vec
+        return Vec2._make(x, y)
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> 'Vec2Int':
+        return _Vec2IntView._view(values)
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.array((self.x, self.y), dtype=self.dtype)
+
+    @values.setter
+    def values(self, values: ArrayLike) -> None:
+        if len(values) != 2:
+            raise ValueError(f'Vec2Int can only hold 2 values, got {len(values)}')
+        self.x = int(values[0])
+        self.y = int(values[1])
+
+    @property
+    def xy(self) -> 'Vec2Int':
+        return Vec2Int._make(self.x, self.y)
+
     @xy.setter
-    def xy(self, value: 'Vec2') -> None:
-        self.x, self.y = value.values
-    
-    def projected_x(self) -> float:
-        return self.projected(0)
-    
-    def projected_y(self) -> float:
-        return self.projected(1)
+    def xy(self, value: Vec2) -> None:
+        self.x, self.y = int(value.x), int(value.y)
+
+    def __repr__(self) -> str:
+        return f'Vec2Int({self.x}, {self.y})'
+
+    def __str__(self) -> str:
+        return f'Vec2Int({self.x}, {self.y})'
+
+    def __eq__(self, other: Vec2) -> bool:
+        if isinstance(other, (Vec2Int, FrozenVec2)):
+            return self.x == other.x and self.y == other.y
+        if isinstance(other, Vec2):
+            # Same comparison as other == self, so that equality with a float vector stays symmetric
+            return _is_close(other.x, self.x) and _is_close(other.y, self.y)
+        return VecN.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
+    def _assign(self, result: Vec2) -> Vec2:
+        '''In-place result: updates this vector if `result` is still integral, otherwise returns the float result instead'''
+        if isinstance(result, Vec2Int):
+            self.x, self.y = result.x, result.y
+            return self
+        return result
+
+    def __iadd__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> Vec2:
+        return self._assign(self + other)
+
+    def __isub__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> Vec2:
+        return self._assign(self - other)
+
+    def __imul__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> Vec2:
+        return self._assign(self * other)
+
+    def __itruediv__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> Vec2:
+        return self / other
+
+    def __ifloordiv__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> Vec2:
+        return self._assign(self // other)
+
+    def __ipow__(self, power: Union[Vec2, Number, tuple, list, np.ndarray]) -> Vec2:
+        return self._assign(self ** power)
+
+    def add_scaled(self, other: Union[Vec2, Number, tuple, list, np.ndarray], k: Number) -> Vec2:
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        return self._assign(self._make(self.x + x * k, self.y + y * k))
+
+    def __setitem__(self, index: Union[int, slice], value: Union[VecN, float, list, tuple, np.ndarray]) -> None:
+        if isinstance(index, int):
+            if not -2 <= index < 2:
+                raise IndexError(f'Vec2Int index out of range: {index}')
+            setattr(self, 'xy'[index], int(value))
+        else:
+            super().__setitem__(index, value)
+
+    def __getstate__(self) -> dict:
+        return {'values': [self.x, self.y]}
+
+class _Vec2IntView(_Vec2View, Vec2Int):
+    '''Vec2Int reading and writing a row of a Vec2IntArray (see `Vec2Array.__getitem__`)'''
+    __slots__ = ()
+
+    @classmethod
+    def _make(cls, x: Number, y: Number) -> Vec2:
+        return Vec2Int._make(x, y)
+
+    @property
+    def x(self) -> int:
+        return int(self._buffer[0])
+
+    @x.setter
+    def x(self, value: int) -> None:
+        self._buffer[0] = value
+
+    @property
+    def y(self) -> int:
+        return int(self._buffer[1])
+
+    @y.setter
+    def y(self, value: int) -> None:
+        self._buffer[1] = value
+
+    def __reduce__(self):
+        return (Vec2Int, (self.x, self.y))
+
+class FrozenVec2(Vec2):
+    '''Immutable hashable Vec2, for set members and dict keys (`mutable()` converts back)'''
+    __slots__ = ('_hash',)
+    _codec_fields = () # Serialized through mutable()
+
+    def __init__(self, arg1, *args):
+        if type(arg1) is float and len(args) == 1 and type(args[0]) is float:
+            x, y = arg1, args[0]
+        else:
+            vec = Vec2(arg1, *args)
+            x, y = vec.x, vec.y
+        _set_x(self, x)
+        _set_y(self, y)
+        _set_hash(self, hash((x, y)))
+
+    @classmethod
+    def _make(cls, x: float, y: float) -> 'FrozenVec2':
+        vec = object.__new__(FrozenVec2)
+        _set_x(vec, x)
+        _set_y(vec, y)
+        _set_hash(vec, hash((x, y)))
+        return vec
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> 'FrozenVec2':
+        return cls._make(float(values[0]), float(values[1]))
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.array((self.x, self.y))
+
+    def frozen(self) -> 'FrozenVec2':
+        return self
+
+    def mutable(self) -> Vec2:
+        return Vec2._make(self.x, self.y)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f'FrozenVec2 is immutable, use mutable() to get a Vec2')
+
+    def __setitem__(self, index, value) -> None:
+        raise TypeError(f'FrozenVec2 is immutable, use mutable() to get a Vec2')
 
     def __repr__(self) -> str:
-        return f'Vec2({self.values[0]}, {self.values[1]})'
+        return f'FrozenVec2({self.x}, {self.y})'
 
     def __str__(self) -> str:
-        return f'Vec2({self.values[0]}, {self.values[1]})'
+        return f'FrozenVec2({self.x}, {self.y})'
+
+    def __eq__(self, other: Vec2) -> bool:
+        if isinstance(other, (FrozenVec2, Vec2Int)):
+            return self.x == other.x and self.y == other.y
+        if isinstance(other, Vec2):
+            # Same comparison as other == self, so that equality with a mutable vector stays symmetric
+            return _is_close(other.x, self.x) and _is_close(other.y, self.y)
+        return VecN.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __iadd__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> 'FrozenVec2':
+        return self + other
+
+    def __isub__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> 'FrozenVec2':
+        return self - other
+
+    def __imul__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> 'FrozenVec2':
+        return self * other
+
+    def __itruediv__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> 'FrozenVec2':
+        return self / other
+
+    def __ifloordiv__(self, other: Union[Vec2, Number, tuple, list, np.ndarray]) -> 'FrozenVec2':
+        return self // other
+
+    def __ipow__(self, power: Union[Vec2, Number, tuple, list, np.ndarray]) -> 'FrozenVec2':
+        return self ** power
+
+    def add_scaled(self, other: Union[Vec2, Number, tuple, list, np.ndarray], k: Number) -> 'FrozenVec2':
+        x, y = (other.x, other.y) if isinstance(other, Vec2) else _unpack(other, 2)
+        return self._make(self.x + x * k, self.y + y * k)
+
+    def __reduce__(self):
+        return (FrozenVec2, (self.x, self.y))
+
+    def __copy__(self) -> 'FrozenVec2':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'FrozenVec2':
+        return self
+
+# Slot setters bypassing FrozenVec2.__setattr__
+_set_x, _set_y, _set_hash = Vec2.x.__set__, Vec2.y.__set__, FrozenVec2._hash.__set__
 
 class Vec3(VecN):
+    '''3D vector stored as three plain floats (`values` is a copy built on demand)'''
+    __slots__ = ('y', 'z')
+    x = VecN.values # Like Vec2
+
     @overload
     def __init__(self, x: Number, y: Number, z: Number):...
     @overload
@@ -271,92 +748,570 @@ class Vec3(VecN):
     @overload
     def __init__(self, other: 'Vec3'):...
     def __init__(self, arg1, *args):
-        if isinstance(arg1, VecN):
+        if isinstance(arg1, (float, int, np.number)):
+            if len(args) != 2:
+                raise ValueError(f'Vec3 can only be initialized with 3 values, got {len(args) + 1}')
+            self.x = float(arg1)
+            self.y = float(args[0])
+            self.z = float(args[1])
+        elif isinstance(arg1, VecN):
             assert len(args) == 0, 'Copy constructor can only be used with no additional arguments'
             assert len(arg1) == 3, 'Vec3 copy constructor can only be initialized with a VecN with 3 elements (or Vec3)'
-            super().__init__(arg1.values)
+            x, y, z = arg1
+            self.x = float(x)
+            self.y = float(y)
+            self.z = float(z)
         elif isinstance(arg1, (tuple, list, np.ndarray)):
             if len(arg1) != 3:
                 raise ValueError(f'Vec3 can only be initialized with 3 values, got {len(arg1)}')
-            super().__init__(arg1)
-        elif isinstance(arg1, (float, int)):
-            if len(args) != 2:
-                raise ValueError(f'Vec3 can only be initialized with 3 values, got {len(args) + 1}')
-            super().__init__(arg1, *args)
+            x, y, z = arg1
+            self.x = float(x)
+            self.y = float(y)
+            self.z = float(z)
         else:
             raise TypeError(f'{type(arg1)} is not supported')
+
+    @classmethod
+    def _make(cls, x: float, y: float, z: float) -> Self:
+        '''Builds a vector from already computed components, skipping __init__ checks'''
+        vec = object.__new__(cls)
+        vec.x = x
+        vec.y = y
+        vec.z = z
+        return vec
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> 'Vec3':
+        return _Vec3View._view(values)
+
+    @property
+    def values(self) -> np.ndarray:
+        return np.array((self.x, self.y, self.z))
+
+    @values.setter
+    def values(self, values: ArrayLike) -> None:
+        if len(values) != 3:
+            raise ValueError(f'Vec3 can only hold 3 values, got {len(values)}')
+        self.x = float(values[0])
+        self.y = float(values[1])
+        self.z = float(values[2])
+
+    @property
+    def xy(self) -> Vec2:
+        return Vec2._make(self.x, self.y)
+
+    @xy.setter
+    def xy(self, value: Vec2) -> None:
+        self.x, self.y = value
+
+    @property
+    def xz(self) -> Vec2:
+        return Vec2._make(self.x, self.z)
+
+    @xz.setter
+    def xz(self, value: Vec2) -> None:
+        self.x = value.x
+        self.z = value.y
+
+    @property
+    def yz(self) -> Vec2:
+        return Vec2._make(self.y, self.z)
+
+    @yz.setter
+    def yz(self, value: Vec2) -> None:
+        self.y = value.x
+        self.z = value.y
+
+    @property
+    def xyz(self) -> 'Vec3':
+        return Vec3._make(self.x, self.y, self.z)
+
+    @xyz.setter
+    def xyz(self, value: 'Vec3') -> None:
+        self.x, self.y, self.z = value
+
+    def projected_x(self) -> float:
+        return self.projected(0)
+
+    def projected_y(self) -> float:
+        return self.projected(1)
+
+    def projected_z(self) -> float:
+        return self.projected(2)
+
+    def projected(self, axis: Union[VecN, int]) -> float:
+        if isinstance(axis, int):
+            value = (self.x, self.y, self.z)[axis]
+            return value * value
+        return self.dot(axis)
+
+    def magnitude(self) -> float:
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def dot(self, other: VecN) -> float:
+        if isinstance(other, Vec3):
+            return self.x * other.x + self.y * other.y + self.z * other.z
+        return super().dot(other)
+
+    def add_scaled(self, other: Union[Self, Number, tuple, list, np.ndarray], k: Number) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        self.x += x * k
+        self.y += y * k
+        self.z += z * k
+        return self
+
+    def __len__(self) -> int:
+        return 3
+
+    def __iter__(self) -> Iterator[float]:
+        return iter((self.x, self.y, self.z))
+
+    def __repr__(self) -> str:
+        return f'Vec3({self.x:.4f}, {self.y:.4f}, {self.z:.4f})'
+
+    def __str__(self) -> str:
+        return f'Vec3({self.x:.4f}, {self.y:.4f}, {self.z:.4f})'
+
+    def __eq__(self, other: Self) -> bool:
+        if isinstance(other, Vec3):
+            return _is_close(self.x, other.x) and _is_close(self.y, other.y) and _is_close(self.z, other.z)
+        return super().__eq__(other)
+
+    def __add__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        if isinstance(other, Vec3):
+            return self._make(self.x + other.x, self.y + other.y, self.z + other.z)
+        x, y, z = _unpack(other, 3)
+        return self._make(self.x + x, self.y + y, self.z + z)
+
+    def __iadd__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        self.x += x
+        self.y += y
+        self.z += z
+        return self
+
+    def __sub__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        if isinstance(other, Vec3):
+            return self._make(self.x - other.x, self.y - other.y, self.z - other.z)
+        x, y, z = _unpack(other, 3)
+        return self._make(self.x - x, self.y - y, self.z - z)
+
+    def __isub__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        self.x -= x
+        self.y -= y
+        self.z -= z
+        return self
+
+    def __mul__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        if isinstance(other, Vec3):
+            return self._make(self.x * other.x, self.y * other.y, self.z * other.z)
+        x, y, z = _unpack(other, 3)
+        return self._make(self.x * x, self.y * y, self.z * z)
+
+    def __imul__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        self.x *= x
+        self.y *= y
+        self.z *= z
+        return self
+
+    def __truediv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        try:
+            return self._make(self.x / x, self.y / y, self.z / z)
+        except ZeroDivisionError:
+            # Keep numpy's inf/nan semantics for division by zero
+            return self._make(*np.true_divide((self.x, self.y, self.z), (x, y, z)).tolist())
+
+    def __itruediv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        try:
+            self.x, self.y, self.z = self.x / x, self.y / y, self.z / z
+        except ZeroDivisionError:
+            self.x, self.y, self.z = np.true_divide((self.x, self.y, self.z), (x, y, z)).tolist()
+        return self
+
+    def __floordiv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        try:
+            return self._make(self.x // x, self.y // y, self.z // z)
+        except ZeroDivisionError:
+            return self._make(*np.floor_divide((self.x, self.y, self.z), (x, y, z)).tolist())
+
+    def __ifloordiv__(self, other: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        x, y, z = (other.x, other.y, other.z) if isinstance(other, Vec3) else _unpack(other, 3)
+        try:
+            self.x, self.y, self.z = self.x // x, self.y // y, self.z // z
+        except ZeroDivisionError:
+            self.x, self.y, self.z = np.floor_divide((self.x, self.y, self.z), (x, y, z)).tolist()
+        return self
+
+    def __neg__(self) -> Self:
+        return self._make(-self.x, -self.y, -self.z)
+
+    def __abs__(self) -> Self:
+        return self._make(abs(self.x), abs(self.y), abs(self.z))
+
+    def __pow__(self, power: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        return self._make(*np.power((self.x, self.y, self.z), _unpack(power, 3)).tolist())
+
+    def __rpow__(self, power: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        return self._make(*np.power(_unpack(power, 3), (self.x, self.y, self.z), dtype=float).tolist())
+
+    def __ipow__(self, power: Union[Self, Number, tuple, list, np.ndarray]) -> Self:
+        self.x, self.y, self.z = np.power((self.x, self.y, self.z), _unpack(power, 3)).tolist()
+        return self
+
+    def __getstate__(self) -> dict:
+        return {'values': [self.x, self.y, self.z]}
+
+    def __setstate__(self, state: dict) -> None:
+        self.values = state['values']
+
+    def __copy__(self) -> Self:
+        return self._make(self.x, self.y, self.z)
+
+    def __deepcopy__(self, memo: dict) -> Self:
+        return self._make(self.x, self.y, self.z)
+
+    @overload
+    def __getitem__(self, index: int) -> Number: ...
+    @overload
+    def __getitem__(self, index: slice) -> VecN: ...
+    def __getitem__(self, index: Union[int, slice]) -> Union[float, VecN]:
+        if isinstance(index, int):
+            return (self.x, self.y, self.z)[index]
+        return VecN(self.values[index])
+
+    def __setitem__(self, index: Union[int, slice], value: Union[VecN, float, list, tuple, np.ndarray]) -> None:
+        if isinstance(index, int):
+            if not -3 <= index < 3:
+                raise IndexError(f'Vec3 index out of range: {index}')
+            setattr(self, 'xyz'[index], float(value))
+        else:
+            values = self.values
+            values[index] = value.values if isinstance(value, VecN) else value
+            self.values = values
+
+class _Vec3View(Vec3):
+    '''Vec3 reading and writing a row of a Vec3Array instead of its own floats (see `Vec3Array.__getitem__`)'''
+    __slots__ = ('_buffer',)
+
+    @classmethod
+    def _view(cls, buffer: np.ndarray) -> '_Vec3View':
+        vec = object.__new__(cls)
+        vec._buffer = buffer
+        return vec
+
+    @classmethod
+    def _make(cls, x: float, y: float, z: float) -> Vec3:
+        # Results of operations on a view are independent vectors
+        return Vec3._make(x, y, z)
+
     @property
     def x(self) -> float:
-        return self.values[0]
-    
+        return self._buffer[0]
+
     @x.setter
     def x(self, value: float) -> None:
-        self.values[0] = value
-    
+        self._buffer[0] = value
+
     @property
     def y(self) -> float:
-        return self.values[1]
-    
+        return self._buffer[1]
+
     @y.setter
     def y(self, value: float) -> None:
-        self.values[1] = value
-    
+        self._buffer[1] = value
+
     @property
     def z(self) -> float:
-        return self.values[2]
-    
+        return self._buffer[2]
+
     @z.setter
     def z(self, value: float) -> None:
-        self.values[2] = value
-    
+        self._buffer[2] = value
+
     @property
-    def xy(self) -> Vec2:
-        return Vec2(self.values[0], self.values[1])
+    def values(self) -> np.ndarray:
+        return self._buffer
+
+    @values.setter
+    def values(self, values: ArrayLike) -> None:
+        self._buffer[:] = values
+
+    def __reduce__(self):
+        return (Vec3, (float(self.x), float(self.y), float(self.z)))
+
+class VecNArray:
+    '''Batch of N vectors in one contiguous (N, D) array (float64 unless `dtype` is given), with the operators of VecN'''
+    dimension: Optional[int] = None
+    element_type: type = VecN
+    dtype: type = np.float64
+    float_type: Optional[type] = None # Array type of non-integral results, for integer arrays
+
+    @overload
+    def __init__(self, vecs: Sequence[VecN]): ...
+    @overload
+    def __init__(self, values: ArrayLike): ...
+    @overload
+    def __init__(self, other: 'VecNArray'): ...
+    def __init__(self, values: Union['VecNArray', Sequence[VecN], ArrayLike], dtype: Optional[type] = None):
+        dtype = dtype or self.dtype
+        if isinstance(values, VecNArray):
+            values = values.values
+        elif isinstance(values, (list, tuple)) and any(isinstance(vec, VecN) for vec in values):
+            values = [vec.values for vec in values]
+
+        if len(values) == 0:
+            self.values = np.empty((0, self.dimension or 0), dtype=dtype)
+        else:
+            self.values = np.array(values, dtype=dtype, ndmin=2)
+
+        if self.values.ndim != 2:
+            raise ValueError(f'{self.__class__.__name__} must be initialized with (N, D) values, got shape {self.values.shape}')
+        if self.dimension is not None and self.values.shape[1] != self.dimension:
+            raise ValueError(f'{self.__class__.__name__} can only hold vectors with {self.dimension} values, got {self.values.shape[1]}')
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> Self:
+        '''Builds an array around `values` without copying or validating it'''
+        array = cls.__new__(cls)
+        array.values = values
+        return array
+
+    @classmethod
+    def _result(cls, values: np.ndarray) -> 'VecNArray':
+        '''Wraps an operator result, as `float_type` when an integer array produced non-integral values'''
+        if cls.float_type is not None and not np.issubdtype(values.dtype, np.integer):
+            return cls.float_type._wrap(values)
+        return cls._wrap(values)
+
+    @classmethod
+    def from_vecs(cls, vecs: Sequence[VecN]) -> Self:
+        return cls(list(vecs))
+
+    def astype(self, dtype: type) -> 'VecNArray':
+        '''Copy with values of another type (`float_type` for non-integer types of an integer array)'''
+        return self._result(self.values.astype(dtype))
+
+    def to_vecs(self) -> list[VecN]:
+        '''Returns independent copies of every vector (see `__getitem__` for views)'''
+        return [self.element_type(row) for row in self.values]
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.values.shape
+
+    def _operand(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Union[np.ndarray, Number]:
+        if isinstance(other, (float, int)):
+            return other
+        if isinstance(other, (VecNArray, VecN)):
+            other = other.values
+        elif isinstance(other, (tuple, list)):
+            other = np.array(other)
+        elif not isinstance(other, np.ndarray):
+            raise TypeError(f'{type(other)} is not supported')
+        if other.dtype != self.values.dtype and (self.values.dtype.kind == 'f' or other.dtype.kind in 'iu'):
+            # Arrays keep their precision
+            return other.astype(self.values.dtype)
+        return other
+
+    def projected(self, axis: Union[VecN, int]) -> np.ndarray:
+        if isinstance(axis, int):
+            # Same as VecN.projected(int), row-wise
+            return self.values[:, axis] * self.values[:, axis]
+        return self.values @ axis.values
+
+    def magnitude(self) -> np.ndarray:
+        return np.sqrt(np.einsum('ij,ij->i', self.values, self.values))
+
+    def normalized(self) -> Self:
+        return self._result(self.values / self.magnitude()[:, np.newaxis])
+
+    def dot(self, other: Union['VecNArray', VecN]) -> np.ndarray:
+        assert isinstance(other, (VecNArray, VecN)), f'Trying to make dot product with a {type(other)}'
+        if isinstance(other, VecN):
+            return self.values @ other.values
+        assert other.values.shape == self.values.shape, f'Arrays must be the same shape for a dot product, got {other.values.shape=} != {self.values.shape=}'
+        return np.einsum('ij,ij->i', self.values, other.values)
+
+    def add_scaled(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray], k: Number) -> Self:
+        '''`self += other * k` in place, e.g. `positions.add_scaled(velocities, dt)`; returns self'''
+        np.add(self.values, np.multiply(self._operand(other), k), out=self.values)
+        return self
+
+    def _inplace(self, ufunc: np.ufunc, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> 'VecNArray':
+        '''In-place operator writing into `values` when the result keeps their dtype (a new `float_type` array otherwise)'''
+        operand = self._operand(other)
+        if self.values.dtype.kind != 'f':
+            dtype = np.result_type(self.values, operand)
+            if ufunc is np.true_divide and dtype.kind in 'biu':
+                dtype = np.dtype(np.float64)
+            if not np.can_cast(dtype, self.values.dtype, 'same_kind'):
+                return self._result(ufunc(self.values, operand))
+        ufunc(self.values, operand, out=self.values)
+        return self
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[VecN]:
+        for row in self.values:
+            yield self.element_type._wrap(row)
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.values.tolist()})'
+
+    def __str__(self) -> str:
+        return f'{self.__class__.__name__}({self.values.tolist()})'
+
+    def __eq__(self, other: Self) -> bool:
+        if isinstance(other, VecNArray):
+            if np.issubdtype(self.values.dtype, np.integer) and np.issubdtype(other.values.dtype, np.integer):
+                return np.array_equal(self.values, other.values)
+            return self.values.shape == other.values.shape and np.allclose(self.values, other.values)
+        return False
+
+    def __ne__(self, other: Self) -> bool:
+        return not self.__eq__(other)
+
+    def __add__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Self:
+        return self._result(self.values + self._operand(other))
+
+    def __iadd__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> 'VecNArray':
+        return self._inplace(np.add, other)
+
+    def __sub__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Self:
+        return self._result(self.values - self._operand(other))
+
+    def __isub__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> 'VecNArray':
+        return self._inplace(np.subtract, other)
+
+    def __mul__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Self:
+        return self._result(self.values * self._operand(other))
+
+    def __imul__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> 'VecNArray':
+        return self._inplace(np.multiply, other)
+
+    def __truediv__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Self:
+        return self._result(self.values / self._operand(other))
+
+    def __itruediv__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> 'VecNArray':
+        return self._inplace(np.true_divide, other)
+
+    def __floordiv__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Self:
+        return self._result(self.values // self._operand(other))
+
+    def __ifloordiv__(self, other: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> 'VecNArray':
+        return self._inplace(np.floor_divide, other)
+
+    def __neg__(self) -> Self:
+        return self._result(-self.values)
+
+    def __abs__(self) -> Self:
+        return self._result(abs(self.values))
+
+    def __pow__(self, power: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Self:
+        return self._result(self.values ** self._operand(power))
+
+    def __rpow__(self, power: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> Self:
+        return self._result(self._operand(power) ** self.values)
+
+    def __ipow__(self, power: Union['VecNArray', VecN, Number, tuple, list, np.ndarray]) -> 'VecNArray':
+        return self._inplace(np.power, power)
+
+    def __getstate__(self) -> dict:
+        return {'values': self.values.tolist(), 'dtype': self.values.dtype.str}
+
+    def __setstate__(self, state: dict) -> None:
+        self.values = np.array(state['values'], dtype=state.get('dtype', self.dtype), ndmin=2)
+        if self.values.size == 0:
+            self.values = self.values.reshape(0, self.dimension or 0)
+
+    def __reduce_ex__(self, protocol: int):
+        # Out-of-band values array from protocol 5, like VecN
+        if protocol >= 5:
+            return (self.__class__._wrap, (self.values,))
+        return super().__reduce_ex__(protocol)
+
+    def __copy__(self) -> Self:
+        return self.__class__._wrap(self.values.copy())
+
+    def __deepcopy__(self, memo: dict) -> Self:
+        return self.__class__._wrap(self.values.copy())
+
+    @overload
+    def __getitem__(self, index: int) -> VecN: ...
+    @overload
+    def __getitem__(self, index: Union[slice, np.ndarray, list]) -> 'VecNArray': ...
+    def __getitem__(self, index: Union[int, slice, np.ndarray, list]) -> Union[VecN, 'VecNArray']:
+        '''Integer indexing returns a vector viewing this array's memory: writing to it writes to the array'''
+        if isinstance(index, (int, np.integer)):
+            return self.element_type._wrap(self.values[index])
+        return self.__class__._wrap(self.values[index])
+
+    def __setitem__(self, index: Union[int, slice, np.ndarray, list], value: Union['VecNArray', VecN, tuple, list, np.ndarray]) -> None:
+        self.values[index] = self._operand(value)
+
+class Vec2Array(VecNArray):
+    dimension = 2
+    element_type = Vec2
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.values[:, 0]
+
+    @x.setter
+    def x(self, value: Union[Number, np.ndarray]) -> None:
+        self.values[:, 0] = value
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.values[:, 1]
+
+    @y.setter
+    def y(self, value: Union[Number, np.ndarray]) -> None:
+        self.values[:, 1] = value
+
+class Vec2IntArray(Vec2Array):
+    '''Vec2Array of int32 values (half the memory of float64), with exact equality; elements are Vec2Int'''
+    element_type = Vec2Int
+    dtype = np.int32
+    float_type = Vec2Array
 
-    @xy.setter
-    def xy(self, value: Vec2) -> None:
-        self.x, self.y = value
+class Vec3Array(VecNArray):
+    dimension = 3
+    element_type = Vec3
 
     @property
-    def xz(self) -> Vec2:
-        return Vec2(self.values[0], self.values[2])
+    def x(self) -> np.ndarray:
+        return self.values[:, 0]
 
-    @xz.setter
-    def xz(self, value: Vec2) -> None:
-        self.values[0] = value.x
-        self.values[2] = value.y
+    @x.setter
+    def x(self, value: Union[Number, np.ndarray]) -> None:
+        self.values[:, 0] = value
 
     @property
-    def yz(self) -> Vec2:
-        return Vec2(self.values[1], self.values[2])
+    def y(self) -> np.ndarray:
+        return self.values[:, 1]
 
-    @yz.setter
-    def yz(self, value: Vec2) -> None:
-        self.values[1] = value.x
-        self.values[2] = value.y
+    @y.setter
+    def y(self, value: Union[Number, np.ndarray]) -> None:
+        self.values[:, 1] = value
 
     @property
-    def xyz(self) -> 'Vec3':
-        return Vec3(self.values)
-    
-    @xyz.setter
-    def xyz(self, value: 'Vec3') -> None:
-        self.x, self.y, self.z = value.values
-
-    def projected_x(self) -> float:
-        return self.projected(0)
-    
-    def projected_y(self) -> float:
-        return self.projected(1)
-    
-    def projected_z(self) -> float:
-        return self.projected(2)
+    def z(self) -> np.ndarray:
+        return self.values[:, 2]
 
-    def __repr__(self) -> str:
-        return f'Vec3({self.values[0]:.4f}, {self.values[1]:.4f}, {self.values[2]:.4f})'
+    @z.setter
+    def z(self, value: Union[Number, np.ndarray]) -> None:
+        self.values[:, 2] = value
 
-    def __str__(self) -> str:
-        return f'Vec3({self.values[0]:.4f}, {self.values[1]:.4f}, {self.values[2]:.4f})'
+    @property
+    def xy(self) -> Vec2Array:
+        return Vec2Array._wrap(self.values[:, :2])
 
 #   assert Rect2(Vec2(0, 0), Vec2(1, 1)) == Rect2(Vec2(0, 0), Vec2(1, 1))
 #     assert Rect2(Vec2(0, 0), Vec2(1, 1)) != Rect2(Vec2(0, 0), Vec2(1, 2))
@@ -409,10 +1364,10 @@ class Vec3(VecN):
 #     assert rect + Vec2(10, 10) == Rect2(Vec2(20, 20), Vec2(30, 30))
 #     assert rect.expand(10) == Rect2(Vec2(0, 0), Vec2(30, 30))    
 
-@dataclass
 class Rect2(Serializable):
-    start: Vec2
-    end: Vec2
+    '''Axis-aligned rectangle stored as four plain floats, between its `start` and `end` corners'''
+    __slots__ = ('_min_x', '_min_y', '_max_x', '_max_y')
+    _codec_fields = tuple((name, float) for name in __slots__)
     @overload
     def __init__(self, arg1: Number, arg2: Number, arg3: Number, arg4: Number):
         '''Constructs a Rect2 from 4 values (min_x, min_y, max_x, max_y)'''
@@ -449,6 +1404,20 @@ class Rect2(Serializable):
         ...    
 
     def __init__(self, arg1: Union[Vec2, 'Rect2', Number], arg2: Union[Vec2, Number] = None, *args: Number, size: Vec2 = None, width: Number = None, height: Number = None):
+        if size is None and width is None and height is None:
+            # Fast paths for the common forms, skipping the checks below
+            if len(args) == 2:
+                if type(arg1) in _PLAIN_NUMBERS and type(arg2) in _PLAIN_NUMBERS and type(args[0]) in _PLAIN_NUMBERS and type(args[1]) in _PLAIN_NUMBERS:
+                    self._set_ordered(float(arg1), float(arg2), float(args[0]), float(args[1]))
+                    return
+            elif not args:
+                if type(arg1) is Vec2 and type(arg2) is Vec2:
+                    self._set_ordered(arg1.x, arg1.y, arg2.x, arg2.y)
+                    return
+                if arg2 is None and isinstance(arg1, Rect2):
+                    self._set_ordered(arg1._min_x, arg1._min_y, arg1._max_x, arg1._max_y)
+                    return
+
         assert arg1 is not None, 'Rect2 must be initialized with at least one argument'
         if isinstance(arg1, Rect2):
             assert arg2 is None, 'Rect2(Rect2) copy can only be initialized with one argument'
@@ -508,82 +1477,126 @@ class Rect2(Serializable):
             raise ValueError('Rect2 end not specified: use some of `(min_x, min_y, max_x, max_y)` or `(start, end)` or `(start, width=, height=)` or `(x, y, width=, height=)` or `(x, y, size=Vec2)`')
         
         # Swap start and end if necessary
-        if self.start.x > self.end.x or self.start.y > self.end.y:
-            self.start, self.end = self.end, self.start
-        pass
+        self._set_ordered(self._min_x, self._min_y, self._max_x, self._max_y)
+
+    @classmethod
+    def from_bbox_unchecked(cls, min_x: float, min_y: float, max_x: float, max_y: float) -> 'Rect2':
+        '''Builds a rect from an already ordered float bbox, without __init__'s dispatch, checks and start/end swap'''
+        rect = object.__new__(cls)
+        rect._min_x = min_x
+        rect._min_y = min_y
+        rect._max_x = max_x
+        rect._max_y = max_y
+        return rect
+
+    @staticmethod
+    def _ordered(min_x: float, min_y: float, max_x: float, max_y: float) -> 'Rect2':
+        '''Mutable rect from a computed bbox, swapping the corners like __init__ when they are out of order'''
+        if min_x > max_x or min_y > max_y:
+            return Rect2.from_bbox_unchecked(max_x, max_y, min_x, min_y)
+        return Rect2.from_bbox_unchecked(min_x, min_y, max_x, max_y)
+
+    def _set_ordered(self, min_x: float, min_y: float, max_x: float, max_y: float) -> None:
+        if min_x > max_x or min_y > max_y:
+            min_x, min_y, max_x, max_y = max_x, max_y, min_x, min_y
+        self._min_x = min_x
+        self._min_y = min_y
+        self._max_x = max_x
+        self._max_y = max_y
+
+    @property
+    def start(self) -> Vec2:
+        '''Min corner, viewing this rect's floats: writing to it writes to the rect'''
+        return _Rect2Start._view(self)
+
+    @start.setter
+    def start(self, value: Vec2) -> None:
+        x, y = (value.x, value.y) if isinstance(value, Vec2) else _unpack(value, 2)
+        self._min_x = float(x)
+        self._min_y = float(y)
+
+    @property
+    def end(self) -> Vec2:
+        '''Max corner, viewing this rect's floats: writing to it writes to the rect'''
+        return _Rect2End._view(self)
+
+    @end.setter
+    def end(self, value: Vec2) -> None:
+        x, y = (value.x, value.y) if isinstance(value, Vec2) else _unpack(value, 2)
+        self._max_x = float(x)
+        self._max_y = float(y)
 
-    
     @property
     def x(self):
-        return self.start.x
+        return self._min_x
     
     @property
     def y(self):
-        return self.start.y
+        return self._min_y
 
     @property
     def xy(self):
-        return self.start.xy
+        return Vec2._make(self._min_x, self._min_y)
 
     @property
     def width(self):
-        return self.end.x - self.start.x
+        return self._max_x - self._min_x
 
     @property
     def height(self):
-        return self.end.y - self.start.y
+        return self._max_y - self._min_y
 
     @property
     def w(self):
-        return self.width
+        return self._max_x - self._min_x
     
     @property
     def h(self):
-        return self.height
+        return self._max_y - self._min_y
 
     @property
     def size(self):
-        return self.end - self.start
+        return Vec2._make(self._max_x - self._min_x, self._max_y - self._min_y)
     
     @property
     def wh(self):
-        return self.size.xy
+        return self.size
 
     @property
     def xywh(self):
-        return VecN(*self.start.xy, *self.size.xy)
+        return VecN._wrap(np.array(self.tuple_xywh, dtype=float))
 
     @property
     def bbox(self):
-        return VecN(*self.start.xy, *self.end.xy)
+        return VecN._wrap(np.array((self._min_x, self._min_y, self._max_x, self._max_y), dtype=float))
 
     @property
     def tuple_bbox(self):
-        return (*self.start.xy, *self.end.xy)
+        return (self._min_x, self._min_y, self._max_x, self._max_y)
 
     @property
     def tuple_xywh(self):
-        return (*self.start.xy, *self.size.xy)
+        return (self._min_x, self._min_y, self._max_x - self._min_x, self._max_y - self._min_y)
 
     @property
     def center(self):
-        return self.start + self.size / 2
+        return Vec2._make(self._min_x + (self._max_x - self._min_x) / 2, self._min_y + (self._max_y - self._min_y) / 2)
 
     @property
     def left(self):
-        return self.start.x
+        return self._min_x
     
     @property
     def right(self):
-        return self.end.x
+        return self._max_x
     
     @property
     def top(self):
-        return self.end.y
+        return self._max_y
 
     @property
     def bottom(self):
-        return self.start.y
+        return self._min_y
 
     @property
     def min(self):
@@ -591,22 +1604,22 @@ class Rect2(Serializable):
 
     @property
     def bottom_left(self):
-        return self.start.xy
+        return Vec2._make(self._min_x, self._min_y)
 
     @property
     def top_left(self):
-        return Vec2(self.start.x, self.end.y)
+        return Vec2._make(self._min_x, self._max_y)
 
     @property
     def top_right(self):
-        return self.end.xy
+        return Vec2._make(self._max_x, self._max_y)
 
     @property
     def bottom_right(self):
-        return Vec2(self.end.x, self.start.y)
+        return Vec2._make(self._max_x, self._min_y)
 
     def __iter__(self):
-        yield from self.bbox
+        yield from self.tuple_bbox
 
     def __repr__(self):
         return f'Rect2({self.start}, {self.end}, size={self.size})'
@@ -617,41 +1630,98 @@ class Rect2(Serializable):
     def __eq__(self, other):
         if not isinstance(other, Rect2):
             return False
-        return self.start == other.start and self.end == other.end
+        return _is_close(self._min_x, other._min_x) and _is_close(self._min_y, other._min_y) and _is_close(self._max_x, other._max_x) and _is_close(self._max_y, other._max_y)
     
     def __ne__(self, other):
         return not self == other
 
-    def __hash__(self):
-        return hash((self.start, self.end))
+    __hash__ = None # Equality is approximate, so equal rects could hash differently
+
+    def __getstate__(self) -> dict:
+        # Same state as the Vec2 corners had, so older pickles still load
+        return {'start': Vec2._make(self._min_x, self._min_y), 'end': Vec2._make(self._max_x, self._max_y)}
+
+    def __setstate__(self, state: dict) -> None:
+        self.start = state['start']
+        self.end = state['end']
+
+    def __copy__(self) -> 'Rect2':
+        return self.from_bbox_unchecked(self._min_x, self._min_y, self._max_x, self._max_y)
+
+    def __deepcopy__(self, memo: dict) -> 'Rect2':
+        return self.from_bbox_unchecked(self._min_x, self._min_y, self._max_x, self._max_y)
+
+    def _pickled_state(self) -> dict:
+        return self.__getstate__()
 
     def __add__(self, other):
         if isinstance(other, Vec2):
-            return Rect2(self.start + other, self.end + other)
+            x, y = other.x, other.y
+            return Rect2.from_bbox_unchecked(self._min_x + x, self._min_y + y, self._max_x + x, self._max_y + y)
         else:
             raise TypeError(f'Rect2 can only be added with a Vec2, got {type(other)}')
     
     def __sub__(self, other):
         if isinstance(other, Vec2):
-            return Rect2(self.start - other, self.end - other)
+            x, y = other.x, other.y
+            return Rect2.from_bbox_unchecked(self._min_x - x, self._min_y - y, self._max_x - x, self._max_y - y)
         else:
             raise TypeError(f'Rect2 can only be subtracted with a Vec2, got {type(other)}')
 
     def __mul__(self, other):
         if isinstance(other, Vec2):
-            return Rect2(self.start * other, self.end * other)
+            x, y = other.x, other.y
         elif isinstance(other, (int, float)):
-            return Rect2(self.start * other, self.end * other)
+            x = y = other
         else:
             raise TypeError(f'Rect2 can only be multiplied with a Vec2 or a number, got {type(other)}')
+        return Rect2._ordered(self._min_x * x, self._min_y * y, self._max_x * x, self._max_y * y)
 
     def __truediv__(self, other):
+        if isinstance(other, (Vec2, int, float)):
+            # Through Vec2 division, for its inf/nan semantics on zero
+            start, end = self.bottom_left / other, self.top_right / other
+            return Rect2._ordered(start.x, start.y, end.x, end.y)
+        else:
+            raise TypeError(f'Rect2 can only be divided with a Vec2 or a number, got {type(other)}')
+
+    def __iadd__(self, other):
+        if not isinstance(other, Vec2):
+            raise TypeError(f'Rect2 can only be added with a Vec2, got {type(other)}')
+        x, y = other.x, other.y
+        self._min_x += x
+        self._min_y += y
+        self._max_x += x
+        self._max_y += y
+        return self
+
+    def __isub__(self, other):
+        if not isinstance(other, Vec2):
+            raise TypeError(f'Rect2 can only be subtracted with a Vec2, got {type(other)}')
+        x, y = other.x, other.y
+        self._min_x -= x
+        self._min_y -= y
+        self._max_x -= x
+        self._max_y -= y
+        return self
+
+    def __imul__(self, other):
         if isinstance(other, Vec2):
-            return Rect2(self.start / other, self.end / other)
+            x, y = other.x, other.y
         elif isinstance(other, (int, float)):
-            return Rect2(self.start / other, self.end / other)
+            x = y = other
         else:
+            raise TypeError(f'Rect2 can only be multiplied with a Vec2 or a number, got {type(other)}')
+        # Swapped like __init__ after a negative scale
+        self._set_ordered(self._min_x * x, self._min_y * y, self._max_x * x, self._max_y * y)
+        return self
+
+    def __itruediv__(self, other):
+        if not isinstance(other, (Vec2, int, float)):
             raise TypeError(f'Rect2 can only be divided with a Vec2 or a number, got {type(other)}')
+        start, end = self.bottom_left / other, self.top_right / other
+        self._set_ordered(start.x, start.y, end.x, end.y)
+        return self
 
     def __rmul__(self, other):
         return self.__mul__(other)
@@ -661,13 +1731,13 @@ class Rect2(Serializable):
 
     def __contains__(self, other):
         if isinstance(other, Vec2):
-            return self.start.x <= other.x <= self.end.x and self.start.y <= other.y <= self.end.y
+            return self._min_x <= other.x <= self._max_x and self._min_y <= other.y <= self._max_y
         else:
             raise TypeError(f'Rect2 can only be checked for containment with a Vec2, got {type(other)}')
 
     def __getitem__(self, index):
         if isinstance(index, int):
-            return self.bbox[index]
+            return self.tuple_bbox[index]
         elif isinstance(index, slice):
             return Rect2(self.bbox[index])
         else:
@@ -675,24 +1745,29 @@ class Rect2(Serializable):
 
     def __setitem__(self, index, value):
         assert index in range(4), f'Rect2 can only be indexed with an int in range(4), got {index}'
-        targets = [ self.start, self.start, self.end, self.end ]
-        targets[index].values[index % 2] = value # start.values[0 -> 0] or start.values[1 -> 1], end.values[2 -> 0] or end.values[3 -> 1]
+        setattr(self, Rect2.__slots__[index], float(value)) # start.x, start.y, end.x, end.y
+
+    def frozen(self) -> 'FrozenRect2':
+        '''Immutable, hashable copy'''
+        return FrozenRect2._make(self._min_x, self._min_y, self._max_x, self._max_y)
 
     def intersects(self, other: 'Rect2') -> bool:
         if not isinstance(other, Rect2):
             raise TypeError(f'Rect2 can only be intersected with another Rect2, got {type(other)}')
 
-        return self.start.x <= other.end.x and self.end.x >= other.start.x and self.start.y <= other.end.y and self.end.y >= other.start.y
+        return self._min_x <= other._max_x and self._max_x >= other._min_x and self._min_y <= other._max_y and self._max_y >= other._min_y
 
     @metsig(__contains__)
     def contains(self, *args, **kwargs) -> bool:
         return self.__contains__(*args, **kwargs)
 
     def expanded_start(self, size: Vec2) -> 'Rect2':
-        return Rect2(self.start - size, self.end)
+        x, y = (size.x, size.y) if isinstance(size, Vec2) else _unpack(size, 2)
+        return Rect2._ordered(self._min_x - x, self._min_y - y, self._max_x, self._max_y)
     
     def expanded_end(self, size: Vec2) -> 'Rect2':
-        return Rect2(self.start, self.end + size)
+        x, y = (size.x, size.y) if isinstance(size, Vec2) else _unpack(size, 2)
+        return Rect2._ordered(self._min_x, self._min_y, self._max_x + x, self._max_y + y)
 
     @overload
     def expanded(self, size: Vec2) -> 'Rect2':
@@ -701,33 +1776,182 @@ class Rect2(Serializable):
     def expanded(self, size: Number) -> 'Rect2':
         ...
     def expanded(self, size: Union[Vec2, float, int]) -> 'Rect2':
-        if isinstance(size, (int, float)):
-            size = Vec2(size, size)
-        return Rect2(self.start - size/2, self.end + size/2)
+        x, y = (size, size) if isinstance(size, (int, float)) else (size.x, size.y) if isinstance(size, Vec2) else _unpack(size, 2)
+        x, y = x / 2, y / 2
+        return Rect2._ordered(self._min_x - x, self._min_y - y, self._max_x + x, self._max_y + y)
 
     def expanded_left(self, size: float) -> 'Rect2':
-        return Rect2(self.start - Vec2(size,0), self.end)
+        return Rect2._ordered(self._min_x - size, self._min_y, self._max_x, self._max_y)
     
     def expanded_right(self, size: float) -> 'Rect2':
-        return Rect2(self.start, self.end + Vec2(size,0))
+        return Rect2._ordered(self._min_x, self._min_y, self._max_x + size, self._max_y)
 
     def expanded_top(self, size: float) -> 'Rect2':
-        return Rect2(self.start, self.end + Vec2(0,size))
+        return Rect2._ordered(self._min_x, self._min_y, self._max_x, self._max_y + size)
 
     def expanded_bottom(self, size: float) -> 'Rect2':
-        return Rect2(self.start - Vec2(0,size), self.end)
+        return Rect2._ordered(self._min_x, self._min_y - size, self._max_x, self._max_y)
 
     def expanded_top_left(self, size: Vec2) -> 'Rect2':
-        return Rect2(self.start.xy - size, self.end.xy)
+        return self.expanded_start(size)
 
     def expanded_top_right(self, size: Vec2) -> 'Rect2':
-        return Rect2(self.start.xy, self.end.xy + size)
+        return self.expanded_end(size)
 
     def expanded_bottom_left(self, size: Vec2) -> 'Rect2':
-        return Rect2(self.start.xy - size, self.end.xy)
+        return self.expanded_start(size)
 
     def expanded_bottom_right(self, size: Vec2) -> 'Rect2':
-        return Rect2(self.start.xy, self.end.xy + size)
+        return self.expanded_end(size)
+
+class _Rect2Start(Vec2):
+    '''Vec2 reading and writing the start corner of a Rect2 instead of its own floats (see `Rect2.start`)'''
+    __slots__ = ('_rect',)
+
+    @classmethod
+    def _view(cls, rect: Rect2) -> '_Rect2Start':
+        vec = object.__new__(cls)
+        vec._rect = rect
+        return vec
+
+    @classmethod
+    def _make(cls, x: float, y: float) -> Vec2:
+        # Results of operations on a view are independent vectors
+        return Vec2._make(x, y)
+
+    @property
+    def x(self) -> float:
+        return self._rect._min_x
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._rect._min_x = float(value)
+
+    @property
+    def y(self) -> float:
+        return self._rect._min_y
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._rect._min_y = float(value)
+
+    def __reduce__(self):
+        return (Vec2, (self.x, self.y))
+
+class _Rect2End(_Rect2Start):
+    '''Vec2 reading and writing the end corner of a Rect2 (see `Rect2.end`)'''
+    __slots__ = ()
+
+    @property
+    def x(self) -> float:
+        return self._rect._max_x
+
+    @x.setter
+    def x(self, value: float) -> None:
+        self._rect._max_x = float(value)
+
+    @property
+    def y(self) -> float:
+        return self._rect._max_y
+
+    @y.setter
+    def y(self, value: float) -> None:
+        self._rect._max_y = float(value)
+
+class FrozenRect2(Rect2):
+    '''Immutable hashable Rect2 with exact equality, for set members and dict keys (`mutable()` converts back)'''
+    __slots__ = ('_hash',)
+
+    def __init__(self, *args, **kwargs):
+        rect = args[0] if len(args) == 1 and not kwargs and isinstance(args[0], Rect2) else Rect2(*args, **kwargs)
+        self._init(rect._min_x, rect._min_y, rect._max_x, rect._max_y)
+
+    @classmethod
+    def _make(cls, min_x: float, min_y: float, max_x: float, max_y: float) -> 'FrozenRect2':
+        rect = object.__new__(FrozenRect2)
+        rect._init(min_x, min_y, max_x, max_y)
+        return rect
+
+    @classmethod
+    def from_bbox_unchecked(cls, min_x: float, min_y: float, max_x: float, max_y: float) -> 'FrozenRect2':
+        return cls._make(min_x, min_y, max_x, max_y)
+
+    def _init(self, min_x: float, min_y: float, max_x: float, max_y: float) -> None:
+        _set_min_x(self, min_x)
+        _set_min_y(self, min_y)
+        _set_max_x(self, max_x)
+        _set_max_y(self, max_y)
+        _set_rect_hash(self, hash((min_x, min_y, max_x, max_y)))
+
+    @property
+    def start(self) -> FrozenVec2:
+        return FrozenVec2._make(self._min_x, self._min_y)
+
+    @property
+    def end(self) -> FrozenVec2:
+        return FrozenVec2._make(self._max_x, self._max_y)
+
+    def frozen(self) -> 'FrozenRect2':
+        return self
+
+    def mutable(self) -> Rect2:
+        return Rect2.from_bbox_unchecked(self._min_x, self._min_y, self._max_x, self._max_y)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f'FrozenRect2 is immutable, use mutable() to get a Rect2')
+
+    def __setitem__(self, index, value) -> None:
+        raise TypeError(f'FrozenRect2 is immutable, use mutable() to get a Rect2')
+
+    # In-place operators rebind to a new (mutable) Rect2, like the operators they stand for
+    def __iadd__(self, other) -> Rect2:
+        return self + other
+
+    def __isub__(self, other) -> Rect2:
+        return self - other
+
+    def __imul__(self, other) -> Rect2:
+        return self * other
+
+    def __itruediv__(self, other) -> Rect2:
+        return self / other
+
+    def __repr__(self):
+        return f'FrozenRect2({self.start}, {self.end})'
+
+    def __str__(self):
+        return f'FrozenRect2({self.start}, {self.end})'
+
+    def __eq__(self, other):
+        if not isinstance(other, Rect2):
+            return False
+        return self._min_x == other._min_x and self._min_y == other._min_y and self._max_x == other._max_x and self._max_y == other._max_y
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (FrozenRect2._make, (self._min_x, self._min_y, self._max_x, self._max_y))
+
+    def __copy__(self) -> 'FrozenRect2':
+        return self
+
+    def __deepcopy__(self, memo: dict) -> 'FrozenRect2':
+        return self
+
+    def serialize(self):
+        return self.mutable().serialize()
+
+    def serialize_codec(self) -> bytes:
+        return self.mutable().serialize_codec()
+
+    def deserialize(self, data: bytes, buffers: Optional[list] = None, lazy: bool = False) -> 'FrozenRect2':
+        '''Returns a new FrozenRect2 (this one can't change)'''
+        return self.mutable().deserialize(data, buffers, lazy).frozen()
+
+# Slot setters bypassing FrozenRect2.__setattr__
+_set_min_x, _set_min_y, _set_max_x, _set_max_y = (getattr(Rect2, name).__set__ for name in Rect2.__slots__)
+_set_rect_hash = FrozenRect2._hash.__set__
 
 @dataclass
 class DEPRECATED_RECT(Serializable):
@@ -993,4 +2217,595 @@ class GRect(DEPRECATED_RECT):
     def colored(self, color: tuple):
         return GRect(self.x, self.y, self.width, self.height, color, self.filled, self.visible)
 
-   
\ No newline at end of file
+class Rect2Array:
+    '''Batch of N rectangles stored as one (N, 4) float array of bboxes, with (N, M) pairwise queries'''
+
+    @overload
+    def __init__(self, rects: Sequence[Rect2]): ...
+    @overload
+    def __init__(self, rects: Sequence[DEPRECATED_RECT]): ...
+    @overload
+    def __init__(self, bboxes: ArrayLike): ...
+    @overload
+    def __init__(self, other: 'Rect2Array'): ...
+    def __init__(self, rects: Union['Rect2Array', Sequence[Rect2], Sequence[DEPRECATED_RECT], ArrayLike]):
+        self.values = _as_bboxes(rects).copy()
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> 'Rect2Array':
+        '''Builds an array around `values` without copying or validating it'''
+        array = cls.__new__(cls)
+        array.values = values
+        return array
+
+    @classmethod
+    def from_rects(cls, rects: Sequence[Rect2]) -> 'Rect2Array':
+        return cls(list(rects))
+
+    @classmethod
+    def from_deprecated_rects(cls, rects: Sequence[DEPRECATED_RECT]) -> 'Rect2Array':
+        return cls(list(rects))
+
+    def to_rects(self) -> list[Rect2]:
+        return [Rect2._ordered(*bbox) for bbox in self.values.tolist()]
+
+    def to_deprecated_rects(self, rect_type: type = DEPRECATED_RECT) -> list[DEPRECATED_RECT]:
+        '''Converts to `rect_type` (DEPRECATED_RECT or a subclass such as GRect), which truncates coordinates to ints'''
+        return [rect_type.from_bbox(bbox) for bbox in self.values.tolist()]
+
+    @property
+    def start(self) -> Vec2Array:
+        return Vec2Array._wrap(self.values[:, :2])
+
+    @property
+    def end(self) -> Vec2Array:
+        return Vec2Array._wrap(self.values[:, 2:])
+
+    @property
+    def width(self) -> np.ndarray:
+        return self.values[:, 2] - self.values[:, 0]
+
+    @property
+    def height(self) -> np.ndarray:
+        return self.values[:, 3] - self.values[:, 1]
+
+    @property
+    def size(self) -> Vec2Array:
+        return Vec2Array._wrap(self.values[:, 2:] - self.values[:, :2])
+
+    @property
+    def center(self) -> Vec2Array:
+        return Vec2Array._wrap((self.values[:, :2] + self.values[:, 2:]) / 2)
+
+    @property
+    def area(self) -> np.ndarray:
+        return self.width * self.height
+
+    def intersects_matrix(self, other: Union['Rect2Array', Rect2, Sequence[Rect2], ArrayLike]) -> np.ndarray:
+        '''(N, M) bool matrix with the result of Rect2.intersects for every pair'''
+        a = self.values[:, np.newaxis, :]
+        b = _as_bboxes(other)[np.newaxis, :, :]
+        return (a[..., 0] <= b[..., 2]) & (a[..., 2] >= b[..., 0]) & (a[..., 1] <= b[..., 3]) & (a[..., 3] >= b[..., 1])
+
+    def contains_points(self, points: Union[Vec2Array, Vec2, Sequence[Vec2], ArrayLike]) -> np.ndarray:
+        '''(N, M) bool matrix with the result of `point in rect` for every rect and point'''
+        if isinstance(points, Vec2):
+            points = [points]
+        points = points.values if isinstance(points, Vec2Array) else Vec2Array(points).values
+        x = points[np.newaxis, :, 0]
+        y = points[np.newaxis, :, 1]
+        bboxes = self.values
+        return (bboxes[:, 0:1] <= x) & (x <= bboxes[:, 2:3]) & (bboxes[:, 1:2] <= y) & (y <= bboxes[:, 3:4])
+
+    def intersection_area(self, other: Union['Rect2Array', Rect2, Sequence[Rect2], ArrayLike]) -> np.ndarray:
+        '''(N, M) matrix with the overlapping area of every pair (0 when they don't overlap)'''
+        a = self.values[:, np.newaxis, :]
+        b = _as_bboxes(other)[np.newaxis, :, :]
+        width = np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0])
+        height = np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1])
+        return np.clip(width, 0, None) * np.clip(height, 0, None)
+
+    def iou_matrix(self, other: Union['Rect2Array', Rect2, Sequence[Rect2], ArrayLike]) -> np.ndarray:
+        '''(N, M) matrix with the intersection over union of every pair (0 when both areas are 0)'''
+        other = _as_bboxes(other)
+        intersection = self.intersection_area(other)
+        other_area = (other[:, 2] - other[:, 0]) * (other[:, 3] - other[:, 1])
+        union = self.area[:, np.newaxis] + other_area[np.newaxis, :] - intersection
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    def union_bbox(self) -> Rect2:
+        '''Smallest Rect2 containing every rect'''
+        if len(self) == 0:
+            raise ValueError('Rect2Array.union_bbox() of an empty array')
+        return Rect2._ordered(*self.values[:, :2].min(axis=0).tolist(), *self.values[:, 2:].max(axis=0).tolist())
+
+    def clip_to(self, rect: Rect2) -> 'Rect2Array':
+        '''Clamps every rect to `rect`; rects fully outside of it collapse to zero width/height on its border'''
+        if not isinstance(rect, Rect2):
+            raise TypeError(f'Rect2Array can only be clipped to a Rect2, got {type(rect)}')
+        low = np.array([rect.start.x, rect.start.y, rect.start.x, rect.start.y])
+        high = np.array([rect.end.x, rect.end.y, rect.end.x, rect.end.y])
+        return Rect2Array._wrap(np.clip(self.values, low, high))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[Rect2]:
+        yield from self.to_rects()
+
+    def __repr__(self) -> str:
+        return f'Rect2Array({self.values.tolist()})'
+
+    def __str__(self) -> str:
+        return f'Rect2Array({self.values.tolist()})'
+
+    def __eq__(self, other: 'Rect2Array') -> bool:
+        if isinstance(other, Rect2Array):
+            return self.values.shape == other.values.shape and np.allclose(self.values, other.values)
+        return False
+
+    def __ne__(self, other: 'Rect2Array') -> bool:
+        return not self.__eq__(other)
+
+    def __getstate__(self) -> dict:
+        return {'values': self.values.tolist()}
+
+    def __setstate__(self, state: dict) -> None:
+        self.values = np.array(state['values'], dtype=float).reshape(-1, 4)
+
+    def __reduce_ex__(self, protocol: int):
+        # Out-of-band values array from protocol 5, like VecNArray
+        if protocol >= 5:
+            return (Rect2Array._wrap, (self.values,))
+        return super().__reduce_ex__(protocol)
+
+    def __copy__(self) -> 'Rect2Array':
+        return Rect2Array._wrap(self.values.copy())
+
+    def __deepcopy__(self, memo: dict) -> 'Rect2Array':
+        return Rect2Array._wrap(self.values.copy())
+
+    @overload
+    def __getitem__(self, index: int) -> Rect2: ...
+    @overload
+    def __getitem__(self, index: Union[slice, np.ndarray, list]) -> 'Rect2Array': ...
+    def __getitem__(self, index: Union[int, slice, np.ndarray, list]) -> Union[Rect2, 'Rect2Array']:
+        if isinstance(index, (int, np.integer)):
+            return Rect2._ordered(*self.values[index].tolist())
+        return Rect2Array._wrap(self.values[index])
+
+    def __setitem__(self, index: Union[int, slice, np.ndarray, list], value: Union[Rect2, 'Rect2Array', DEPRECATED_RECT, ArrayLike]) -> None:
+        self.values[index] = _as_bboxes(value)
+
+def _as_bboxes(rects: Union[Rect2Array, Rect2, DEPRECATED_RECT, Sequence[Rect2], Sequence[DEPRECATED_RECT], ArrayLike]) -> np.ndarray:
+    '''Converts rects (or raw bboxes) to an (N, 4) float array, without copying when possible'''
+    if isinstance(rects, Rect2Array):
+        return rects.values
+    if isinstance(rects, (Rect2, DEPRECATED_RECT)):
+        rects = [rects]
+    if isinstance(rects, (list, tuple)):
+        rects = [rect.tuple_bbox if isinstance(rect, Rect2) else rect.to_bbox() if isinstance(rect, DEPRECATED_RECT) else rect for rect in rects]
+    if len(rects) == 0:
+        return np.empty((0, 4), dtype=float)
+    bboxes = np.asarray(rects, dtype=float)
+    if bboxes.ndim == 1:
+        bboxes = bboxes[np.newaxis, :]
+    if bboxes.ndim != 2 or bboxes.shape[1] != 4:
+        raise ValueError(f'Rect2Array must be initialized with (N, 4) bboxes, got shape {bboxes.shape}')
+    return bboxes
+
+
+class Affine2:
+    '''Immutable 2D affine transform (3x3 matrix); `a @ b` applies `b` then `a`, `apply` maps vectors, rects, polygons and arrays'''
+    __slots__ = ('_matrix', '_coefficients', '_inverse')
+
+    def __init__(self, matrix: Optional[ArrayLike] = None):
+        matrix = np.eye(3) if matrix is None else np.array(matrix, dtype=float)
+        if matrix.shape == (2, 3):
+            matrix = np.vstack([matrix, [0, 0, 1]])
+        if matrix.shape != (3, 3):
+            raise ValueError(f'Affine2 must be initialized with a (3, 3) or (2, 3) matrix, got shape {matrix.shape}')
+        if not np.allclose(matrix[2], [0, 0, 1]):
+            raise ValueError(f'Affine2 last row must be (0, 0, 1), got {matrix[2].tolist()}')
+        matrix[2] = (0, 0, 1)
+        matrix.flags.writeable = False
+        self._matrix = matrix
+        # a, b, c, d, e, f of x' = a * x + b * y + c, y' = d * x + e * y + f (scalar fast path)
+        self._coefficients = tuple(matrix[:2].ravel().tolist())
+        self._inverse: Optional[Affine2] = None
+
+    @classmethod
+    def identity(cls) -> 'Affine2':
+        return cls()
+
+    @classmethod
+    def translation(cls, offset: Union[Vec2, Number], y: Optional[Number] = None) -> 'Affine2':
+        x, y = (offset.x, offset.y) if isinstance(offset, Vec2) else (offset, y)
+        return cls([[1, 0, x], [0, 1, y], [0, 0, 1]])
+
+    @classmethod
+    def scaling(cls, scale: Union[Vec2, Number], y: Optional[Number] = None) -> 'Affine2':
+        '''Scales around the origin, by the same factor on both axes when only a number is given'''
+        x, y = (scale.x, scale.y) if isinstance(scale, Vec2) else (scale, scale if y is None else y)
+        return cls([[x, 0, 0], [0, y, 0], [0, 0, 1]])
+
+    @classmethod
+    def rotation(cls, angle: float, center: Optional[Vec2] = None) -> 'Affine2':
+        '''Rotates by `angle` radians around `center` (the origin by default)'''
+        cos, sin = math.cos(angle), math.sin(angle)
+        rotation = cls([[cos, -sin, 0], [sin, cos, 0], [0, 0, 1]])
+        if center is None:
+            return rotation
+        return cls.translation(center) @ rotation @ cls.translation(-center.x, -center.y)
+
+    @classmethod
+    def from_rects(cls, source: Rect2, target: Rect2) -> 'Affine2':
+        '''Maps `source` onto `target` (scale and translation), e.g. downscaled image rect to capture rect on screen'''
+        scale_x = target.width / source.width
+        scale_y = target.height / source.height
+        return cls([[scale_x, 0, target.start.x - source.start.x * scale_x], [0, scale_y, target.start.y - source.start.y * scale_y], [0, 0, 1]])
+
+    @property
+    def matrix(self) -> np.ndarray:
+        '''Read-only 3x3 matrix'''
+        return self._matrix
+
+    @property
+    def inverse(self) -> 'Affine2':
+        if self._inverse is None:
+            a, b, _, d, e, _ = self._coefficients
+            if a * e - b * d == 0:
+                raise ValueError(f'{self} is not invertible')
+            self._inverse = Affine2(np.linalg.inv(self._matrix))
+            self._inverse._inverse = self
+        return self._inverse
+
+    @property
+    def is_axis_aligned(self) -> bool:
+        '''Whether the transform only scales and translates (rects then map exactly to rects)'''
+        return self._coefficients[1] == 0 and self._coefficients[3] == 0
+
+    def then(self, other: 'Affine2') -> 'Affine2':
+        '''Applies this transform, then `other` (same as `other @ self`, reads in chain order)'''
+        return other @ self
+
+    def __matmul__(self, other: 'Affine2') -> 'Affine2':
+        if not isinstance(other, Affine2):
+            return NotImplemented
+        return Affine2(self._matrix @ other._matrix)
+
+    @overload
+    def apply(self, target: Vec2) -> Vec2: ...
+    @overload
+    def apply(self, target: Rect2) -> Rect2: ...
+    @overload
+    def apply(self, target: DEPRECATED_RECT) -> DEPRECATED_RECT: ...
+    @overload
+    def apply(self, target: Vec2Array) -> Vec2Array: ...
+    @overload
+    def apply(self, target: Rect2Array) -> Rect2Array: ...
+    @overload
+    def apply(self, target: np.ndarray) -> np.ndarray: ...
+    @overload
+    def apply(self, target: 'Polygon2') -> 'Polygon2': ...
+    def apply(self, target: Union[Vec2, Rect2, DEPRECATED_RECT, Vec2Array, Rect2Array, np.ndarray, 'Polygon2']) -> Union[Vec2, Rect2, DEPRECATED_RECT, Vec2Array, Rect2Array, np.ndarray, 'Polygon2']:
+        if isinstance(target, Vec2):
+            a, b, c, d, e, f = self._coefficients
+            return Vec2._make(a * target.x + b * target.y + c, d * target.x + e * target.y + f)
+        if isinstance(target, Rect2):
+            return Rect2.from_bbox_unchecked(*self._apply_bboxes(np.array([target.tuple_bbox]))[0].tolist())
+        if isinstance(target, DEPRECATED_RECT):
+            return type(target).from_bbox(self._apply_bboxes(np.array([target.to_bbox()], dtype=float))[0].tolist())
+        if isinstance(target, Vec2Array):
+            return Vec2Array._wrap(self._apply_points(target.values))
+        if isinstance(target, Rect2Array):
+            return Rect2Array._wrap(self._apply_bboxes(target.values))
+        if isinstance(target, np.ndarray):
+            if target.ndim != 2 or target.shape[1] != 2:
+                raise ValueError(f'Affine2 can only be applied to (N, 2) point arrays, got shape {target.shape}')
+            return self._apply_points(target)
+        if isinstance(target, Polygon2):
+            return Polygon2(self._apply_points(target.values))
+        raise TypeError(f'Affine2 can not be applied to {type(target)}')
+
+    def __call__(self, target):
+        return self.apply(target)
+
+    def _apply_points(self, points: np.ndarray) -> np.ndarray:
+        return points @ self._matrix[:2, :2].T + self._matrix[:2, 2]
+
+    def _apply_bboxes(self, bboxes: np.ndarray) -> np.ndarray:
+        '''(N, 4) bboxes of the transformed (N, 4) bboxes'''
+        if self.is_axis_aligned:
+            a, _, c, _, e, f = self._coefficients
+            transformed = bboxes * (a, e, a, e) + (c, f, c, f)
+            # Negative scales swap min and max
+            return np.concatenate([np.minimum(transformed[:, :2], transformed[:, 2:]), np.maximum(transformed[:, :2], transformed[:, 2:])], axis=1)
+        corners = bboxes[:, [[0, 1], [2, 1], [0, 3], [2, 3]]] # (N, 4 corners, 2)
+        transformed = corners @ self._matrix[:2, :2].T + self._matrix[:2, 2]
+        return np.concatenate([transformed.min(axis=1), transformed.max(axis=1)], axis=1)
+
+    def __repr__(self) -> str:
+        return f'Affine2({self._matrix[:2].tolist()})'
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __eq__(self, other: 'Affine2') -> bool:
+        if isinstance(other, Affine2):
+            return np.allclose(self._matrix, other._matrix, rtol=ALLCLOSE_RTOL, atol=ALLCLOSE_ATOL)
+        return False
+
+    def __ne__(self, other: 'Affine2') -> bool:
+        return not self.__eq__(other)
+
+    # Equality is approximate, like Vec2
+    __hash__ = None
+
+    def __getstate__(self) -> dict:
+        return {'matrix': self._matrix.tolist()}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['matrix'])
+
+    def __copy__(self) -> 'Affine2':
+        return self # Immutable
+
+    def __deepcopy__(self, memo: dict) -> 'Affine2':
+        return self
+
+
+class CoordinateSpaces:
+    '''Named coordinate spaces linked by Affine2 transforms, with the transforms between them cached'''
+
+    def __init__(self, root: str = 'screen'):
+        self.root = root
+        self._parents: dict[str, tuple[str, Affine2]] = {}
+        self._cache: dict[tuple[str, str], Affine2] = {}
+
+    def __contains__(self, space: str) -> bool:
+        return space == self.root or space in self._parents
+
+    def define(self, space: str, parent: str, to_parent: Affine2) -> None:
+        '''Defines (or moves) `space`, whose coordinates `to_parent` maps to `parent` coordinates'''
+        if space == self.root:
+            raise ValueError(f'Cannot redefine the root space {self.root!r}')
+        if parent not in self:
+            raise KeyError(f'Unknown coordinate space {parent!r}')
+        ancestor = parent
+        while ancestor != self.root:
+            if ancestor == space:
+                raise ValueError(f'Defining {space!r} relative to {parent!r} would create a cycle')
+            ancestor = self._parents[ancestor][0]
+        self._parents[space] = (parent, to_parent)
+        self._cache.clear()
+
+    def transform(self, source: str, target: str) -> Affine2:
+        '''Transform mapping `source` coordinates to `target` coordinates'''
+        key = (source, target)
+        transform = self._cache.get(key)
+        if transform is None:
+            transform = self._to_root(target).inverse @ self._to_root(source)
+            self._cache[key] = transform
+        return transform
+
+    def _to_root(self, space: str) -> Affine2:
+        key = (space, self.root)
+        transform = self._cache.get(key)
+        if transform is None:
+            if space not in self:
+                raise KeyError(f'Unknown coordinate space {space!r}')
+            transform = Affine2()
+            while space != self.root:
+                space, to_parent = self._parents[space]
+                transform = to_parent @ transform
+            self._cache[key] = transform
+        return transform
+
+
+POLYGON_PAIRS_CHUNK = 1 << 22 # (edge, point) pairs tested at once by Polygon2.contains_points
+
+def _as_points(points: Union[VecNArray, Sequence[Vec2], ArrayLike]) -> np.ndarray:
+    '''Converts points to an (N, 2) float array, without copying when possible'''
+    if isinstance(points, VecNArray):
+        points = points.values
+    elif isinstance(points, (list, tuple)) and len(points) > 0 and isinstance(points[0], Vec2):
+        points = [(point.x, point.y) for point in points]
+    if len(points) == 0:
+        return np.empty((0, 2), dtype=float)
+    values = np.asarray(points, dtype=float)
+    if values.ndim != 2 or values.shape[1] != 2:
+        raise ValueError(f'Points must be an (N, 2) array, got shape {values.shape}')
+    return values
+
+def _segment_distances(points: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    '''Distance of each of the (N, 2) `points` to the segment from `a` to `b`'''
+    direction = b - a
+    length = direction.dot(direction)
+    t = np.zeros(len(points)) if length == 0 else np.clip((points - a) @ direction / length, 0, 1)
+    return np.hypot(*(points - a - t[:, np.newaxis] * direction).T)
+
+def _cross(o: tuple, a: tuple, b: tuple) -> float:
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+class Polygon2:
+    '''Immutable polygon given by its vertices in order (either winding), with vectorized even-odd point-in-polygon tests'''
+    __slots__ = ('_values', '_bbox', '_edges')
+
+    def __init__(self, vertices: Union[Vec2Array, Sequence[Vec2], ArrayLike]):
+        self._set_values(np.array(_as_points(vertices), dtype=float))
+
+    @classmethod
+    def _wrap(cls, values: np.ndarray) -> 'Polygon2':
+        '''Builds a polygon around an (N, 2) float array without copying it (the array is made read-only)'''
+        polygon = cls.__new__(cls)
+        polygon._set_values(values)
+        return polygon
+
+    def _set_values(self, values: np.ndarray) -> None:
+        if len(values) < 3:
+            raise ValueError(f'Polygon2 needs at least 3 vertices, got {len(values)}')
+        values.flags.writeable = False
+        self._values = values
+        self._bbox = (*values.min(axis=0).tolist(), *values.max(axis=0).tolist())
+
+        # Non-horizontal edges: y range [y0, y1), x at y0 and dx / dy
+        start, end = values, np.roll(values, -1, axis=0)
+        lower = np.where((start[:, 1] < end[:, 1])[:, np.newaxis], start, end)
+        upper = np.where((start[:, 1] < end[:, 1])[:, np.newaxis], end, start)
+        sloped = lower[:, 1] != upper[:, 1]
+        lower, upper = lower[sloped], upper[sloped]
+        self._edges = (lower[:, 1], upper[:, 1], lower[:, 0], (upper[:, 0] - lower[:, 0]) / (upper[:, 1] - lower[:, 1]))
+
+    @classmethod
+    def from_rect(cls, rect: Rect2) -> 'Polygon2':
+        min_x, min_y, max_x, max_y = rect.tuple_bbox
+        return cls([(min_x, min_y), (max_x, min_y), (max_x, max_y), (min_x, max_y)])
+
+    @property
+    def values(self) -> np.ndarray:
+        '''(N, 2) vertices (read-only)'''
+        return self._values
+
+    @property
+    def vertices(self) -> Vec2Array:
+        return Vec2Array._wrap(self._values)
+
+    @property
+    def signed_area(self) -> float:
+        '''Shoelace area: positive when the vertices go counter-clockwise with y up (clockwise on screen, y down)'''
+        x, y = self._values.T
+        return float(x.dot(np.roll(y, -1)) - y.dot(np.roll(x, -1))) / 2
+
+    @property
+    def area(self) -> float:
+        return abs(self.signed_area)
+
+    @property
+    def bounding_rect(self) -> Rect2:
+        return Rect2.from_bbox_unchecked(*self._bbox)
+
+    def contains(self, point: Vec2) -> bool:
+        x, y = point.x, point.y
+        min_x, min_y, max_x, max_y = self._bbox
+        if not (min_x <= x <= max_x and min_y <= y <= max_y):
+            return False
+        y0, y1, x0, slope = self._edges
+        crossed = (y0 <= y) & (y < y1)
+        return np.count_nonzero(x < x0[crossed] + (y - y0[crossed]) * slope[crossed]) % 2 == 1
+
+    def __contains__(self, point: Vec2) -> bool:
+        return self.contains(point)
+
+    def contains_points(self, points: Union[Vec2Array, Sequence[Vec2], ArrayLike]) -> np.ndarray:
+        '''(N,) bool array, True for the points inside the polygon'''
+        points = _as_points(points)
+        inside = np.zeros(len(points), dtype=bool)
+        min_x, min_y, max_x, max_y = self._bbox
+        x, y = points[:, 0], points[:, 1]
+        candidates = np.flatnonzero((x >= min_x) & (x <= max_x) & (y >= min_y) & (y <= max_y))
+        if len(candidates) == 0:
+            return inside
+        x, y = x[candidates], y[candidates]
+
+        order = np.argsort(y, kind='stable')
+        sorted_y = y[order]
+        y0, y1, x0, slope = self._edges
+        firsts = np.searchsorted(sorted_y, y0, side='left')
+        counts = np.searchsorted(sorted_y, y1, side='left') - firsts
+        ends = np.cumsum(counts)
+
+        crossings = np.zeros(len(candidates), dtype=np.intp)
+        start = 0
+        while start < len(counts):
+            # Enough edges for about POLYGON_PAIRS_CHUNK (edge, point) pairs, at least one
+            done = ends[start - 1] if start > 0 else 0
+            stop = max(start + 1, int(np.searchsorted(ends, done + POLYGON_PAIRS_CHUNK, side='right')))
+            chunk_counts = counts[start:stop]
+            edges = np.repeat(np.arange(start, stop), chunk_counts)
+            ranks = np.arange(len(edges)) - np.repeat(ends[start:stop] - done - chunk_counts, chunk_counts)
+            pair_points = order[firsts[edges] + ranks]
+            crossed = x[pair_points] < x0[edges] + (y[pair_points] - y0[edges]) * slope[edges]
+            crossings += np.bincount(pair_points[crossed], minlength=len(candidates))
+            start = stop
+
+        inside[candidates] = crossings % 2 == 1
+        return inside
+
+    def convex_hull(self) -> 'Polygon2':
+        '''Smallest convex polygon containing this one, counter-clockwise with y up (zero-area for collinear vertices)'''
+        points = [tuple(point) for point in np.unique(self._values, axis=0).tolist()] # Sorted by x, then y
+        lower, upper = [], []
+        for point in points:
+            while len(lower) >= 2 and _cross(lower[-2], lower[-1], point) <= 0:
+                lower.pop()
+            lower.append(point)
+        for point in reversed(points):
+            while len(upper) >= 2 and _cross(upper[-2], upper[-1], point) <= 0:
+                upper.pop()
+            upper.append(point)
+        hull = lower[:-1] + upper[:-1]
+        if len(hull) < 3:
+            hull = [points[0], points[-1], points[0]]
+        return Polygon2(hull)
+
+    def simplified(self, tolerance: float) -> 'Polygon2':
+        '''Polygon keeping only the vertices farther than `tolerance` from the new outline (Ramer-Douglas-Peucker)'''
+        values = self._values
+        count = len(values)
+        # Vertex 0, the farthest one from it and the farthest one from their segment are always kept
+        farthest = int(np.argmax(np.sum((values - values[0]) ** 2, axis=1)))
+        third = int(np.argmax(_segment_distances(values, values[0], values[farthest])))
+        anchors = sorted({0, farthest, third})
+        keep = np.zeros(count, dtype=bool)
+        keep[anchors] = True
+
+        # Sections of the ring as (first, last) vertex positions, possibly past `count` to wrap around
+        sections = [(first, last) for first, last in zip(anchors, anchors[1:] + [anchors[0] + count])]
+        while sections:
+            first, last = sections.pop()
+            if last - first < 2:
+                continue
+            between = np.arange(first + 1, last) % count
+            distances = _segment_distances(values[between], values[first % count], values[last % count])
+            index = int(np.argmax(distances))
+            if distances[index] > tolerance:
+                keep[between[index]] = True
+                sections.append((first, first + 1 + index))
+                sections.append((first + 1 + index, last))
+        return Polygon2(values[keep])
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f'Polygon2({self._values.tolist()})'
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __eq__(self, other: 'Polygon2') -> bool:
+        if isinstance(other, Polygon2):
+            return self._values.shape == other._values.shape and np.allclose(self._values, other._values, rtol=ALLCLOSE_RTOL, atol=ALLCLOSE_ATOL)
+        return False
+
+    def __ne__(self, other: 'Polygon2') -> bool:
+        return not self.__eq__(other)
+
+    def __getstate__(self) -> dict:
+        return {'vertices': self._values.tolist()}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['vertices'])
+
+    def __reduce_ex__(self, protocol: int):
+        # Out-of-band vertex array from protocol 5
+        if protocol >= 5:
+            return (Polygon2._wrap, (self._values,))
+        return super().__reduce_ex__(protocol)
+
+    def __copy__(self) -> 'Polygon2':
+        return self # Immutable
+
+    def __deepcopy__(self, memo: dict) -> 'Polygon2':
+        return self
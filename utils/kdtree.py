@@ -0,0 +1,234 @@
+import heapq
+import math
+from typing import Sequence, Union
+
+import numpy as np
+
+from utils.geometry import ArrayLike, Number, VecN, VecNArray
+
+Points = Union[VecNArray, Sequence[VecN], ArrayLike]
+
+# Query points searched at once by the batched queries
+QUERY_CHUNK_SIZE = 4096
+
+
+def _as_values(points: Points) -> np.ndarray:
+    if isinstance(points, VecNArray):
+        return points.values
+    if isinstance(points, VecN):
+        return points.values[np.newaxis]
+    return VecNArray(points).values
+
+
+def _squared_bbox_distances(queries: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    '''Row-wise squared distance from each query to the closest point of a bbox (0 when inside)'''
+    offsets = np.maximum(np.maximum(lower - queries, queries - upper), 0)
+    return np.einsum('ij,ij->i', offsets, offsets)
+
+
+class KDTree:
+    '''Static KD-tree over a set of Vec2/Vec3 (or any (N, D) points) for nearest, k-nearest and radius queries'''
+
+    def __init__(self, points: Points = (), leaf_size: int = 16):
+        if leaf_size < 1:
+            raise ValueError(f'leaf_size must be positive, got {leaf_size}')
+        self.leaf_size = leaf_size
+        self.rebuild(points)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    @property
+    def points(self) -> np.ndarray:
+        '''(N, D) points, in their original order'''
+        return self._points
+
+    @property
+    def dimension(self) -> int:
+        return self._points.shape[1]
+
+    def rebuild(self, points: Points) -> None:
+        '''Replaces the indexed points (e.g. once per frame for moving objects); O(N log N)'''
+        values = np.array(_as_values(points), dtype=float)
+        count = len(values)
+        self._points = values
+        self._depth = math.ceil(math.log2(count / self.leaf_size)) if count > self.leaf_size else 0
+
+        orders = [np.argsort(values[:, axis], kind='stable') for axis in range(values.shape[1])]
+        positions = np.arange(count)
+        is_left = np.empty(count, dtype=bool)
+        for level in range(self._depth):
+            starts = self._starts(level)
+            middles = self._starts(level + 1)[1::2]
+            sizes = np.diff(starts)
+            node_starts, node_middles = np.repeat(starts[:-1], sizes), np.repeat(middles, sizes)
+            spans = np.stack([values[order[starts[1:] - 1], axis] - values[order[starts[:-1]], axis] for axis, order in enumerate(orders)], axis=1)
+            split_axes = np.repeat(np.argmax(spans, axis=1), sizes)
+            for axis, order in enumerate(orders):
+                splits_here = split_axes == axis
+                is_left[order[splits_here]] = positions[splits_here] < node_middles[splits_here]
+            for axis, order in enumerate(orders):
+                left = is_left[order]
+                lefts_before = np.cumsum(left) - left
+                left_ranks = lefts_before - lefts_before[node_starts]
+                moved = np.where(left, node_starts + left_ranks, node_middles + (positions - node_starts - left_ranks))
+                orders[axis] = np.empty_like(order)
+                orders[axis][moved] = order
+        order = orders[0] if orders else positions
+
+        self._indices = order
+        self._values = values[order]
+
+        # Leaf bboxes, then each parent's as the union of its two children (node i has children 2i + 1 and 2i + 2)
+        node_count = 2 ** (self._depth + 1) - 1
+        self._lower = np.empty((node_count, values.shape[1]))
+        self._upper = np.empty((node_count, values.shape[1]))
+        if count == 0:
+            return
+        first = 2 ** self._depth - 1
+        leaf_starts = self._starts(self._depth)[:-1]
+        self._lower[first:] = np.minimum.reduceat(self._values, leaf_starts, axis=0)
+        self._upper[first:] = np.maximum.reduceat(self._values, leaf_starts, axis=0)
+        for level in reversed(range(self._depth)):
+            first, width = 2 ** level - 1, 2 ** level
+            children = slice(2 * first + 1, 2 * first + 1 + 2 * width)
+            self._lower[first:first + width] = self._lower[children].reshape(width, 2, -1).min(axis=1)
+            self._upper[first:first + width] = self._upper[children].reshape(width, 2, -1).max(axis=1)
+        self._node_bboxes = list(zip(self._lower.tolist(), self._upper.tolist()))
+        self._leaf_starts = self._starts(self._depth).tolist()
+
+    def nearest(self, point: VecN) -> int:
+        '''Index of the point closest to `point`'''
+        if len(self) == 0:
+            raise ValueError('Cannot query an empty KDTree')
+        return int(self._indices[self._closest(point.values, 1)[0]])
+
+    def k_nearest(self, point: VecN, k: int) -> list[int]:
+        '''Indices of the (up to) `k` points closest to `point`, closest first'''
+        if k <= 0 or len(self) == 0:
+            return []
+        return self._indices[self._closest(point.values, k)].tolist()
+
+    def within_radius(self, point: VecN, radius: Number) -> list[int]:
+        '''Indices of every point at most `radius` away from `point`, closest first'''
+        return self.query_radius(point, radius)[0].tolist()
+
+    def query(self, points: Points, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        '''Batched k-nearest: (Q, k) distances and indices, closest first (inf and -1 past the number of points)'''
+        queries = self._queries(points)
+        if k < 1:
+            raise ValueError(f'k must be positive, got {k}')
+        distances = np.full((len(queries), k), np.inf)
+        indices = np.full((len(queries), k), -1)
+        if len(self) == 0:
+            return distances, indices
+
+        for chunk in range(0, len(queries), QUERY_CHUNK_SIZE):
+            chunk_queries = queries[chunk:chunk + QUERY_CHUNK_SIZE]
+            bounds = self._k_bounds(chunk_queries, min(k, len(self)))
+            query_ids, positions, squared = self._search(chunk_queries, bounds)
+            order = np.lexsort((squared, query_ids))
+            query_ids, positions, squared = query_ids[order], positions[order], squared[order]
+            ranks = np.arange(len(query_ids)) - np.searchsorted(query_ids, query_ids)
+            kept = ranks < k
+            rows = chunk + query_ids[kept]
+            distances[rows, ranks[kept]] = np.sqrt(squared[kept])
+            indices[rows, ranks[kept]] = self._indices[positions[kept]]
+        return distances, indices
+
+    def query_radius(self, points: Points, radius: Union[Number, ArrayLike]) -> list[np.ndarray]:
+        '''Batched radius search: indices of the points at most `radius` (shared or per query) away, closest first'''
+        queries = self._queries(points)
+        radii = np.broadcast_to(np.asarray(radius, dtype=float), (len(queries),))
+        if len(self) == 0:
+            return [np.empty(0, dtype=int) for _ in queries]
+
+        result = []
+        for chunk in range(0, len(queries), QUERY_CHUNK_SIZE):
+            chunk_queries = queries[chunk:chunk + QUERY_CHUNK_SIZE]
+            chunk_radii = radii[chunk:chunk + QUERY_CHUNK_SIZE]
+            query_ids, positions, squared = self._search(chunk_queries, chunk_radii * chunk_radii)
+            order = np.lexsort((squared, query_ids))
+            splits = np.searchsorted(query_ids[order], np.arange(1, len(chunk_queries)))
+            result.extend(np.split(self._indices[positions[order]], splits))
+        return result
+
+    def _closest(self, query: np.ndarray, k: int) -> list[int]:
+        '''Sorted positions of the k points closest to a single query, visiting nodes best-first by bbox distance'''
+        coordinates = query.tolist()
+        first_leaf = 2 ** self._depth - 1
+        best: list[tuple[float, int]] = [] # max-heap of the k best as (-squared distance, position)
+        pending = [(0.0, 0)]
+        while pending:
+            squared, node = heapq.heappop(pending)
+            if len(best) == k and squared > -best[0][0]:
+                break
+            if node < first_leaf:
+                for child in (2 * node + 1, 2 * node + 2):
+                    lower, upper = self._node_bboxes[child]
+                    child_squared = 0.0
+                    for value, low, high in zip(coordinates, lower, upper):
+                        offset = low - value if value < low else value - high if value > high else 0.0
+                        child_squared += offset * offset
+                    heapq.heappush(pending, (child_squared, child))
+                continue
+
+            start, end = self._leaf_starts[node - first_leaf], self._leaf_starts[node - first_leaf + 1]
+            offsets = self._values[start:end] - query
+            for position, point_squared in enumerate(np.einsum('ij,ij->i', offsets, offsets).tolist(), start):
+                if len(best) < k:
+                    heapq.heappush(best, (-point_squared, position))
+                elif point_squared < -best[0][0]:
+                    heapq.heapreplace(best, (-point_squared, position))
+        return [position for _, position in sorted(best, key=lambda item: (-item[0], item[1]))]
+
+    def _queries(self, points: Points) -> np.ndarray:
+        queries = _as_values(points)
+        if len(self) and len(queries) and queries.shape[1] != self.dimension:
+            raise ValueError(f'Expected {self.dimension}D query points, got {queries.shape[1]}D')
+        return queries
+
+    def _starts(self, level: int) -> np.ndarray:
+        '''Offsets in the sorted points of every node of `level` (plus the end), nodes differ in size by at most one'''
+        return (np.arange(2 ** level + 1) * len(self._points)) >> level
+
+    def _node_points(self, queries: np.ndarray, level: int, nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        '''Squared distances from each query to every point of its node, padded with inf; plus the point positions'''
+        starts = self._starts(level)
+        local = nodes - (2 ** level - 1)
+        width = int(np.max(np.diff(starts)))
+        positions = starts[local, np.newaxis] + np.arange(width)
+        valid = positions < starts[local + 1, np.newaxis]
+        positions = np.minimum(positions, len(self._values) - 1)
+        offsets = self._values[positions] - queries[:, np.newaxis, :]
+        squared = np.einsum('ijk,ijk->ij', offsets, offsets)
+        squared[~valid] = np.inf
+        return squared, positions
+
+    def _k_bounds(self, queries: np.ndarray, k: int) -> np.ndarray:
+        '''Squared distance to the k-th closest point of the deepest node (holding at least k points) on each query's path'''
+        level = self._depth
+        while len(self._values) >> level < k:
+            level -= 1
+        nodes = np.zeros(len(queries), dtype=int)
+        for _ in range(level):
+            left = 2 * nodes + 1
+            left_distances = _squared_bbox_distances(queries, self._lower[left], self._upper[left])
+            right_distances = _squared_bbox_distances(queries, self._lower[left + 1], self._upper[left + 1])
+            nodes = np.where(right_distances < left_distances, left + 1, left)
+        squared, _ = self._node_points(queries, level, nodes)
+        return np.partition(squared, k - 1, axis=1)[:, k - 1]
+
+    def _search(self, queries: np.ndarray, bounds: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''(query, sorted position, squared distance) of every point within the squared `bounds` of each query'''
+        query_ids = np.arange(len(queries))
+        nodes = np.zeros(len(queries), dtype=int)
+        for _ in range(self._depth):
+            query_ids = np.repeat(query_ids, 2)
+            nodes = (2 * np.repeat(nodes, 2) + 1) + np.tile([0, 1], len(nodes))
+            near = _squared_bbox_distances(queries[query_ids], self._lower[nodes], self._upper[nodes]) <= bounds[query_ids]
+            query_ids, nodes = query_ids[near], nodes[near]
+
+        squared, positions = self._node_points(queries[query_ids], self._depth, nodes)
+        within = squared <= bounds[query_ids, np.newaxis]
+        return np.broadcast_to(query_ids[:, np.newaxis], within.shape)[within], positions[within], squared[within]
@@ -1,9 +1,11 @@
+import atexit
 from dataclasses import dataclass
 import re
 import sys
+import threading
 import time
 import traceback
-from typing import Deque, List, Optional
+from typing import Callable, Deque, Dict, List, Optional, Union
 
 from collections import deque
 
@@ -28,6 +30,18 @@ MESSAGE_LEVEL_COLORS = {
     MessageLevel.TRACE: 'magenta'
 }
 
+# Plain ints for the level checks of the log_* methods
+_OUT, _ERROR, _WARNING, _INFO = MessageLevel.OUT.value, MessageLevel.ERROR.value, MessageLevel.WARNING.value, MessageLevel.INFO.value
+_DEBUG, _TRACE = MessageLevel.DEBUG.value, MessageLevel.TRACE.value
+
+LogText = Union[str, Callable[[], str]] # A message, or a function building it only if the message is logged
+
+class Backpressure(Enum):
+    '''What an asynchronous Logger does with a message when its queue is full'''
+    BLOCK = 'block' # Wait for the writer to make room
+    DROP_OLDEST = 'drop-oldest' # Discard the oldest queued message
+    DROP = 'drop' # Discard the new message
+
 @dataclass
 class Message:
     level: MessageLevel
@@ -38,10 +52,149 @@ class Message:
     def __post_init__(self):
         self.time = time.strftime("%H:%M:%S")
 
+def _text(message: LogText, args: tuple) -> str:
+    if callable(message):
+        message = message()
+    return message % args if args else message
+
+class _AsyncWriter:
+    '''Background thread that formats and prints the messages queued by a Logger, a batch at a time'''
+
+    def __init__(self, logger: 'Logger', queue_size: int, backpressure: Backpressure):
+        if queue_size < 1:
+            raise ValueError(f'queue_size must be positive, got {queue_size}')
+        self.logger = logger
+        self.queue_size = queue_size
+        self.backpressure = backpressure
+        self._queue: Deque[Message] = deque()
+        self._condition = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._unreported_drops = 0
+        self._thread = threading.Thread(target=self._run, name='logger-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, message: Message) -> bool:
+        '''Queues a message, returns False if the writer is closed and the caller has to print it'''
+        with self._condition:
+            if self._closed:
+                return False
+            if len(self._queue) >= self.queue_size:
+                if self.backpressure == Backpressure.BLOCK:
+                    while len(self._queue) >= self.queue_size and not self._closed:
+                        self._condition.wait()
+                    if self._closed:
+                        return False
+                elif self.backpressure == Backpressure.DROP_OLDEST:
+                    self._queue.popleft()
+                    self.logger.dropped_count += 1
+                else:
+                    self.logger.dropped_count += 1
+                    self._unreported_drops += 1
+                    return True
+            self._queue.append(message)
+            if len(self._queue) == 1:
+                self._condition.notify_all()
+        return True
+
+    def flush(self) -> None:
+        '''Waits until every queued message has been printed'''
+        if threading.current_thread() is self._thread:
+            return
+        with self._condition:
+            while (self._queue or self._writing) and self._thread.is_alive():
+                self._condition.wait()
+
+    def close(self) -> None:
+        '''Prints the queued messages and stops the thread'''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                batch = list(self._queue)
+                self._queue.clear()
+                dropped, self._unreported_drops = self._unreported_drops, 0
+                self._writing = True
+                self._condition.notify_all() # Producers waiting for room
+            try:
+                lines = [self.logger._render(message) for message in batch]
+                if dropped:
+                    lines.append(colored(f'[WARNING] <logger> {dropped} message(s) dropped, the log queue was full', MESSAGE_LEVEL_COLORS[MessageLevel.WARNING]))
+                stream = sys.stdout
+                stream.write('\n'.join(lines) + '\n')
+                stream.flush()
+            except Exception:
+                traceback.print_exc()
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
 class Logger:
-    def __init__(self):
+    '''Logs colored messages to stdout, keeping the last 1000 of them in `messages` (printed from a background thread when asynchronous)'''
+
+    def __init__(self, asynchronous: bool = False, queue_size: int = 10000, backpressure: Backpressure = Backpressure.BLOCK,
+                 level: MessageLevel = MessageLevel.TRACE):
         self.messages: Deque[Message] = deque(maxlen=1000)
         self.total_log_count: int = 0
+        self.dropped_count: int = 0 # Messages dropped because the asynchronous queue was full
+        self._level: int = level.value
+        self._category_levels: Dict[Optional[str], int] = {}
+        self._writer: Optional[_AsyncWriter] = None
+        if asynchronous:
+            self.enable_async(queue_size, backpressure)
+
+    @property
+    def level(self) -> MessageLevel:
+        return MessageLevel(self._level)
+
+    def set_level(self, level: MessageLevel, category: Optional[str] = None) -> None:
+        '''Skips the messages more verbose than `level`, in `category` only if given (overriding the logger's level)'''
+        if category is None:
+            self._level = level.value
+        else:
+            self._category_levels[category] = level.value
+
+    def reset_level(self, category: str) -> None:
+        '''Makes `category` follow the logger's level again'''
+        self._category_levels.pop(category, None)
+
+    def is_enabled(self, level: MessageLevel, category: Optional[str] = '') -> bool:
+        '''Whether a message of this level and category would be logged'''
+        return level._value_ <= self._category_levels.get(category, self._level) # _value_ skips the slow Enum.value property
+
+    @property
+    def asynchronous(self) -> bool:
+        return self._writer is not None
+
+    def enable_async(self, queue_size: int = 10000, backpressure: Backpressure = Backpressure.BLOCK) -> None:
+        '''Starts printing messages from a background thread (replacing the current one, if any)'''
+        self.disable_async()
+        self._writer = _AsyncWriter(self, queue_size, backpressure)
+        atexit.register(self.disable_async)
+
+    def disable_async(self) -> None:
+        '''Prints the queued messages, stops the background thread and goes back to printing synchronously'''
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            atexit.unregister(self.disable_async)
+            writer.close()
+
+    def flush(self) -> None:
+        '''Waits until every message logged so far has been printed'''
+        writer = self._writer
+        if writer is not None:
+            writer.flush()
+        sys.stdout.flush()
    
     def _format_message(self, message: Message, show_time: bool = True, show_level: bool = True, show_category: bool = True):
         color = []
@@ -109,29 +262,39 @@ class Logger:
         self.messages.append(message)
 
         if message.level in [MessageLevel.ERROR]:
+            # Needs the caller's frames
             message.message += '\nStacktrace:\n' + self._generate_stack_trace(initial_stack_trace)
 
-        print(colored(self._format_message(message)[0], MESSAGE_LEVEL_COLORS[message.level]))
+        writer = self._writer
+        if writer is None or not writer.put(message):
+            print(self._render(message))
+
+    def _render(self, message: Message) -> str:
+        return colored(self._format_message(message)[0], MESSAGE_LEVEL_COLORS[message.level])
+
+    def log_out(self, message: LogText, category: Optional[str] = '', initial_stack_trace: str = '', args: tuple = ()):
+        if _OUT <= self._category_levels.get(category, self._level):
+            self._log(Message(MessageLevel.OUT, _text(message, args), category), initial_stack_trace)
 
-        pass
+    def log_error(self, message: LogText, category: Optional[str] = '', initial_stack_trace: str = '', args: tuple = ()):
+        if _ERROR <= self._category_levels.get(category, self._level):
+            self._log(Message(MessageLevel.ERROR, _text(message, args), category), initial_stack_trace)
 
-    def log_out(self, message: str, category: Optional[str] = '', initial_stack_trace: str = ''):
-        self._log(Message(MessageLevel.OUT, message, category), initial_stack_trace)
+    def log_warning(self, message: LogText, category: Optional[str] = '', initial_stack_trace: str = '', args: tuple = ()):
+        if _WARNING <= self._category_levels.get(category, self._level):
+            self._log(Message(MessageLevel.WARNING, _text(message, args), category), initial_stack_trace)
 
-    def log_error(self, message: str, category: Optional[str] = '', initial_stack_trace: str = ''):
-        self._log(Message(MessageLevel.ERROR, message, category), initial_stack_trace)
+    def log_info(self, message: LogText, category: Optional[str] = '', initial_stack_trace: str = '', args: tuple = ()):
+        if _INFO <= self._category_levels.get(category, self._level):
+            self._log(Message(MessageLevel.INFO, _text(message, args), category), initial_stack_trace)
 
-    def log_warning(self, message: str, category: Optional[str] = '', initial_stack_trace: str = ''):
-        self._log(Message(MessageLevel.WARNING, message, category), initial_stack_trace)
-    
-    def log_info(self, message: str, category: Optional[str] = '', initial_stack_trace: str = ''):
-        self._log(Message(MessageLevel.INFO, message, category), initial_stack_trace)
+    def log_debug(self, message: LogText, category: Optional[str] = '', initial_stack_trace: str = '', args: tuple = ()):
+        if _DEBUG <= self._category_levels.get(category, self._level):
+            self._log(Message(MessageLevel.DEBUG, _text(message, args), category), initial_stack_trace)
 
-    def log_debug(self, message: str, category: Optional[str] = '', initial_stack_trace: str = ''):
-        self._log(Message(MessageLevel.DEBUG, message, category), initial_stack_trace)
-    
-    def log_trace(self, message: str, category: Optional[str] = '', initial_stack_trace: str = ''):
-        self._log(Message(MessageLevel.TRACE, message, category), initial_stack_trace)
+    def log_trace(self, message: LogText, category: Optional[str] = '', initial_stack_trace: str = '', args: tuple = ()):
+        if _TRACE <= self._category_levels.get(category, self._level):
+            self._log(Message(MessageLevel.TRACE, _text(message, args), category), initial_stack_trace)
 
 if __name__ == "__main__":
    pass
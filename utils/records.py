@@ -0,0 +1,162 @@
+import mmap
+import os
+import struct
+import zlib
+from typing import Callable, Iterator, Optional, Union
+
+import numpy as np
+
+from utils.serialization import Serializable
+
+FILE_MAGIC = b'SRECORDS'
+FOOTER_MAGIC = b'SRINDEX1'
+_FILE_HEADER = struct.Struct('<8sI') # Magic, format version
+_RECORD_HEADER = struct.Struct('<II') # Payload length, payload crc32
+_FOOTER = struct.Struct('<QQI8s') # Index offset, record count, index crc32, magic
+VERSION = 1
+
+
+def _read_index(buffer: Union[mmap.mmap, bytes]) -> tuple[Union[np.ndarray, list[int]], int]:
+    '''Record offsets and end of a record file, from its footer or by scanning it when the writer was not closed'''
+    if len(buffer) < _FILE_HEADER.size:
+        raise ValueError('Not a record file (too short)')
+    magic, version = _FILE_HEADER.unpack_from(buffer, 0)
+    if magic != FILE_MAGIC:
+        raise ValueError('Not a record file')
+    if version != VERSION:
+        raise ValueError(f'Unsupported record file version {version}')
+
+    if len(buffer) >= _FILE_HEADER.size + _FOOTER.size:
+        index_offset, count, index_crc, footer_magic = _FOOTER.unpack_from(buffer, len(buffer) - _FOOTER.size)
+        index_end = index_offset + 8 * count
+        if footer_magic == FOOTER_MAGIC and index_end == len(buffer) - _FOOTER.size and index_offset >= _FILE_HEADER.size:
+            index = np.frombuffer(buffer, '<u8', count, index_offset)
+            if zlib.crc32(index) == index_crc:
+                return index, index_offset
+
+    offsets = []
+    offset = _FILE_HEADER.size
+    while offset + _RECORD_HEADER.size <= len(buffer):
+        length, crc = _RECORD_HEADER.unpack_from(buffer, offset)
+        start = offset + _RECORD_HEADER.size
+        if start + length > len(buffer) or zlib.crc32(memoryview(buffer)[start:start + length]) != crc:
+            break
+        offsets.append(offset)
+        offset = start + length
+    return offsets, offset
+
+
+class RecordWriter:
+    '''Appends length-prefixed, checksummed serialized objects to a record file indexed by a footer on `close()`'''
+
+    def __init__(self, path: Union[str, os.PathLike], sync: bool = False):
+        '''With `sync`, `flush()` (and so `close()`) also waits for the data to reach the disk'''
+        self.path = path
+        self.sync = sync
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, 'r+b')
+            with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                offsets, end = _read_index(buffer)
+                self._offsets = [int(offset) for offset in offsets]
+                del offsets # Releases the index view of the buffer
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, 'w+b')
+            self._file.write(_FILE_HEADER.pack(FILE_MAGIC, VERSION))
+            self._offsets = []
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, record: Serializable) -> int:
+        '''Appends `record.serialize_codec()` (which lazy readers need), returns the record number'''
+        return self.append_bytes(record.serialize_codec())
+
+    def append_bytes(self, data: bytes) -> int:
+        self._offsets.append(self._file.tell())
+        self._file.write(_RECORD_HEADER.pack(len(data), zlib.crc32(data)))
+        self._file.write(data)
+        return len(self._offsets) - 1
+
+    def flush(self) -> None:
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        '''Writes the index footer and closes the file'''
+        if self._file.closed:
+            return
+        index = np.array(self._offsets, dtype='<u8').tobytes()
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_FOOTER.pack(index_offset, len(self._offsets), zlib.crc32(index), FOOTER_MAGIC))
+        self.flush()
+        self._file.close()
+
+
+class RecordReader:
+    '''Memory-mapped reader of a RecordWriter file, decoding records by number on access'''
+
+    def __init__(self, path: Union[str, os.PathLike], factory: Optional[Callable[[], Serializable]] = None, lazy: bool = False):
+        self.path = path
+        self.factory = factory
+        self.lazy = lazy
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets, _ = _read_index(self._map)
+
+    def __enter__(self) -> 'RecordReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        '''Unmaps the file; views returned by `record_bytes` (and lazy records) must have been released'''
+        self._offsets = []
+        self._map.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def record_bytes(self, index: int) -> memoryview:
+        '''Serialized record, as a view of the mapped file (no copy)'''
+        if index < 0:
+            index += len(self._offsets)
+        if not 0 <= index < len(self._offsets):
+            raise IndexError(f'Record {index} out of range ({len(self._offsets)} records)')
+        offset = int(self._offsets[index])
+        (length, _) = _RECORD_HEADER.unpack_from(self._map, offset)
+        start = offset + _RECORD_HEADER.size
+        return memoryview(self._map)[start:start + length]
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Serializable, list[Serializable]]:
+        if isinstance(index, slice):
+            return [self._decode(position) for position in range(*index.indices(len(self)))]
+        return self._decode(index)
+
+    def __iter__(self) -> Iterator[Serializable]:
+        return self.records()
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Serializable]:
+        '''Decodes records start..stop-1 (up to the last one by default) one at a time'''
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(start, stop):
+            yield self._decode(index)
+
+    def _decode(self, index: int) -> Serializable:
+        if self.factory is None:
+            raise TypeError('RecordReader needs a factory to decode records (record_bytes() gives the raw ones)')
+        if self.lazy:
+            return self.factory().deserialize(self.record_bytes(index), lazy=True)
+        with self.record_bytes(index) as data:
+            return self.factory().deserialize(data)
@@ -1,25 +1,732 @@
+import dataclasses
+import itertools
+import operator
 import pickle
+import struct
+import typing
+import weakref
+import zlib
+from typing import Callable, Optional
+
+import numpy as np
+
+CODEC_MAGIC = b'\x00\xc5' # No pickle starts with a zero byte
+LAZY_FIELDS = '_lazy_fields' # Instance attribute holding the fields a lazy deserialize hasn't decoded yet
+_HEADER = struct.Struct('<2sI') # Magic, field layout fingerprint
+_LENGTH = struct.Struct('<I')
+
+
+class CodecUnsupported(Exception):
+    '''Raised by a codec for a value its class layout can't represent (the pickle path is used instead)'''
+
+
+class Codec:
+    '''Binary encoder/decoder of one Serializable class, built from its declared fields (see `codec_for`)'''
+
+    def __init__(self, cls: type, fields: list[tuple[str, object]]):
+        self.cls = cls
+        self.fields = fields
+        specs = [(name, _field_spec(field_type)) for name, field_type in fields]
+        layout = ','.join(f'{name}:{spec.kind}' for name, spec in specs)
+        self.fingerprint = zlib.crc32(layout.encode())
+        self.header = _HEADER.pack(CODEC_MAGIC, self.fingerprint)
+        self.lazy_fields = _lazy_fields(cls, specs)
+        self.lazy_decoders = {name: spec.decode_lazy for name, spec in specs if name in self.lazy_fields}
+        self._lazy_class = None
+        self.encode, self._decode, self._decode_lazy = _build(cls, specs, self.header, self.lazy_fields)
+
+    def __repr__(self) -> str:
+        return f'Codec({self.cls.__qualname__}, fields={[name for name, _ in self.fields]})'
+
+    def decode(self, obj: object, data: bytes, offset: int = 0, end: Optional[int] = None, lazy: bool = False) -> object:
+        '''Sets the fields of `obj` from data[offset:end], returns `obj` (with `lazy`, data must outlive the pending fields)'''
+        end = len(data) if end is None else end
+        if data[offset:offset + _HEADER.size] != self.header:
+            magic, fingerprint = _HEADER.unpack_from(data, offset)
+            if magic != CODEC_MAGIC:
+                raise ValueError(f'Not {self.cls.__qualname__} codec data')
+            raise ValueError(f'{self.cls.__qualname__} codec data has another field layout (fingerprint {fingerprint:08x}, expected {self.fingerprint:08x})')
+        lazy = lazy and bool(self.lazy_fields)
+        if not lazy and self.lazy_fields and obj.__dict__.pop(LAZY_FIELDS, None) is not None:
+            object.__setattr__(obj, '__class__', self.cls)
+        if (self._decode_lazy if lazy else self._decode)(obj, data, offset + _HEADER.size) != end:
+            raise ValueError(f'{self.cls.__qualname__} codec data has the wrong length')
+        if lazy:
+            object.__setattr__(obj, '__class__', self.lazy_class)
+            if isinstance(obj, TrackedSerializable):
+                obj._stamp_pending(self.lazy_fields)
+        return obj
+
+    @property
+    def lazy_class(self) -> Optional[type]:
+        '''Class of the instances with fields left pending by a lazy decode (None without lazy fields)'''
+        if self._lazy_class is None and self.lazy_fields:
+            self._lazy_class = _lazy_class(self.cls, self.lazy_fields)
+            _codecs[self._lazy_class] = self
+        return self._lazy_class
+
+
+_NO_DEFAULT = object()
+
+
+def _lazy_class(cls: type, names: tuple[str, ...]) -> type:
+    '''Subclass of `cls` reading the fields `names` with _LazyField, without adding to the instance layout'''
+    def __reduce_ex__(self, protocol):
+        self._load_lazy()
+        return self.__reduce_ex__(protocol)
+
+    def __eq__(self, other):
+        self._load_lazy()
+        return self == other
+
+    namespace = {name: _LazyField(name, next((klass.__dict__[name] for klass in cls.__mro__ if name in klass.__dict__), _NO_DEFAULT)) for name in names}
+    namespace.update(__slots__=(), __module__=cls.__module__, __qualname__=cls.__qualname__, __reduce_ex__=__reduce_ex__, __eq__=__eq__, __hash__=cls.__hash__)
+    return type(cls.__name__, (cls,), namespace)
+
+
+class _LazyField:
+    '''Class attribute decoding a pending field on its first read (then the value in the instance __dict__ is used)'''
+
+    def __init__(self, name: str, default: object):
+        self.name = name
+        self.default = default # The class attribute this one replaced (a dataclass default)
+
+    def __get__(self, obj: object, owner: Optional[type] = None) -> object:
+        pending = obj.__dict__.get(LAZY_FIELDS) if obj is not None else None
+        if pending is None or self.name not in pending.fields:
+            if self.default is not _NO_DEFAULT:
+                return self.default
+            if obj is None:
+                raise AttributeError(f'type object {owner.__qualname__!r} has no attribute {self.name!r}')
+            raise AttributeError(f'{type(obj).__qualname__!r} object has no attribute {self.name!r}')
+        attributes = obj.__dict__
+        value = attributes[self.name] = pending.decode(self.name)
+        if isinstance(obj, TrackedSerializable):
+            obj._adopt(self.name, value)
+            if isinstance(value, TrackedSerializable):
+                # Decoding is not a change
+                value._restamp(obj._tracking.assigned.get(self.name, 0))
+        if all(name in attributes for name in pending.fields):
+            del attributes[LAZY_FIELDS]
+            object.__setattr__(obj, '__class__', pending.cls)
+        return value
+
+
+class _Pending:
+    '''Encoded fields of a lazily decoded instance of `cls`: name -> offset in the data (decoded values hide them)'''
+    __slots__ = ('data', 'cls', 'fields')
+
+    def __init__(self, data: bytes, cls: type, fields: dict[str, int]):
+        self.data = data
+        self.cls = cls
+        self.fields = fields
+
+    def __repr__(self) -> str:
+        return f'<pending {", ".join(self.fields)}>'
+
+    def decode(self, name: str) -> object:
+        return codec_for(self.cls).lazy_decoders[name](self.data, self.fields[name])
+
+
+_codecs: dict[type, Optional[Codec]] = {}
+
+
+def codec_for(cls: type) -> Optional[Codec]:
+    '''Codec of a Serializable class (`_codec_fields`, dataclass fields or annotations), None without declared fields'''
+    try:
+        return _codecs[cls]
+    except KeyError:
+        pass
+    fields = _declared_fields(cls)
+    codec = _codecs[cls] = Codec(cls, fields) if fields else None
+    return codec
+
+
+def is_codec_data(data: bytes) -> bool:
+    return data[:len(CODEC_MAGIC)] == CODEC_MAGIC
+
+
+def _declared_fields(cls: type) -> list[tuple[str, object]]:
+    if getattr(cls, '_codec_fields', None) is not None:
+        return list(cls._codec_fields)
+    try:
+        hints = typing.get_type_hints(cls)
+    except Exception:
+        hints = {}
+        for klass in reversed(cls.__mro__):
+            hints.update(getattr(klass, '__annotations__', {}))
+    if dataclasses.is_dataclass(cls):
+        return [(field.name, hints.get(field.name, object)) for field in dataclasses.fields(cls)]
+    return [(name, hint) for name, hint in hints.items() if hint is not typing.ClassVar and typing.get_origin(hint) is not typing.ClassVar]
+
+
+class _FieldSpec(typing.NamedTuple):
+    kind: str # Part of the layout fingerprint
+    type: Optional[type] = None # Exact type of fixed-size values
+    format: str = '' # struct format of fixed-size values
+    parts: tuple[str, ...] = () # Attributes packed for a fixed-size value (the value itself if empty)
+    build: Optional[Callable[..., object]] = None # Value from its unpacked values (the single one if None)
+    encode: Optional[Callable[[object], bytes]] = None # Variable-size values
+    decode: Optional[Callable[[bytes, int], tuple[object, int]]] = None
+    skip: Optional[Callable[[bytes, int], int]] = None # End of the value at an offset, for fields that can be lazy
+    decode_lazy: Optional[Callable[[bytes, int], object]] = None # Value at an offset, its own nested fields lazy
+
+
+def _field_spec(field_type: object) -> _FieldSpec:
+    from utils.geometry import Vec2, Vec2Int, Vec3, VecN
+
+    fixed = {
+        int: ('q', (), None),
+        float: ('d', (), None),
+        bool: ('?', (), None),
+        Vec2: ('dd', ('x', 'y'), Vec2._make),
+        Vec2Int: ('qq', ('x', 'y'), Vec2Int._make),
+        Vec3: ('ddd', ('x', 'y', 'z'), Vec3._make),
+    }
+    if field_type in fixed:
+        format, parts, build = fixed[field_type]
+        return _FieldSpec(field_type.__name__, field_type, format, parts, build)
+
+    args = typing.get_args(field_type)
+    if typing.get_origin(field_type) is typing.Union and len(args) == 2 and type(None) in args:
+        return _optional_spec(_field_spec(args[0] if args[1] is type(None) else args[1]))
+    if field_type is str:
+        return _FieldSpec('str', encode=_encode_str, decode=_decode_str)
+    if field_type is bytes:
+        return _FieldSpec('bytes', encode=_encode_bytes, decode=_decode_bytes)
+    if field_type is VecN:
+        return _FieldSpec('VecN', encode=_encode_vecn, decode=_decode_vecn)
+    if field_type is np.ndarray:
+        return _FieldSpec('ndarray', encode=_encode_array, decode=_decode_array)
+    if isinstance(field_type, type) and hasattr(field_type, 'serialize') and hasattr(field_type, 'deserialize'):
+        return _nested_spec(field_type)
+    return _FieldSpec('pickle', encode=_encode_pickle, decode=_decode_pickle)
+
+
+def _sized(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _read_sized(data: bytes, offset: int) -> tuple[int, int]:
+    '''(start, end) of the length-prefixed payload at `offset`'''
+    (length,) = _LENGTH.unpack_from(data, offset)
+    start = offset + _LENGTH.size
+    return start, start + length
+
+
+def _encode_str(value) -> bytes:
+    if type(value) is not str:
+        raise CodecUnsupported(type(value))
+    return _sized(value.encode())
+
+
+def _decode_str(data: bytes, offset: int) -> tuple[str, int]:
+    start, end = _read_sized(data, offset)
+    return str(data[start:end], 'utf-8'), end
+
+
+def _encode_bytes(value) -> bytes:
+    if type(value) is not bytes:
+        raise CodecUnsupported(type(value))
+    return _sized(value)
+
+
+def _decode_bytes(data: bytes, offset: int) -> tuple[bytes, int]:
+    start, end = _read_sized(data, offset)
+    return bytes(data[start:end]), end
+
+
+def _encode_vecn(value) -> bytes:
+    from utils.geometry import VecN
+    if type(value) is not VecN:
+        raise CodecUnsupported(type(value))
+    return _sized(value.values.astype('<f8', copy=False).tobytes())
+
+
+def _decode_vecn(data: bytes, offset: int) -> tuple[object, int]:
+    from utils.geometry import VecN
+    start, end = _read_sized(data, offset)
+    return VecN._wrap(np.frombuffer(data, '<f8', (end - start) // 8, start).astype(float)), end
+
+
+_ARRAY_HEADER = struct.Struct('<8sB')
+
+
+def _encode_array(value) -> bytes:
+    if type(value) is not np.ndarray or value.dtype.hasobject or len(value.dtype.str) > 8:
+        raise CodecUnsupported(type(value))
+    header = _ARRAY_HEADER.pack(value.dtype.str.encode(), value.ndim) + struct.pack(f'<{value.ndim}q', *value.shape)
+    return _sized(header + np.ascontiguousarray(value).tobytes())
+
+
+def _decode_array(data: bytes, offset: int) -> tuple[np.ndarray, int]:
+    start, end = _read_sized(data, offset)
+    dtype, ndim = _ARRAY_HEADER.unpack_from(data, start)
+    shape = struct.unpack_from(f'<{ndim}q', data, start + _ARRAY_HEADER.size)
+    buffer_start = start + _ARRAY_HEADER.size + 8 * ndim
+    dtype = np.dtype(dtype.rstrip(b'\x00').decode())
+    values = np.frombuffer(data, dtype, (end - buffer_start) // dtype.itemsize if dtype.itemsize else 0, buffer_start)
+    return values.reshape(shape).copy(), end
+
+
+def _encode_pickle(value) -> bytes:
+    return _sized(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _decode_pickle(data: bytes, offset: int) -> tuple[object, int]:
+    start, end = _read_sized(data, offset)
+    return pickle.loads(data[start:end]), end
+
+
+def _nested_spec(field_type: type) -> _FieldSpec:
+    # The nested codec is looked up when used, so that classes can nest themselves
+    def encode(value) -> bytes:
+        codec = codec_for(field_type)
+        if type(value) is not field_type or codec is None:
+            raise CodecUnsupported(type(value))
+        if codec.lazy_fields and LAZY_FIELDS in value.__dict__:
+            value._load_lazy()
+        return _sized(codec.encode(value))
+
+    def decode(data: bytes, offset: int) -> tuple[object, int]:
+        start, end = _read_sized(data, offset)
+        value = field_type.__new__(field_type)
+        codec_for(field_type).decode(value, data, start, end)
+        return value, end
+
+    def skip(data: bytes, offset: int) -> int:
+        return _read_sized(data, offset)[1]
+
+    def decode_lazy(data: bytes, offset: int) -> object:
+        start, end = _read_sized(data, offset)
+        return codec_for(field_type).decode(field_type.__new__(field_type), data, start, end, lazy=True)
+
+    return _FieldSpec(field_type.__qualname__, encode=encode, decode=decode, skip=skip, decode_lazy=decode_lazy)
+
+
+def _optional_spec(spec: _FieldSpec) -> _FieldSpec:
+    '''Presence byte, then the value (fixed-size values get their own struct)'''
+    if spec.encode is None:
+        fixed = struct.Struct('<' + spec.format)
+        field_type, build = spec.type, spec.build
+        pack = operator.attrgetter(*spec.parts) if spec.parts else None
+
+        def encode_fixed(value) -> bytes:
+            if type(value) is not field_type:
+                raise CodecUnsupported(type(value))
+            return fixed.pack(value) if pack is None else fixed.pack(*pack(value))
+
+        def decode_fixed(data: bytes, offset: int) -> tuple[object, int]:
+            values = fixed.unpack_from(data, offset)
+            return values[0] if build is None else build(*values), offset + fixed.size
+
+        spec = spec._replace(encode=encode_fixed, decode=decode_fixed)
+
+    def encode(value) -> bytes:
+        return b'\x00' if value is None else b'\x01' + spec.encode(value)
+
+    def decode(data: bytes, offset: int) -> tuple[object, int]:
+        if data[offset] == 0:
+            return None, offset + 1
+        return spec.decode(data, offset + 1)
+
+    if spec.skip is None:
+        return _FieldSpec(f'Optional[{spec.kind}]', encode=encode, decode=decode)
+
+    def skip(data: bytes, offset: int) -> int:
+        return offset + 1 if data[offset] == 0 else spec.skip(data, offset + 1)
+
+    def decode_lazy(data: bytes, offset: int) -> object:
+        return None if data[offset] == 0 else spec.decode_lazy(data, offset + 1)
+
+    return _FieldSpec(f'Optional[{spec.kind}]', encode=encode, decode=decode, skip=skip, decode_lazy=decode_lazy)
+
+
+def _slots(cls: type) -> set[str]:
+    return {slot for klass in cls.__mro__ for slot in getattr(klass, '__slots__', ())}
+
+
+def _lazy_fields(cls: type, specs: list[tuple[str, _FieldSpec]]) -> tuple[str, ...]:
+    '''Fields that can be decoded lazily: nested Serializables in the instance __dict__, not shadowed by a descriptor'''
+    if not cls.__dictoffset__:
+        return ()
+    slots = _slots(cls)
+    names = []
+    for name, spec in specs:
+        if spec.skip is None or name in slots:
+            continue
+        attribute = next((klass.__dict__[name] for klass in cls.__mro__ if name in klass.__dict__), None)
+        if hasattr(attribute, '__get__'):
+            continue
+        names.append(name)
+    return tuple(names)
+
+
+def _getter(names: list[str]) -> Callable[[object], tuple]:
+    '''Function returning the tuple of the (dotted) attributes `names` of an object'''
+    if len(names) == 1:
+        get = operator.attrgetter(names[0])
+        return lambda obj: (get(obj),)
+    return operator.attrgetter(*names)
+
+
+def _build(cls: type, specs: list[tuple[str, _FieldSpec]], header: bytes, lazy_fields: tuple[str, ...]) -> tuple[Callable, Callable, Optional[Callable]]:
+    '''encode(obj), decode(obj, data, offset) -> end and decode_lazy (None without lazy fields) functions of a class'''
+    fixed = [(name, spec) for name, spec in specs if spec.encode is None]
+    variable = [(name, spec) for name, spec in specs if spec.encode is not None]
+    fixed_struct = struct.Struct('<' + ''.join(spec.format for _, spec in fixed))
+    fixed_types = tuple(spec.type for _, spec in fixed)
+    fixed_types = list(fixed_types)
+    get_fixed = _getter([name for name, _ in fixed])
+    compound = any(spec.parts for _, spec in fixed)
+    get_packed = _getter([f'{name}.{part}' if part else name for name, spec in fixed for part in spec.parts or ('',)])
+    scalars, builders = [], []
+    position = 0
+    for name, spec in fixed:
+        if spec.build is None:
+            scalars.append((name, position))
+        else:
+            builders.append((name, position, position + len(spec.format), spec.build))
+        position += len(spec.format)
+    variable_encoders = [(name, spec.encode) for name, spec in variable]
+    variable_decoders = [(name, spec.decode, spec.skip if name in lazy_fields else None) for name, spec in variable]
+
+    # Instances with a __dict__ must hold exactly the declared (non-slot) fields
+    check_dict = bool(cls.__dictoffset__)
+    slots = _slots(cls)
+    dict_fields = sum(name not in slots for name, _ in specs)
+
+    def encode(obj) -> bytes:
+        if check_dict and len(obj.__dict__) != dict_fields:
+            raise CodecUnsupported('undeclared attributes')
+        if fixed:
+            values = get_fixed(obj)
+            if [*map(type, values)] != fixed_types:
+                raise CodecUnsupported('field types')
+            packed = header + fixed_struct.pack(*(get_packed(obj) if compound else values))
+        else:
+            packed = header
+        if not variable_encoders:
+            return packed
+        return b''.join([packed, *(encode_field(getattr(obj, name)) for name, encode_field in variable_encoders)])
+
+    def decode_fixed(obj, data: bytes, offset: int) -> int:
+        if not fixed:
+            return offset
+        values = fixed_struct.unpack_from(data, offset)
+        for name, index in scalars:
+            setattr(obj, name, values[index])
+        for name, first, end, build in builders:
+            setattr(obj, name, build(*values[first:end]))
+        return offset + fixed_struct.size
+
+    def decode(obj, data: bytes, offset: int) -> int:
+        offset = decode_fixed(obj, data, offset)
+        for name, decode_field, _ in variable_decoders:
+            value, offset = decode_field(data, offset)
+            setattr(obj, name, value)
+        return offset
+
+    def decode_lazy(obj, data: bytes, offset: int) -> int:
+        offset = decode_fixed(obj, data, offset)
+        pending = {}
+        for name, decode_field, skip in variable_decoders:
+            if skip is not None:
+                pending[name] = offset
+                offset = skip(data, offset)
+            else:
+                value, offset = decode_field(data, offset)
+                setattr(obj, name, value)
+        # Values already in the instance would hide the lazy fields
+        attributes = obj.__dict__
+        for name in lazy_fields:
+            attributes.pop(name, None)
+        attributes[LAZY_FIELDS] = _Pending(data, cls, pending)
+        return offset
+
+    return encode, decode, decode_lazy if lazy_fields else None
+
 
 class Serializable:
+    '''Base of objects that save their state as bytes (pickled, or with their class codec for `serialize_codec`)'''
+    __slots__ = () # Subclasses declaring __slots__ (like Rect2) get no __dict__
+
     def serialize(self):
-        selfDict = self.__dict__.copy()
-        for attr in selfDict:
-            if isinstance(getattr(self, attr), Serializable):
-                selfDict[attr] = getattr(self, attr).serialize()
+        return self._serialize_pickled()
+
+    def serialize_codec(self) -> bytes:
+        '''Encodes with the class codec, or like `serialize` when the class has none or the values don't fit it'''
+        codec = codec_for(type(self))
+        if codec is not None:
+            if codec.lazy_fields and LAZY_FIELDS in self.__dict__:
+                self._load_lazy()
+            try:
+                return codec.encode(self)
+            except (CodecUnsupported, AttributeError, struct.error):
+                pass
+        return self._serialize_pickled()
+
+    def serialize_out_of_band(self) -> tuple[bytes, list[pickle.PickleBuffer]]:
+        '''Pickle (protocol 5) of the state, and the buffers of the numpy data it references instead of copying it'''
+        buffers = []
+        data = pickle.dumps(self._pickled_state(), protocol=5, buffer_callback=buffers.append)
+        return data, buffers
+
+    def deserialize(self, data: bytes, buffers: Optional[list] = None, lazy: bool = False):
+        '''Sets the state from `serialize`, `serialize_codec` or `serialize_out_of_band` data (`lazy` decodes nested fields on first read)'''
+        if data[:2] == CODEC_MAGIC:
+            codec = codec_for(type(self))
+            if codec is None:
+                raise ValueError(f'{type(self).__qualname__} has no codec to read codec data')
+            return codec.decode(self, data, lazy=lazy)
+        return self._deserialize_pickled(data, buffers)
+
+    def _load_lazy(self) -> None:
+        '''Decodes the fields a lazy deserialize left pending'''
+        pending = self.__dict__.pop(LAZY_FIELDS, None)
+        if pending is not None:
+            for name in pending.fields:
+                if name not in self.__dict__:
+                    self.__dict__[name] = pending.decode(name)
+            object.__setattr__(self, '__class__', pending.cls)
+
+    def _pickled_state(self) -> dict:
+        '''Attributes saved by the pickle paths'''
+        if LAZY_FIELDS in self.__dict__:
+            self._load_lazy()
+        return self.__dict__.copy()
+
+    def _serialize_pickled(self):
+        selfDict = self._pickled_state()
+        for attr, value in selfDict.items():
+            if isinstance(value, Serializable):
+                selfDict[attr] = value.serialize()
         return pickle.dumps(selfDict)
 
-    def deserialize(self, data: bytes):
-        incomingDict = pickle.loads(data)
-        for attr in incomingDict:
-            if isinstance(getattr(self, attr), Serializable):
-                setattr(self, attr, getattr(self, attr).deserialize(incomingDict[attr]))
+    def _deserialize_pickled(self, data: bytes, buffers: Optional[list] = None):
+        incomingDict = pickle.loads(data, buffers=buffers)
+        for attr, value in incomingDict.items():
+            current = getattr(self, attr, None)
+            # Nested Serializables are bytes in `serialize` data
+            if isinstance(current, Serializable) and isinstance(value, bytes):
+                setattr(self, attr, current.deserialize(value))
             else:
-                setattr(self, attr, incomingDict[attr])
-
+                setattr(self, attr, value)
         return self
 
     @staticmethod
     def from_pickle(filepath, default=None):
+        '''Deserializes a whole file of `serialize()` data (see utils.records for files of many objects)'''
         with open(filepath, "rb") as f:
-            serialized = pickle.loads(f)
-            return (default or Serializable()).deserialize(serialized)
\ No newline at end of file
+            serialized = f.read()
+            return (default or Serializable()).deserialize(serialized)
+
+
+_clock = itertools.count(1) # Stamps of the TrackedSerializable changes, shared so that nested objects agree
+_MISSING = object()
+
+
+class _Tracking:
+    '''Change stamps (last assignment, last change) per attribute of a TrackedSerializable, with its snapshots, children and owners'''
+    __slots__ = ('assigned', 'changed', 'snapshots', 'children', 'owners')
+
+    def __init__(self):
+        self.assigned: dict[str, int] = {}
+        self.changed: dict[str, int] = {}
+        self.snapshots: dict[str, tuple[Callable[[object], object], object]] = {}
+        self.children: dict[str, TrackedSerializable] = {}
+        self.owners: list[tuple[weakref.ref, str]] = []
+
+
+def _snapshotter(cls: type) -> Optional[Callable[[object], object]]:
+    '''Function making a comparable copy of values that can change in place (VecN, arrays, Serializables), or None'''
+    from utils.geometry import Rect2, Vec2, Vec3, VecN
+    if issubclass(cls, Vec2):
+        return lambda value: (value.x, value.y)
+    if issubclass(cls, Vec3):
+        return lambda value: (value.x, value.y, value.z)
+    if issubclass(cls, VecN):
+        return lambda value: value.values.tolist()
+    if issubclass(cls, np.ndarray):
+        return lambda value: (value.shape, value.dtype.str, value.tobytes())
+    if issubclass(cls, Rect2):
+        return lambda value: value.tuple_bbox
+    if issubclass(cls, Serializable) and not issubclass(cls, TrackedSerializable):
+        return lambda value: value.serialize()
+    return None
+
+
+_snapshotters: dict[type, Optional[Callable[[object], object]]] = {}
+
+
+class TrackedSerializable(Serializable):
+    '''Serializable that knows which of its attributes changed since a `version`, for `serialize_delta`/`apply_delta`'''
+    __slots__ = ('_tracking',)
+
+    def _track(self) -> _Tracking:
+        try:
+            return self._tracking
+        except AttributeError:
+            tracking = _Tracking()
+            object.__setattr__(self, '_tracking', tracking)
+            # Values set without __setattr__ (copies) count as assigned now
+            attributes = self.__dict__
+            pending = attributes.get(LAZY_FIELDS)
+            names = [name for name in attributes if name != LAZY_FIELDS]
+            if pending is not None:
+                names.extend(name for name in pending.fields if name not in attributes)
+            if names:
+                stamp = next(_clock)
+                for name in names:
+                    tracking.assigned[name] = tracking.changed[name] = stamp
+                    if name in attributes:
+                        self._adopt(name, attributes[name])
+            return tracking
+
+    @property
+    def version(self) -> int:
+        '''Changes made from now on are newer than this version (in-place changes up to now are stamped first)'''
+        self._sync()
+        return next(_clock)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        previous = self.__dict__.get(name)
+        super().__setattr__(name, value)
+        if previous is not value and isinstance(previous, TrackedSerializable):
+            previous._disown(self, name)
+        self._adopt(name, value)
+        tracking = self._tracking
+        stamp = tracking.assigned[name] = tracking.changed[name] = next(_clock)
+        self._propagate(stamp)
+
+    def __delattr__(self, name: str) -> None:
+        previous = self.__dict__.get(name)
+        super().__delattr__(name)
+        if isinstance(previous, TrackedSerializable):
+            previous._disown(self, name)
+        tracking = self._track()
+        tracking.snapshots.pop(name, None)
+        tracking.children.pop(name, None)
+        stamp = tracking.assigned[name] = tracking.changed[name] = next(_clock)
+        self._propagate(stamp)
+
+    def __getstate__(self) -> dict:
+        return self.__dict__
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._track()
+
+    def _load_lazy(self) -> None:
+        pending = self.__dict__.get(LAZY_FIELDS)
+        if pending is None:
+            return
+        names = [name for name in pending.fields if name not in self.__dict__]
+        super()._load_lazy()
+        tracking = self._track()
+        for name in names:
+            value = self.__dict__[name]
+            self._adopt(name, value)
+            if isinstance(value, TrackedSerializable):
+                value._restamp(tracking.assigned.get(name, 0))
+
+    def _adopt(self, name: str, value: object) -> None:
+        '''Starts following in-place changes of the value held by an attribute'''
+        tracking = self._track()
+        if isinstance(value, TrackedSerializable):
+            owners = value._track().owners
+            if not any(reference() is self and held_as == name for reference, held_as in owners):
+                owners.append((weakref.ref(self), name))
+            tracking.children[name] = value
+            tracking.snapshots.pop(name, None)
+            return
+        tracking.children.pop(name, None)
+        try:
+            snapshotter = _snapshotters[type(value)]
+        except KeyError:
+            snapshotter = _snapshotters[type(value)] = _snapshotter(type(value))
+        if snapshotter is None:
+            tracking.snapshots.pop(name, None)
+        else:
+            tracking.snapshots[name] = (snapshotter, snapshotter(value))
+
+    def _disown(self, owner: 'TrackedSerializable', name: str) -> None:
+        tracking = self._track()
+        tracking.owners = [(reference, held_as) for reference, held_as in tracking.owners if not (reference() is owner and held_as == name)]
+
+    def _stamp_pending(self, names: tuple[str, ...]) -> None:
+        '''Marks the fields a lazy deserialize left pending as assigned'''
+        tracking = self._track()
+        stamp = next(_clock)
+        for name in names:
+            tracking.assigned[name] = tracking.changed[name] = stamp
+        self._propagate(stamp)
+
+    def _restamp(self, stamp: int) -> None:
+        tracking = self._track()
+        for stamps in (tracking.assigned, tracking.changed):
+            for name in stamps:
+                stamps[name] = stamp
+        for value in self.__dict__.values():
+            if isinstance(value, TrackedSerializable):
+                value._restamp(stamp)
+
+    def _propagate(self, stamp: int) -> None:
+        '''Marks the attributes holding this object (and so on up) as changed'''
+        for reference, name in self._track().owners:
+            owner = reference()
+            if owner is not None and owner.__dict__.get(name) is self and owner._tracking.changed.get(name) != stamp:
+                owner._tracking.changed[name] = stamp
+                owner._propagate(stamp)
+
+    def _sync(self) -> None:
+        '''Stamps the values that changed in place since their snapshot, here and in nested objects'''
+        tracking = self._track()
+        attributes = self.__dict__
+        for name, (snapshotter, snapshot) in tracking.snapshots.items():
+            value = attributes.get(name, _MISSING)
+            if value is _MISSING:
+                continue # Left pending by a lazy deserialize, adopted again when decoded
+            current = snapshotter(value)
+            if current != snapshot:
+                tracking.snapshots[name] = (snapshotter, current)
+                tracking.changed[name] = stamp = next(_clock)
+                self._propagate(stamp)
+        for child in tracking.children.values():
+            child._sync()
+
+    def serialize_delta(self, since: int = 0) -> tuple[bytes, int]:
+        '''Attributes changed after the version `since` (all of them for 0), and the version to pass for the next delta'''
+        version = self.version
+        return pickle.dumps(self._delta(since), protocol=pickle.HIGHEST_PROTOCOL), version
+
+    def _delta(self, since: int) -> dict:
+        tracking = self._track()
+        values, nested, deleted = {}, {}, []
+        for name, stamp in tracking.changed.items():
+            if stamp <= since:
+                continue
+            value = self.__dict__.get(name, _MISSING)
+            if value is _MISSING:
+                value = getattr(self, name, _MISSING) # Lazily decoded fields
+            if value is _MISSING:
+                deleted.append(name)
+            elif isinstance(value, TrackedSerializable) and tracking.assigned.get(name, 0) <= since:
+                nested[name] = value._delta(since)
+            else:
+                values[name] = value
+        return {'values': values, 'nested': nested, 'deleted': deleted}
+
+    def apply_delta(self, data: bytes):
+        '''Applies the changes of `serialize_delta` data, returns this object'''
+        self._apply_delta(pickle.loads(data))
+        return self
+
+    def _apply_delta(self, delta: dict) -> None:
+        for name, value in delta['values'].items():
+            setattr(self, name, value)
+        for name, nested in delta['nested'].items():
+            getattr(self, name)._apply_delta(nested)
+        for name in delta['deleted']:
+            if hasattr(self, name):
+                delattr(self, name)
@@ -0,0 +1,376 @@
+import heapq
+import itertools
+import math
+from abc import ABC, abstractmethod
+from typing import Hashable, Iterable, Optional, Union
+
+from utils.geometry import Number, Rect2, Vec2
+
+BBox = tuple[float, float, float, float]
+
+
+def _bbox_point_distance(bbox: BBox, x: float, y: float) -> float:
+    '''Distance from a point to the closest point of a bbox (0 when inside)'''
+    dx = max(bbox[0] - x, 0.0, x - bbox[2])
+    dy = max(bbox[1] - y, 0.0, y - bbox[3])
+    return math.hypot(dx, dy)
+
+
+class SpatialIndex(ABC):
+    '''Base class of the Rect2 spatial indexes (borders are inclusive, like Rect2.__contains__ and Rect2.intersects)'''
+
+    def __init__(self):
+        self._rects: dict[Hashable, Rect2] = {}
+        self._bboxes: dict[Hashable, BBox] = {}
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rects
+
+    def __getitem__(self, key: Hashable) -> Rect2:
+        return self._rects[key]
+
+    def __iter__(self):
+        return iter(self._rects)
+
+    def items(self):
+        return self._rects.items()
+
+    def insert(self, key: Hashable, rect: Rect2) -> None:
+        if not isinstance(rect, Rect2):
+            raise TypeError(f'{self.__class__.__name__} can only index Rect2, got {type(rect)}')
+        if key in self._rects:
+            self.remove(key)
+        bbox = rect.tuple_bbox
+        self._rects[key] = rect
+        self._bboxes[key] = bbox
+        self._insert(key, bbox)
+
+    def remove(self, key: Hashable) -> Rect2:
+        '''Removes `key` from the index and returns its rect (raises KeyError if not indexed)'''
+        rect = self._rects.pop(key)
+        self._remove(key, self._bboxes.pop(key))
+        return rect
+
+    def bulk_load(self, items: Iterable[tuple[Hashable, Rect2]]) -> None:
+        '''Inserts many (key, rect) pairs at once, e.g. `index.bulk_load(enumerate(rects))`'''
+        for key, rect in items:
+            self.insert(key, rect)
+
+    def clear(self) -> None:
+        self._rects.clear()
+        self._bboxes.clear()
+
+    @abstractmethod
+    def query_point(self, point: Vec2) -> list[Hashable]:
+        '''Keys of every rect containing `point`'''
+
+    @abstractmethod
+    def query_rect(self, rect: Rect2) -> list[Hashable]:
+        '''Keys of every rect intersecting `rect`'''
+
+    @abstractmethod
+    def nearest(self, point: Vec2, k: int = 1) -> list[Hashable]:
+        '''Keys of the `k` rects closest to `point` (distance 0 when inside), closest first'''
+
+    @abstractmethod
+    def _insert(self, key: Hashable, bbox: BBox) -> None:
+        ...
+
+    @abstractmethod
+    def _remove(self, key: Hashable, bbox: BBox) -> None:
+        ...
+
+def _ring_cells(cx: int, cy: int, ring: int):
+    '''Cells on the border of the (2 * ring + 1)² square centered at (cx, cy)'''
+    if ring == 0:
+        yield cx, cy
+        return
+    for x in range(cx - ring, cx + ring + 1):
+        yield x, cy - ring
+        yield x, cy + ring
+    for y in range(cy - ring + 1, cy + ring):
+        yield cx - ring, y
+        yield cx + ring, y
+
+
+
+class GridIndex(SpatialIndex):
+    '''Uniform grid of `cell_size` buckets: best for dense screens where rects have similar sizes'''
+
+    def __init__(self, cell_size: Union[Number, Vec2] = 64):
+        super().__init__()
+        cell_size = cell_size if isinstance(cell_size, Vec2) else Vec2(cell_size, cell_size)
+        if cell_size.x <= 0 or cell_size.y <= 0:
+            raise ValueError(f'GridIndex cell_size must be positive, got {cell_size}')
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[Hashable]] = {}
+
+    def _cell_range(self, bbox: BBox) -> tuple[int, int, int, int]:
+        cw, ch = self.cell_size.x, self.cell_size.y
+        return math.floor(bbox[0] / cw), math.floor(bbox[1] / ch), math.floor(bbox[2] / cw), math.floor(bbox[3] / ch)
+
+    def _insert(self, key: Hashable, bbox: BBox) -> None:
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells.setdefault((cx, cy), set()).add(key)
+
+    def _remove(self, key: Hashable, bbox: BBox) -> None:
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self._cells[(cx, cy)]
+                cell.discard(key)
+                if not cell:
+                    del self._cells[(cx, cy)]
+
+    def clear(self) -> None:
+        super().clear()
+        self._cells.clear()
+
+    def query_point(self, point: Vec2) -> list[Hashable]:
+        x, y = point.x, point.y
+        cell = self._cells.get((math.floor(x / self.cell_size.x), math.floor(y / self.cell_size.y)), ())
+        bboxes = self._bboxes
+        return [key for key in cell if bboxes[key][0] <= x <= bboxes[key][2] and bboxes[key][1] <= y <= bboxes[key][3]]
+
+    def query_rect(self, rect: Rect2) -> list[Hashable]:
+        qx0, qy0, qx1, qy1 = query = rect.tuple_bbox
+        cx0, cy0, cx1, cy1 = self._cell_range(query)
+        candidates = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # Query covers more cells than are occupied: walk the occupied ones instead
+            for (cx, cy), cell in self._cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    candidates.update(cell)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    candidates.update(self._cells.get((cx, cy), ()))
+        bboxes = self._bboxes
+        return [key for key in candidates if bboxes[key][0] <= qx1 and bboxes[key][2] >= qx0 and bboxes[key][1] <= qy1 and bboxes[key][3] >= qy0]
+
+    def nearest(self, point: Vec2, k: int = 1) -> list[Hashable]:
+        if k <= 0 or not self._rects:
+            return []
+        x, y = point.x, point.y
+        cw, ch = self.cell_size.x, self.cell_size.y
+        pcx, pcy = math.floor(x / cw), math.floor(y / ch)
+        best: list[tuple[float, int, Hashable]] = [] # max-heap of the k best as (-distance, tiebreak, key)
+        seen = set()
+        tiebreak = 0
+        for ring in itertools.count():
+            if len(seen) == len(self._rects):
+                break
+            if len(best) == k:
+                # Anything outside the rings searched so far is at least this far away
+                reach = min(x - (pcx - ring + 1) * cw, (pcx + ring) * cw - x, y - (pcy - ring + 1) * ch, (pcy + ring) * ch - y)
+                if reach >= -best[0][0]:
+                    break
+            if 8 * ring > len(self._cells):
+                # The ring has more cells than are occupied: finish with a scan of the remaining rects
+                candidates = (key for key in self._rects if key not in seen)
+                ring_done = True
+            else:
+                candidates = (key for cell in _ring_cells(pcx, pcy, ring) for key in self._cells.get(cell, ()) if key not in seen)
+                ring_done = False
+            for key in candidates:
+                seen.add(key)
+                distance = _bbox_point_distance(self._bboxes[key], x, y)
+                tiebreak += 1
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, tiebreak, key))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, tiebreak, key))
+            if ring_done:
+                break
+        return [key for _, _, key in sorted(best, key=lambda entry: (-entry[0], entry[1]))]
+
+
+class _RTreeNode:
+    __slots__ = ('bbox', 'children', 'leaf')
+
+    def __init__(self, children: list, leaf: bool, bbox: Optional[list[float]] = None):
+        self.children = children # keys when leaf, _RTreeNode otherwise
+        self.leaf = leaf
+        self.bbox = bbox
+
+
+class RTreeIndex(SpatialIndex):
+    '''R-tree packed with Sort-Tile-Recursive on `bulk_load` (call `rebuild()` after many inserts and removes)'''
+
+    def __init__(self, max_entries: int = 16):
+        super().__init__()
+        if max_entries < 2:
+            raise ValueError(f'RTreeIndex max_entries must be at least 2, got {max_entries}')
+        self.max_entries = max_entries
+        self._root = _RTreeNode([], leaf=True)
+
+    def _bbox_of(self, child: Union[_RTreeNode, Hashable], leaf: bool) -> BBox:
+        return self._bboxes[child] if leaf else child.bbox
+
+    def _refresh_bbox(self, node: _RTreeNode) -> None:
+        bboxes = [self._bbox_of(child, node.leaf) for child in node.children]
+        if not bboxes:
+            node.bbox = None
+            return
+        node.bbox = [min(b[0] for b in bboxes), min(b[1] for b in bboxes), max(b[2] for b in bboxes), max(b[3] for b in bboxes)]
+
+    def bulk_load(self, items: Iterable[tuple[Hashable, Rect2]]) -> None:
+        for key, rect in items:
+            if not isinstance(rect, Rect2):
+                raise TypeError(f'RTreeIndex can only index Rect2, got {type(rect)}')
+            self._rects[key] = rect
+            self._bboxes[key] = rect.tuple_bbox
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        '''Repacks the whole tree with Sort-Tile-Recursive'''
+        nodes = self._pack(list(self._bboxes), leaf=True)
+        while len(nodes) > 1:
+            nodes = self._pack(nodes, leaf=False)
+        self._root = nodes[0] if nodes else _RTreeNode([], leaf=True)
+
+    def _pack(self, entries: list, leaf: bool) -> list[_RTreeNode]:
+        '''Groups one level of entries into parent nodes: slices along x, then runs along y'''
+        if not entries:
+            return []
+        capacity = self.max_entries
+        center_x = lambda entry: self._bbox_of(entry, leaf)[0] + self._bbox_of(entry, leaf)[2]
+        center_y = lambda entry: self._bbox_of(entry, leaf)[1] + self._bbox_of(entry, leaf)[3]
+        node_count = math.ceil(len(entries) / capacity)
+        slice_size = math.ceil(math.sqrt(node_count)) * capacity
+        entries = sorted(entries, key=center_x)
+        nodes = []
+        for slice_start in range(0, len(entries), slice_size):
+            vertical_slice = sorted(entries[slice_start:slice_start + slice_size], key=center_y)
+            for run_start in range(0, len(vertical_slice), capacity):
+                node = _RTreeNode(vertical_slice[run_start:run_start + capacity], leaf)
+                self._refresh_bbox(node)
+                nodes.append(node)
+        return nodes
+
+    def clear(self) -> None:
+        super().clear()
+        self._root = _RTreeNode([], leaf=True)
+
+    def _insert(self, key: Hashable, bbox: BBox) -> None:
+        path = [self._root]
+        node = self._root
+        while not node.leaf:
+            node = min(node.children, key=lambda child: (_enlargement(child.bbox, bbox), _area(child.bbox)))
+            path.append(node)
+        node.children.append(key)
+
+        # Grow the bboxes on the way back up, splitting overflowing nodes
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            node.bbox = _union(node.bbox, bbox)
+            if len(node.children) <= self.max_entries:
+                continue
+            sibling = self._split(node)
+            if depth == 0:
+                self._root = _RTreeNode([node, sibling], leaf=False)
+                self._refresh_bbox(self._root)
+            else:
+                path[depth - 1].children.append(sibling)
+
+    def _split(self, node: _RTreeNode) -> _RTreeNode:
+        '''Splits `node` in half along the axis where its children are most spread; returns the new sibling'''
+        bboxes = [self._bbox_of(child, node.leaf) for child in node.children]
+        spread_x = max(b[0] + b[2] for b in bboxes) - min(b[0] + b[2] for b in bboxes)
+        spread_y = max(b[1] + b[3] for b in bboxes) - min(b[1] + b[3] for b in bboxes)
+        axis = 0 if spread_x >= spread_y else 1
+        order = sorted(range(len(bboxes)), key=lambda i: bboxes[i][axis] + bboxes[i][axis + 2])
+        half = len(order) // 2
+        children = node.children
+        node.children = [children[i] for i in order[:half]]
+        sibling = _RTreeNode([children[i] for i in order[half:]], node.leaf)
+        self._refresh_bbox(node)
+        self._refresh_bbox(sibling)
+        return sibling
+
+    def _remove(self, key: Hashable, bbox: BBox) -> None:
+        path = self._find_leaf(self._root, key, bbox, [])
+        assert path is not None, f'RTreeIndex is out of sync: {key!r} is not in the tree'
+        path[-1].children.remove(key)
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            if not node.children and depth > 0:
+                path[depth - 1].children.remove(node)
+            else:
+                self._refresh_bbox(node)
+        while not self._root.leaf and len(self._root.children) == 1:
+            self._root = self._root.children[0]
+        if not self._root.leaf and not self._root.children:
+            self._root = _RTreeNode([], leaf=True)
+
+    def _find_leaf(self, node: _RTreeNode, key: Hashable, bbox: BBox, path: list) -> Optional[list[_RTreeNode]]:
+        path.append(node)
+        if node.leaf:
+            if key in node.children:
+                return path
+        else:
+            for child in node.children:
+                if _covers(child.bbox, bbox) and self._find_leaf(child, key, bbox, path) is not None:
+                    return path
+        path.pop()
+        return None
+
+    def query_point(self, point: Vec2) -> list[Hashable]:
+        x, y = point.x, point.y
+        return self._search(lambda b: b[0] <= x <= b[2] and b[1] <= y <= b[3])
+
+    def query_rect(self, rect: Rect2) -> list[Hashable]:
+        qx0, qy0, qx1, qy1 = rect.tuple_bbox
+        return self._search(lambda b: b[0] <= qx1 and b[2] >= qx0 and b[1] <= qy1 and b[3] >= qy0)
+
+    def _search(self, hits) -> list[Hashable]:
+        if self._root.bbox is None:
+            return []
+        result = []
+        stack = [self._root]
+        bboxes = self._bboxes
+        while stack:
+            node = stack.pop()
+            if node.leaf:
+                result.extend(key for key in node.children if hits(bboxes[key]))
+            else:
+                stack.extend(child for child in node.children if hits(child.bbox))
+        return result
+
+    def nearest(self, point: Vec2, k: int = 1) -> list[Hashable]:
+        if k <= 0 or self._root.bbox is None:
+            return []
+        x, y = point.x, point.y
+        result = []
+        tiebreak = 0
+        heap = [(0.0, tiebreak, False, self._root)] # (distance, tiebreak, is_key, node or key)
+        while heap and len(result) < k:
+            _, _, is_key, entry = heapq.heappop(heap)
+            if is_key:
+                result.append(entry)
+                continue
+            for child in entry.children:
+                tiebreak += 1
+                bbox = self._bboxes[child] if entry.leaf else child.bbox
+                heapq.heappush(heap, (_bbox_point_distance(bbox, x, y), tiebreak, entry.leaf, child))
+        return result
+
+
+def _area(bbox: BBox) -> float:
+    return (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+
+def _union(a: Optional[BBox], b: BBox) -> list[float]:
+    if a is None:
+        return list(b)
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+def _enlargement(a: BBox, b: BBox) -> float:
+    return _area(_union(a, b)) - _area(a)
+
+def _covers(outer: BBox, inner: BBox) -> bool:
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
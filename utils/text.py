@@ -2,7 +2,7 @@ from dataclasses import dataclass
 from typing import Any
 import pygame
 
-from bot_base.util.geometry import Vec2Int
+from utils.geometry import Vec2Int
 
 pygame.font.init()
 
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar, Union
+
+import numpy as np
+
+from utils.crop import crop_views
+from utils.detection import Rects
+from utils.geometry import Number, Rect2, Rect2Array, Vec2
+
+T = TypeVar('T')
+
+
+def _pair(value: Union[Vec2, Number]) -> np.ndarray:
+    return np.array([value.x, value.y] if isinstance(value, Vec2) else [value, value], dtype=float)
+
+
+def _axis_starts(start: float, length: float, tile: float, stride: float) -> np.ndarray:
+    if length <= tile:
+        return np.array([start])
+    last = start + length - tile
+    count = int(np.ceil((length - tile) / stride)) + 1
+    if stride < 1:
+        return np.linspace(start, last, count)
+    while True:
+        starts = np.clip(np.floor(np.linspace(start, last, count)), start, last)
+        starts[-1] = last
+        if np.diff(starts).max() <= stride:
+            return starts
+        count += 1
+
+
+def tile_rects(region: Rect2, tile_size: Union[Vec2, Number], overlap: Union[Vec2, Number] = 0, stride: Optional[Union[Vec2, Number]] = None) -> Rect2Array:
+    '''Grid of `tile_size` tiles covering `region` row by row, at most `stride` apart (`tile_size - overlap` by default)'''
+    size = _pair(tile_size)
+    step = size - _pair(overlap) if stride is None else _pair(stride)
+    if np.any(size <= 0) or np.any(step <= 0):
+        raise ValueError(f'Tile size and stride must be positive, got size {size.tolist()} and stride {step.tolist()}')
+
+    xs = _axis_starts(region.start.x, region.width, size[0], step[0])
+    ys = _axis_starts(region.start.y, region.height, size[1], step[1])
+    starts = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+    ends = np.minimum(starts + size, (region.end.x, region.end.y))
+    return Rect2Array._wrap(np.concatenate([starts, ends], axis=1))
+
+
+class TileExecutor:
+    '''Runs a function over the image crops of many tiles in a thread pool'''
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='tile')
+
+    def __enter__(self) -> 'TileExecutor':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def map(self, function: Callable[[np.ndarray], T], image: np.ndarray, tiles: Rects) -> list[T]:
+        '''`function(crop)` for the crop of every tile, in tile order'''
+        return list(self._pool.map(function, crop_views(image, tiles)))
+
+    def scan(self, function: Callable[[np.ndarray], Rects], image: np.ndarray, tiles: Rects) -> tuple[Rect2Array, np.ndarray]:
+        '''Runs `function(crop)` on every tile, returns the found rects in image coordinates and their tile indices'''
+        tiles = tiles if isinstance(tiles, Rect2Array) else Rect2Array(tiles)
+        results = [found if isinstance(found, Rect2Array) else Rect2Array(found) for found in self.map(function, image, tiles)]
+        counts = [len(found) for found in results]
+        if sum(counts) == 0:
+            return Rect2Array([]), np.empty(0, dtype=int)
+
+        tile_indices = np.repeat(np.arange(len(tiles)), counts)
+        # Crops start at the (integer) pixel where the tile starts
+        offsets = np.floor(tiles.values[tile_indices, :2])
+        bboxes = np.concatenate([found.values for found in results]) + np.tile(offsets, 2)
+        return Rect2Array._wrap(bboxes), tile_indices
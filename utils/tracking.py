@@ -0,0 +1,180 @@
+import itertools
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+import numpy as np
+
+from utils.detection import Rects, connected_components
+from utils.geometry import Rect2, Rect2Array
+
+
+class AssignmentMethod(Enum):
+    GREEDY = 0
+    OPTIMAL = 1
+
+
+@dataclass
+class Track:
+    id: int
+    rect: Rect2
+    hits: int = 1 # Frames with a matched detection
+    misses: int = 0 # Consecutive frames without one
+    age: int = 1 # Frames since birth
+    confirmed: bool = False
+
+
+def _solve_assignment(cost: np.ndarray) -> list[tuple[int, int]]:
+    '''Minimum cost assignment (Hungarian algorithm) of a dense cost matrix: (row, column) pairs'''
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    rows, columns = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    assigned_row = np.zeros(columns + 1, dtype=int) # 1-based row assigned to each column, column 0 is the path root
+    way = np.zeros(columns + 1, dtype=int)
+    for row in range(1, rows + 1):
+        assigned_row[0] = row
+        column = 0
+        min_reduced = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = assigned_row[column]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improved = free & (reduced < min_reduced[1:])
+            min_reduced[1:][improved] = reduced[improved]
+            way[1:][improved] = column
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[assigned_row[used]] += delta
+            v[used] -= delta
+            min_reduced[~used] -= delta
+            column = next_column
+            if assigned_row[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            assigned_row[column] = assigned_row[previous]
+            column = previous
+
+    pairs = [(assigned_row[column] - 1, column - 1) for column in range(1, columns + 1) if assigned_row[column] != 0]
+    return [(column, row) for row, column in pairs] if transposed else pairs
+
+
+class RectTracker:
+    '''Keeps track IDs of on-screen entities across frames, matching detections to tracks greedily or optimally'''
+
+    def __init__(self, max_cost: float = 0.7, iou_weight: float = 1.0, distance_weight: float = 0.0, method: AssignmentMethod = AssignmentMethod.GREEDY, min_hits: int = 1, max_misses: int = 5):
+        self.max_cost = max_cost
+        self.iou_weight = iou_weight
+        self.distance_weight = distance_weight
+        self.method = method
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self._tracks: list[Track] = []
+        self._ids = itertools.count()
+
+    @property
+    def tracks(self) -> list[Track]:
+        '''Every live track, confirmed or not'''
+        return list(self._tracks)
+
+    @property
+    def confirmed_tracks(self) -> list[Track]:
+        return [track for track in self._tracks if track.confirmed]
+
+    def reset(self) -> None:
+        self._tracks.clear()
+
+    def cost_matrix(self, tracks: Rect2Array, detections: Rect2Array) -> np.ndarray:
+        '''(tracks, detections) matrix of matching costs'''
+        cost = np.zeros((len(tracks), len(detections)))
+        if self.iou_weight:
+            cost += self.iou_weight * (1 - tracks.iou_matrix(detections))
+        if self.distance_weight:
+            offsets = tracks.center.values[:, np.newaxis, :] - detections.center.values[np.newaxis, :, :]
+            cost += self.distance_weight * np.sqrt(np.einsum('ijk,ijk->ij', offsets, offsets))
+        return cost
+
+    def update(self, detections: Rects) -> list[Track]:
+        '''Matches this frame's detections and ages the tracks; returns the track of each detection, in order'''
+        detections = detections if isinstance(detections, Rect2Array) else Rect2Array(detections)
+        tracks = Rect2Array([track.rect for track in self._tracks])
+        cost = self.cost_matrix(tracks, detections)
+        matches = self._assign(cost)
+
+        result: list[Optional[Track]] = [None] * len(detections)
+        matched_tracks = set()
+        for track_index, detection_index in matches:
+            track = self._tracks[track_index]
+            track.rect = detections[detection_index]
+            track.hits += 1
+            track.misses = 0
+            result[detection_index] = track
+            matched_tracks.add(track_index)
+
+        survivors = []
+        for track_index, track in enumerate(self._tracks):
+            if track_index not in matched_tracks:
+                track.misses += 1
+                if not track.confirmed or track.misses > self.max_misses:
+                    continue
+            track.age += 1
+            track.confirmed = track.confirmed or track.hits >= self.min_hits
+            survivors.append(track)
+
+        for detection_index, track in enumerate(result):
+            if track is None:
+                track = Track(next(self._ids), detections[detection_index], confirmed=self.min_hits <= 1)
+                result[detection_index] = track
+                survivors.append(track)
+        self._tracks = survivors
+        return result
+
+    def _assign(self, cost: np.ndarray) -> list[tuple[int, int]]:
+        rows, columns = np.nonzero(cost <= self.max_cost)
+        if len(rows) == 0:
+            return []
+
+        if self.method == AssignmentMethod.GREEDY:
+            matches = []
+            used_rows, used_columns = set(), set()
+            for candidate in np.argsort(cost[rows, columns], kind='stable'):
+                row, column = int(rows[candidate]), int(columns[candidate])
+                if row not in used_rows and column not in used_columns:
+                    used_rows.add(row)
+                    used_columns.add(column)
+                    matches.append((row, column))
+            return matches
+
+        if self.method != AssignmentMethod.OPTIMAL:
+            raise ValueError(f'Unknown assignment method {self.method}')
+
+        # Solve each group of competing tracks and detections on its own
+        track_count = cost.shape[0]
+        labels = connected_components(track_count + cost.shape[1], rows, columns + track_count)
+        track_labels, detection_labels = labels[:track_count], labels[track_count:]
+        group_count = labels.max() + 1
+        row_order = np.argsort(track_labels, kind='stable')
+        row_offsets = np.searchsorted(track_labels[row_order], np.arange(group_count + 1))
+        column_order = np.argsort(detection_labels, kind='stable')
+        column_offsets = np.searchsorted(detection_labels[column_order], np.arange(group_count + 1))
+
+        # One track against one detection: their admissible pair is the match
+        pair_labels = track_labels[rows]
+        single = (np.diff(row_offsets)[pair_labels] == 1) & (np.diff(column_offsets)[pair_labels] == 1)
+        matches = list(zip(rows[single].tolist(), columns[single].tolist()))
+
+        for label in np.unique(pair_labels[~single]):
+            group_rows = row_order[row_offsets[label]:row_offsets[label + 1]]
+            group_columns = column_order[column_offsets[label]:column_offsets[label + 1]]
+            group_cost = cost[np.ix_(group_rows, group_columns)]
+            group_cost = np.where(group_cost <= self.max_cost, group_cost, (self.max_cost + 1) * (len(group_rows) + len(group_columns)))
+            for row, column in _solve_assignment(group_cost):
+                if cost[group_rows[row], group_columns[column]] <= self.max_cost:
+                    matches.append((int(group_rows[row]), int(group_columns[column])))
+        return matches